@@ -0,0 +1,28 @@
+-- DOCUMENTATION MODEL ONLY
+-- The actual view is created in sql/migrations/010_create_wastewater_trends.sql
+-- This file exists for dbt documentation and testing purposes
+
+{{
+    config(
+        materialized='view',
+        schema='marts_surveillance',
+        tags=['surveillance', 'wastewater']
+    )
+}}
+
+-- Trends as published by Health Infobase (RAW.WASTEWATER_TRENDS), kept
+-- alongside rpt_viral_trends (LAG windows over the measurements) until
+-- validated. week_over_week_pct averages each site's published change; it
+-- is not the change of the Ontario average.
+
+SELECT 
+    epi_year,
+    epi_week,
+    virus_name,
+    ROUND(AVG(viral_load_avg), 2) as avg_viral_load,
+    ROUND(AVG(prev_week_avg), 2) as prev_week_avg,
+    ROUND(AVG(week_over_week_pct), 1) as week_over_week_pct
+
+FROM {{ source('raw', 'wastewater_trends') }}
+WHERE province = 'Ontario' AND epi_year >= 2024
+GROUP BY epi_year, epi_week, virus_name
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Partitioned backfill of national wastewater history.
+
+Usage:
+    python backfill_wastewater.py                           # All provinces, all years
+    python backfill_wastewater.py --years 2022 2023 --workers 8
+    python backfill_wastewater.py --provinces Ontario Quebec
+    python backfill_wastewater.py --force                   # Ignore checkpoints
+    python backfill_wastewater.py --status                  # Show checkpoints
+
+The aggregate CSV is downloaded once and split into (province, EpiYear)
+partitions while it is parsed. Partitions are transformed in a process pool
+(the transform is CPU-bound pandas work, so that stage scales with cores)
+and each one is loaded into RAW.WASTEWATER_SURVEILLANCE as soon as it is
+ready, with a checkpoint in BACKFILL_STATE_FILE. Partitions are assembled
+and submitted a few at a time, so only those in flight are held twice.
+
+Loads MERGE on the table's natural key, so a partition can be loaded again
+without duplicating rows: re-running the command retries the partitions
+that failed and skips the ones already loaded, unless their rows changed
+(each checkpoint records a hash of the partition's rows).
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import chain
+from typing import Iterator
+
+import pandas as pd
+
+from config import (
+    snowflake_connection,
+    BACKFILL_STATE_FILE,
+    SNOWFLAKE_DATABASE,
+    SCHEMA_RAW
+)
+from ingest_wastewater import WastewaterIngestor
+from loader import load_dataframe
+from watermarks import LocalStateStore
+
+Partition = tuple[str, int]  # (province, epi_year)
+
+
+def checkpoint_key(partition: Partition) -> str:
+    province, year = partition
+    return f"{WastewaterIngestor.DATASET}:{province}:{year}"
+
+
+def split_partitions(ingestor: WastewaterIngestor, source,
+                     years: list[int] | None = None,
+                     provinces: list[str] | None = None) -> dict[Partition, list[pd.DataFrame]]:
+    """
+    Parse the aggregate CSV in chunks and group its rows by (province, EpiYear).
+    
+    Returns each partition's rows as the chunk slices they were parsed in;
+    iter_partitions() joins them one partition at a time.
+    """
+    parts: dict[Partition, list[pd.DataFrame]] = {}
+    
+    for chunk in ingestor.iter_chunks(source):
+        chunk = chunk.dropna(subset=["province", "EpiYear"])
+        if years:
+            chunk = chunk[chunk["EpiYear"].isin(years)]
+        if provinces:
+            chunk = chunk[chunk["province"].isin(provinces)]
+        
+        for (province, year), rows in chunk.groupby(["province", "EpiYear"], sort=False):
+            parts.setdefault((province, int(year)), []).append(rows)
+    
+    return dict(sorted(parts.items()))
+
+
+def iter_partitions(parts: dict[Partition, list[pd.DataFrame]]) -> Iterator[tuple[Partition, pd.DataFrame]]:
+    """Yield each partition as one frame, releasing its chunk slices as it goes."""
+    for key in list(parts):
+        yield key, pd.concat(parts.pop(key), ignore_index=True)
+
+
+def partition_hash(rows: pd.DataFrame) -> str:
+    """SHA-256 of a partition's columns and rows (independent of row order)."""
+    digest = hashlib.sha256(",".join(map(str, rows.columns)).encode())
+    row_hashes = pd.util.hash_pandas_object(rows, index=False)
+    digest.update(row_hashes.sort_values().to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def transform_partition(partition: Partition, rows: pd.DataFrame,
+                        raw_payload: str | None = None) -> pd.DataFrame:
+    """Transform one partition (runs in a worker process)."""
+    province, year = partition
+    ingestor = WastewaterIngestor(province_filter=province, raw_payload=raw_payload)
+    # Workers must not share a RAW_JSON archive file ("off" policy)
+    ingestor.raw_payload.run_id = f"{ingestor.run_id}_{province.replace(' ', '_')}_{year}"
+    return ingestor.transform(rows)
+
+
+class WastewaterBackfill:
+    """Reload wastewater history partition by partition."""
+    
+    def __init__(self, years: list[int] | None = None, provinces: list[str] | None = None,
+                 workers: int | None = None, force: bool = False, dry_run: bool = False,
+                 raw_payload: str | None = None, state: LocalStateStore | None = None):
+        """
+        Args:
+            years: Epi years to backfill (default: every year in the file).
+            provinces: Provinces to backfill (default: every province).
+            workers: Transform processes (default: one per CPU).
+            force: Reload partitions that are already checkpointed as loaded.
+            dry_run: Transform but don't load or checkpoint.
+            raw_payload: RAW_JSON policy override (see raw_payload.py).
+            state: Checkpoint store (default: BACKFILL_STATE_FILE).
+        """
+        self.years = years
+        self.provinces = provinces
+        self.workers = workers or os.cpu_count() or 1
+        self.force = force
+        self.dry_run = dry_run
+        self.raw_payload = raw_payload
+        self.state = state or LocalStateStore(BACKFILL_STATE_FILE)
+        self.ingestor = WastewaterIngestor(province_filter=None, raw_payload=raw_payload)
+    
+    def fetch_partitions(self) -> dict[Partition, list[pd.DataFrame]]:
+        """Download the aggregate CSV once and split it into partitions."""
+        print("Fetching wastewater data from Health Canada...")
+        # A 304 is replayed from the HTTP cache, so the body is always available
+        response = self.ingestor.session.get(self.ingestor.DATA_URL, stream=True, timeout=120)
+        response.raise_for_status()
+        
+        with self.ingestor.open_body(response) as body:
+            partitions = split_partitions(self.ingestor, body, self.years, self.provinces)
+        
+        print(f"  Total records from source: {self.ingestor.rows_read:,}")
+        print(f"  Partitions (province, epi year): {len(partitions):,} "
+              f"({sum(len(f) for frames in partitions.values() for f in frames):,} records)")
+        return partitions
+    
+    def is_loaded(self, partition: Partition, content_hash: str) -> bool:
+        """Whether partition was loaded with exactly these rows."""
+        entry = self.state.get(checkpoint_key(partition))
+        return entry.get("status") == "loaded" and entry.get("content_hash") == content_hash
+    
+    def pending(self, partitions: dict[Partition, list[pd.DataFrame]],
+                skipped: list[Partition]) -> Iterator[tuple[Partition, pd.DataFrame, str]]:
+        """Yield (partition, rows, hash) for partitions to load, appending the rest to skipped."""
+        for partition, rows in iter_partitions(partitions):
+            content_hash = partition_hash(rows)
+            if not self.force and self.is_loaded(partition, content_hash):
+                skipped.append(partition)
+            else:
+                yield partition, rows, content_hash
+    
+    @contextmanager
+    def loader(self):
+        """Yield a function that loads one transformed partition."""
+        if self.dry_run:
+            yield len
+            return
+        
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
+                cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+                cursor.execute(self.ingestor.TABLE_DDL)
+            finally:
+                cursor.close()
+            
+            yield lambda df: load_dataframe(df, self.ingestor.TABLE, conn=conn)
+    
+    def checkpoint(self, partition: Partition, content_hash: str, **fields):
+        if not self.dry_run:
+            self.state.update(checkpoint_key(partition), content_hash=content_hash, **fields)
+    
+    def run(self) -> dict:
+        """Transform partitions in parallel and load each one as it finishes."""
+        result = {
+            "dataset": WastewaterIngestor.DATASET,
+            "run_id": self.ingestor.run_id,
+            "status": "FAILED",
+            "partitions": 0,
+            "loaded": [],
+            "failed": [],
+            "skipped": [],
+            "records_inserted": 0
+        }
+        
+        partitions = self.fetch_partitions()
+        result["partitions"] = len(partitions)
+        
+        pending = self.pending(partitions, result["skipped"])
+        first = next(pending, None)
+        if first is None:
+            print(f"  All {len(result['skipped'])} partitions already loaded (use --force to reload)")
+            result["status"] = "SUCCESS"
+            return result
+        
+        started = time.perf_counter()
+        submitted = 0
+        with self.loader() as load, ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # Keep a couple of partitions queued per worker, not the whole file
+            queue = chain([first], pending)
+            in_flight = {}
+            
+            def submit_next():
+                nonlocal submitted
+                item = next(queue, None)
+                if item is not None:
+                    partition, rows, content_hash = item
+                    future = pool.submit(transform_partition, partition, rows, self.raw_payload)
+                    in_flight[future] = (partition, content_hash)
+                    submitted += 1
+            
+            for _ in range(self.workers * 2):
+                submit_next()
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    partition, content_hash = in_flight.pop(future)
+                    submit_next()
+                    province, year = partition
+                    try:
+                        inserted = load(future.result())
+                    except Exception as e:
+                        print(f"  ✗ {province} {year}: {e}")
+                        self.checkpoint(partition, content_hash, status="failed", error=str(e),
+                                        failed_at=time.time())
+                        result["failed"].append(partition)
+                        continue
+                    
+                    print(f"  ✓ {province} {year}: {inserted:,} rows")
+                    self.checkpoint(partition, content_hash, status="loaded", rows=inserted,
+                                    error=None, loaded_at=time.time())
+                    result["loaded"].append(partition)
+                    result["records_inserted"] += inserted
+        
+        if result["skipped"]:
+            print(f"  Skipped {len(result['skipped'])} partitions already loaded (use --force to reload)")
+        print(f"  {submitted} partitions in {time.perf_counter() - started:.1f}s "
+              f"({self.workers} workers)")
+        result["status"] = "FAILED" if result["failed"] else "SUCCESS"
+        return result
+    
+    def print_status(self):
+        """Show stored partition checkpoints."""
+        entries = self.state.entries(f"{WastewaterIngestor.DATASET}:")
+        if not entries:
+            print("No backfill checkpoints")
+            return
+        
+        print(f"\n{'Partition':40} | {'Status':7} | {'Rows':>9} | Updated")
+        print("-" * 80)
+        for key, entry in sorted(entries.items()):
+            updated = entry.get("loaded_at") or entry.get("failed_at")
+            updated = datetime.fromtimestamp(updated).isoformat(timespec="seconds") if updated else ""
+            rows = entry.get("rows")
+            print(f"{key:40} | {entry.get('status', ''):7} | "
+                  f"{rows if rows is not None else '':>9} | {updated}")
+            if entry.get("error"):
+                print(f"    {entry['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill wastewater history by province and epi year")
+    parser.add_argument("--years", type=int, nargs="+", help="Epi years to backfill (default: all)")
+    parser.add_argument("--provinces", nargs="+", help="Provinces to backfill (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Transform processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="Reload partitions already loaded")
+    parser.add_argument("--dry-run", action="store_true", help="Transform but don't load to Snowflake")
+    parser.add_argument("--status", action="store_true", help="Show partition checkpoints and exit")
+    args = parser.parse_args()
+    
+    backfill = WastewaterBackfill(years=args.years, provinces=args.provinces, workers=args.workers,
+                                  force=args.force, dry_run=args.dry_run)
+    if args.status:
+        backfill.print_status()
+        return 0
+    
+    print("\n" + "="*60)
+    print("Wastewater Backfill (by province and epi year)")
+    print("="*60)
+    
+    result = backfill.run()
+    
+    print(f"\nBackfill complete:")
+    print(f"  Status: {result['status']}")
+    print(f"  Partitions: {result['partitions']} "
+          f"({len(result['loaded'])} loaded, {len(result['skipped'])} skipped, "
+          f"{len(result['failed'])} failed)")
+    print(f"  Records inserted: {result['records_inserted']:,}")
+    if result["failed"]:
+        print("  Re-run to retry the failed partitions")
+    
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,32 +7,99 @@ This provides reusable functionality for:
 - Tracking ingestion runs
 """
 import json
+import time
 import uuid
 from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from typing import Any
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
+from ckan_catalog import get_catalog
+from column_mapping import mapped_fields
 from config import (
     CKAN_BASE_URL,
-    get_snowflake_connection,
+    CKAN_DUMP_URL,
+    DATASETS,
+    snowflake_connection,
     SNOWFLAKE_DATABASE,
     SCHEMA_RAW
 )
+from frame_dtypes import concat_frames, format_memory, optimize_dtypes
+from http_cache import CachedSession
+from loader import load_dataframe
+from raw_payload import RawPayloadPolicy
+from watermarks import get_watermark, set_watermark
 
 
 class BaseIngestor(ABC):
     """Base class for CKAN data ingestion into Snowflake."""
     
-    def __init__(self, dataset_name: str):
+    # CKAN dataset slug; resource ID, last_modified and fields come from
+    # the local catalog (see ckan_catalog.py)
+    dataset_slug: str | None = None
+    
+    # Target column -> rule for transform_records (see column_mapping.py)
+    column_mapping: dict[str, dict] | None = None
+    
+    # Source column used as an incremental watermark (e.g. "_id"). When set,
+    # runs fetch only rows past the value stored in RAW.INGESTION_STATE.
+    watermark_column: str | None = None
+    
+    # Rows requested per datastore_search page
+    page_size: int = 10000
+    
+    # Number of datastore_search pages fetched in parallel after the first
+    # page has reported the total row count. 1 keeps the sequential walk.
+    fetch_concurrency: int = 1
+    
+    # Stream pages through transform/load instead of materializing the
+    # whole resource in memory (see run()).
+    stream_pages: bool = False
+    
+    # Rows buffered between load_to_snowflake calls in streaming mode
+    load_chunk_rows: int = 50000
+    
+    # Resources with at least this many rows are streamed from the CKAN
+    # CSV dump instead of paged as JSON. None always pages.
+    dump_threshold_rows: int | None = 20000
+    
+    # Rows parsed per chunk when reading a CSV dump
+    dump_chunk_rows: int = 10000
+    
+    def __init__(self, dataset_name: str, fetch_concurrency: int | None = None):
         self.dataset_name = dataset_name
         self.run_id = str(uuid.uuid4())[:8]
-        self.session = requests.Session()
+        if fetch_concurrency is not None:
+            self.fetch_concurrency = max(1, fetch_concurrency)
+        self.source_unchanged = False
+        self._resource_id = DATASETS.get(dataset_name, {}).get("resource_id")
+        self._pushdown_active = False
+        self._watermark = None
+        self._watermark_seen = None
+        self._watermark_numeric: bool | None = None
+        self._source_version: dict = {}
+        self.memory_stats: dict[str, int] = {}
+        self.raw_payload = RawPayloadPolicy(
+            dataset_name, typed_fields=mapped_fields(self.column_mapping), run_id=self.run_id
+        )
+        self.catalog = get_catalog()
+        self.session = CachedSession(consumer=self.dataset_name)
         self.session.headers.update({
             "User-Agent": "OntarioHealthPipeline/1.0"
         })
+        # Size the connection pool so concurrent pages reuse keep-alive sockets
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(10, self.fetch_concurrency)
+        )
+        self.session.mount("https://", adapter)
     
     @property
     @abstractmethod
@@ -41,10 +108,11 @@ class BaseIngestor(ABC):
         pass
     
     @property
-    @abstractmethod
     def resource_id(self) -> str | None:
-        """CKAN resource ID for this dataset."""
-        pass
+        """CKAN resource ID for this dataset (pinned in config or from the catalog)."""
+        if self._resource_id is None and self.dataset_slug:
+            self._resource_id = self.discover_resource_id(self.dataset_slug)
+        return self._resource_id
     
     @abstractmethod
     def transform_records(self, records: list[dict]) -> pd.DataFrame:
@@ -52,74 +120,361 @@ class BaseIngestor(ABC):
         pass
     
     def discover_resource_id(self, dataset_slug: str) -> str | None:
-        """Discover the CSV/JSON resource ID for a dataset by its slug."""
-        url = f"{CKAN_BASE_URL}/package_show"
+        """Look up the CSV/JSON resource ID for a dataset slug in the catalog."""
+        resource_id = self.catalog.resource_id(dataset_slug)
+        if resource_id is None:
+            print(f"No CSV/JSON resource found for dataset: {dataset_slug}")
+        return resource_id
+    
+    def check_already_loaded(self) -> bool:
+        """
+        Check if the current version of the resource is already in Snowflake.
+        
+        Compares the resource's last_modified (from the catalog) with the last
+        successful run in INGESTION_LOG. Falls back to "any rows present" when
+        either timestamp is unknown.
+        """
+        last_modified = self.catalog.last_modified(self.dataset_slug) if self.dataset_slug else None
+        
         try:
-            response = self.session.get(url, params={"id": dataset_slug}, timeout=30)
+            with snowflake_connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
+                cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+                cursor.execute("""
+                    SELECT MAX(completed_at) FROM INGESTION_LOG
+                    WHERE dataset_name = %s AND status = 'SUCCESS'
+                """, (self.dataset_name,))
+                last_loaded = cursor.fetchone()[0]
+                
+                if last_modified and last_loaded:
+                    cursor.close()
+                    print(f"  Resource modified {last_modified:%Y-%m-%d %H:%M}, "
+                          f"last loaded {last_loaded:%Y-%m-%d %H:%M}")
+                    return last_loaded >= last_modified
+                
+                cursor.execute(f"SELECT COUNT(*) FROM {self.target_table}")
+                count = cursor.fetchone()[0]
+                cursor.close()
+                
+                return count > 0
+            
+        except Exception:
+            return False
+    
+    def pushdown_conditions(self) -> list[str]:
+        """
+        SQL WHERE fragments for CKAN to evaluate server-side.
+        
+        When non-empty (and the resource is in the datastore) pages are read
+        through datastore_search_sql so only matching rows cross the wire.
+        transform_records must still filter client-side, since the run falls
+        back to plain datastore_search if the SQL endpoint is unavailable.
+        """
+        return []
+    
+    NUMERIC_FIELD_TYPES = {"int", "int4", "int8", "bigint", "numeric", "float", "float8"}
+    
+    def _watermark_is_numeric(self) -> bool:
+        """Whether the watermark column compares as a number (looked up once per run)."""
+        if self._watermark_numeric is None:
+            fields = self.catalog.fields(self.dataset_slug) if self.dataset_slug else []
+            self._watermark_numeric = self.watermark_column == "_id" or any(
+                f["id"] == self.watermark_column and f.get("type") in self.NUMERIC_FIELD_TYPES
+                for f in fields
+            )
+        return self._watermark_numeric
+    
+    def _query_conditions(self) -> list[str]:
+        """pushdown_conditions() plus the watermark filter, if any."""
+        conditions = list(self.pushdown_conditions())
+        if self._watermark is not None:
+            if self._watermark_is_numeric():
+                literal = repr(float(self._watermark)).removesuffix(".0")
+            else:
+                literal = "'" + str(self._watermark).replace("'", "''") + "'"
+            conditions.append(f'"{self.watermark_column}" > {literal}')
+        return conditions
+    
+    def _past_watermark(self, value) -> bool:
+        if value is None or value == "":
+            return False
+        if self._watermark_is_numeric():
+            return float(value) > float(self._watermark)
+        return str(value) > str(self._watermark)
+    
+    def _advance_watermark(self, records: list[dict]):
+        """Track the highest watermark value seen in this run."""
+        values = [r.get(self.watermark_column) for r in records]
+        values = [v for v in values if v is not None and v != ""]
+        if not values:
+            return
+        
+        key = float if self._watermark_is_numeric() else str
+        page_max = max(values, key=key)
+        if self._watermark_seen is None or key(page_max) > key(self._watermark_seen):
+            self._watermark_seen = page_max
+    
+    def _load_watermark(self):
+        """
+        Read the stored watermark, ignoring it if it no longer describes the source.
+        
+        CKAN restarts _id when a resource is re-published, and rows corrected
+        in place keep their _id, so a watermark is dropped (full load; the
+        MERGE on natural keys absorbs the overlap) when the column or resource
+        changed, when the resource now has fewer rows than when the watermark
+        was taken, or when it was modified without gaining rows.
+        """
+        state = get_watermark(self.dataset_name)
+        if state is None:
+            print(f"  No watermark for {self.dataset_name} - full load")
+            return
+        
+        if state["column"] != self.watermark_column or (
+            state["resource_id"] and state["resource_id"] != self.resource_id
+        ):
+            print(f"  Watermark is for a different column/resource - full load")
+            return
+        
+        rows, loaded_rows = self._source_version.get("rows"), state.get("source_rows")
+        if rows is not None and loaded_rows is not None:
+            if rows < loaded_rows:
+                print(f"  Resource shrank from {loaded_rows:,} to {rows:,} rows "
+                      f"(re-published) - full load")
+                return
+            modified = self._source_version.get("modified")
+            if rows == loaded_rows and state.get("source_modified") and modified != state["source_modified"]:
+                print(f"  Resource modified without new rows (corrected in place) - full load")
+                return
+        
+        self._watermark = state["value"]
+        print(f"  Incremental: fetching rows with {self.watermark_column} > {self._watermark}")
+    
+    def _ckan_action(self, action: str, params: dict) -> tuple[dict, requests.Response]:
+        """Call a CKAN action API endpoint and return (result, response)."""
+        url = f"{CKAN_BASE_URL}/{action}"
+        
+        try:
+            response = self.session.get(url, params=params, timeout=60)
             response.raise_for_status()
             data = response.json()
-            
-            if data.get("success"):
-                resources = data["result"].get("resources", [])
-                # Prefer CSV, then JSON
-                for fmt in ["CSV", "JSON"]:
-                    for resource in resources:
-                        if resource.get("format", "").upper() == fmt:
-                            print(f"Found {fmt} resource: {resource['id']}")
-                            return resource["id"]
-            
-            print(f"No CSV/JSON resource found for dataset: {dataset_slug}")
-            return None
-            
-        except Exception as e:
-            print(f"Error discovering resource: {e}")
-            return None
+        except requests.RequestException as e:
+            print(f"API request failed: {e}")
+            raise
+        
+        if not data.get("success"):
+            raise ValueError(f"API returned error: {data.get('error', 'Unknown')}")
+        
+        return data["result"], response
     
-    def fetch_from_api(self, limit: int = 10000) -> list[dict]:
-        """Fetch all records from CKAN datastore API with pagination."""
-        if not self.resource_id:
-            raise ValueError(f"No resource_id configured for {self.dataset_name}")
+    def _select_columns(self) -> str:
+        """Column list for datastore_search_sql, skipping CKAN's _full_text index."""
+        fields = self.catalog.fields(self.dataset_slug) if self.dataset_slug else []
+        columns = [f'"{f["id"]}"' for f in fields if f["id"] != "_full_text"]
+        return ", ".join(columns) if columns else "*"
+    
+    def _fetch_sql_page(self, offset: int, limit: int) -> tuple[dict, requests.Response]:
+        """Fetch a page of rows matching _query_conditions() via datastore_search_sql."""
+        where = " AND ".join(f"({condition})" for condition in self._query_conditions())
+        source = f'"{self.resource_id}" WHERE {where}'
+        order_by = self.watermark_column or "_id"
         
-        url = f"{CKAN_BASE_URL}/datastore_search"
-        all_records = []
-        offset = 0
+        result, response = self._ckan_action("datastore_search_sql", {
+            "sql": f'SELECT {self._select_columns()} FROM {source} '
+                   f'ORDER BY "{order_by}" LIMIT {limit} OFFSET {offset}'
+        })
+        page = {"records": result.get("records", [])}
         
-        print(f"Fetching data from {self.dataset_name}...")
+        # datastore_search_sql doesn't report a total; count once up front
+        if offset == 0:
+            count, _ = self._ckan_action("datastore_search_sql", {
+                "sql": f"SELECT COUNT(*) AS total FROM {source}"
+            })
+            page["total"] = int(count["records"][0]["total"])
         
-        while True:
+        return page, response
+    
+    def _fetch_page(self, offset: int, limit: int) -> dict:
+        """Fetch a single page of records and return its result block."""
+        if self._pushdown_active:
+            result, response = self._fetch_sql_page(offset, limit)
+        else:
             params = {
                 "resource_id": self.resource_id,
                 "limit": limit,
                 "offset": offset
             }
-            
+            if self.watermark_column:
+                # Rows past the watermark are filtered in iter_pages
+                params["sort"] = f"{self.watermark_column} asc"
+            result, response = self._ckan_action("datastore_search", params)
+        
+        # First page answered 304 for a body we already loaded
+        if offset == 0 and limit > 0 and self.session.is_unchanged(response):
+            self.source_unchanged = True
+        
+        return result
+    
+    def _catalog_entry(self) -> dict | None:
+        return self.catalog.get(self.dataset_slug) if self.dataset_slug else None
+    
+    def _can_push_down(self) -> bool:
+        if not self._query_conditions():
+            return False
+        entry = self._catalog_entry()
+        return bool(entry and entry.get("datastore_active"))
+    
+    def _bulk_download_url(self) -> str | None:
+        """
+        URL of a CSV export to stream instead of paging, or None to page.
+        
+        Datastore resources are exported from the CKAN dump endpoint once they
+        reach dump_threshold_rows (learned from a limit=0 probe). CSV resources
+        that aren't in the datastore at all can only be read from their file.
+        """
+        if self._can_push_down():
+            return None
+        
+        entry = self._catalog_entry()
+        if entry and not entry.get("datastore_active"):
+            if entry.get("format") == "CSV" and entry.get("url"):
+                print(f"  Resource not in datastore - downloading CSV file")
+                return entry["url"]
+            return None
+        
+        if self.dump_threshold_rows is None:
+            return None
+        
+        total = self._fetch_page(0, 0).get("total", 0)
+        if total < self.dump_threshold_rows:
+            return None
+        
+        print(f"  {total:,} rows - streaming CSV dump instead of paging")
+        return f"{CKAN_DUMP_URL}/{self.resource_id}"
+    
+    def _iter_csv(self, url: str) -> Iterator[list[dict]]:
+        """Stream a CSV download and yield it as record chunks."""
+        response = self.session.get(url, stream=True, timeout=300)
+        response.raise_for_status()
+        
+        if self.session.is_unchanged(response):
+            response.raw.close()
+            self.source_unchanged = True
+            return
+        
+        if hasattr(response.raw, "decode_content"):
+            response.raw.decode_content = True  # let urllib3 gunzip the stream
+        try:
+            # Keep every value as text (like the JSON API) and map blanks to None
+            for chunk in pd.read_csv(response.raw, chunksize=self.dump_chunk_rows,
+                                     dtype=str, keep_default_na=False, na_values=[""]):
+                chunk = chunk.astype(object).where(chunk.notna(), None)
+                yield chunk.to_dict("records")
+        finally:
+            response.close()
+    
+    def _fetch_first_page(self, limit: int) -> dict:
+        """Fetch offset 0, choosing SQL pushdown when it is available."""
+        self._pushdown_active = self._can_push_down()
+        
+        if self._pushdown_active:
             try:
-                response = self.session.get(url, params=params, timeout=60)
-                response.raise_for_status()
-                data = response.json()
-                
-                if not data.get("success"):
-                    raise ValueError(f"API returned error: {data.get('error', 'Unknown')}")
-                
-                records = data["result"].get("records", [])
+                page = self._fetch_page(0, limit)
+                print(f"  Filter pushdown: {page.get('total', 0)} matching rows")
+                return page
+            except (requests.RequestException, ValueError, KeyError) as e:
+                print(f"  Filter pushdown unavailable ({e}) - filtering client-side")
+                self._pushdown_active = False
+        
+        return self._fetch_page(0, limit)
+    
+    def iter_pages(self, limit: int | None = None) -> Iterator[list[dict]]:
+        """
+        Yield pages of records past the watermark, in offset order.
+        
+        The watermark is normally applied server-side; when the source can't
+        filter (plain datastore_search, CSV dump) it is applied here instead.
+        That path still downloads the whole resource: the filter only keeps
+        already-loaded rows out of the load.
+        """
+        filter_locally = self._watermark is not None
+        
+        for records in self._iter_source_pages(limit):
+            if filter_locally and not self._pushdown_active:
+                records = [r for r in records if self._past_watermark(r.get(self.watermark_column))]
+            if self.watermark_column:
+                self._advance_watermark(records)
+            if records:
+                yield records
+    
+    def _iter_source_pages(self, limit: int | None = None) -> Iterator[list[dict]]:
+        """
+        Yield pages of records from the source in offset order.
+        
+        Large resources are streamed from a CSV export and parsed in chunks
+        (see _bulk_download_url); everything else is paged through the API.
+        
+        The first page is always fetched on its own to learn the resource's
+        total row count. With fetch_concurrency > 1 the remaining offsets are
+        then requested through a thread pool sharing self.session. At most
+        fetch_concurrency pages are in flight at once, so memory stays bounded
+        even when the consumer is slower than the network.
+        """
+        if not self.resource_id:
+            raise ValueError(f"No resource_id configured for {self.dataset_name}")
+        limit = limit or self.page_size
+        
+        bulk_url = self._bulk_download_url()
+        if bulk_url:
+            yield from self._iter_csv(bulk_url)
+            return
+        
+        first_page = self._fetch_first_page(limit)
+        records = first_page.get("records", [])
+        if not records or self.source_unchanged:
+            return
+        yield records
+        
+        total = first_page.get("total", 0)
+        remaining_offsets = range(limit, total, limit)
+        
+        if self.fetch_concurrency > 1 and len(remaining_offsets) > 1:
+            workers = min(self.fetch_concurrency, len(remaining_offsets))
+            print(f"  Fetching {len(remaining_offsets)} more pages with {workers} workers...")
+            
+            offsets = iter(remaining_offsets)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                in_flight = deque(
+                    pool.submit(self._fetch_page, offset, limit)
+                    for offset in islice(offsets, workers)
+                )
+                while in_flight:
+                    page = in_flight.popleft().result()
+                    next_offset = next(offsets, None)
+                    if next_offset is not None:
+                        in_flight.append(pool.submit(self._fetch_page, next_offset, limit))
+                    yield page.get("records", [])
+        else:
+            for offset in remaining_offsets:
+                records = self._fetch_page(offset, limit).get("records", [])
                 if not records:
                     break
-                
-                all_records.extend(records)
-                print(f"  Fetched {len(all_records)} records...")
-                
-                # Check if more records exist
-                total = data["result"].get("total", 0)
-                if len(all_records) >= total:
-                    break
-                
-                offset += limit
-                
-            except requests.RequestException as e:
-                print(f"API request failed: {e}")
-                raise
+                yield records
+    
+    def fetch_from_api(self, limit: int | None = None) -> list[dict]:
+        """Fetch all records from CKAN datastore API with pagination."""
+        print(f"Fetching data from {self.dataset_name}...")
+        started = time.perf_counter()
+        
+        all_records = []
+        for records in self.iter_pages(limit):
+            all_records.extend(records)
+            print(f"  Fetched {len(all_records)} records...")
         
-        print(f"Total records fetched: {len(all_records)}")
+        elapsed = time.perf_counter() - started
+        print(f"Total records fetched: {len(all_records)} in {elapsed:.1f}s "
+              f"(concurrency={self.fetch_concurrency})")
         return all_records
     
     def load_to_snowflake(self, df: pd.DataFrame) -> int:
@@ -128,75 +483,90 @@ class BaseIngestor(ABC):
             print("No data to load")
             return 0
         
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
         try:
-            # Use Snowflake's write_pandas for efficient loading
-            from snowflake.connector.pandas_tools import write_pandas
-            
-            # Ensure we're in the right database/schema
-            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
-            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
-            
-            # Write data
-            success, nchunks, nrows, _ = write_pandas(
-                conn=conn,
-                df=df,
-                table_name=self.target_table,
-                database=SNOWFLAKE_DATABASE,
-                schema=SCHEMA_RAW,
-                auto_create_table=False,  # Table should exist from DDL
-                overwrite=False  # Append mode
-            )
-            
-            print(f"Loaded {nrows} rows to {SCHEMA_RAW}.{self.target_table}")
-            return nrows
-            
+            return load_dataframe(df, self.target_table)
         except Exception as e:
             print(f"Error loading to Snowflake: {e}")
             raise
-        finally:
-            cursor.close()
-            conn.close()
     
     def log_ingestion(self, records_fetched: int, records_inserted: int, 
                       status: str, error_message: str | None = None,
                       api_url: str | None = None):
         """Log ingestion run to tracking table."""
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
+                cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+                
+                cursor.execute("""
+                    INSERT INTO INGESTION_LOG 
+                    (run_id, started_at, completed_at, dataset_name, 
+                     records_fetched, records_inserted, status, error_message, api_url)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    self.run_id,
+                    self._start_time.isoformat() if hasattr(self, '_start_time') else None,
+                    datetime.utcnow().isoformat(),
+                    self.dataset_name,
+                    records_fetched,
+                    records_inserted,
+                    status,
+                    error_message,
+                    api_url
+                ))
+                
+            except Exception as e:
+                print(f"Warning: Could not log ingestion: {e}")
+            finally:
+                cursor.close()
+    
+    def _transform_typed(self, records: list[dict]) -> pd.DataFrame:
+        """transform_records with compact dtypes (see frame_dtypes.py)."""
+        return optimize_dtypes(self.transform_records(records), self.target_table, self.memory_stats)
+    
+    def _run_streaming(self, result: dict[str, Any]):
+        """
+        Fetch, transform and load page by page.
         
-        try:
-            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
-            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+        Pages are transformed as they arrive and loaded in chunks of roughly
+        load_chunk_rows, so peak memory is a few pages plus one load chunk
+        regardless of how large the resource is.
+        """
+        print(f"Streaming data from {self.dataset_name}...")
+        buffered: list[pd.DataFrame] = []
+        buffered_rows = 0
+        
+        for records in self.iter_pages():
+            result["records_fetched"] += len(records)
+            print(f"  Fetched {result['records_fetched']} records...")
             
-            cursor.execute("""
-                INSERT INTO INGESTION_LOG 
-                (run_id, started_at, completed_at, dataset_name, 
-                 records_fetched, records_inserted, status, error_message, api_url)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                self.run_id,
-                self._start_time.isoformat() if hasattr(self, '_start_time') else None,
-                datetime.utcnow().isoformat(),
-                self.dataset_name,
-                records_fetched,
-                records_inserted,
-                status,
-                error_message,
-                api_url
-            ))
+            df = self._transform_typed(records)
+            if df.empty:
+                continue
+            buffered.append(df)
+            buffered_rows += len(df)
             
-        except Exception as e:
-            print(f"Warning: Could not log ingestion: {e}")
-        finally:
-            cursor.close()
-            conn.close()
+            if buffered_rows >= self.load_chunk_rows:
+                result["records_inserted"] += self.load_to_snowflake(concat_frames(buffered))
+                buffered, buffered_rows = [], 0
+        
+        if buffered:
+            result["records_inserted"] += self.load_to_snowflake(concat_frames(buffered))
     
-    def run(self) -> dict[str, Any]:
-        """Execute the full ingestion pipeline."""
+    def run(self, stream: bool | None = None, full_refresh: bool = False) -> dict[str, Any]:
+        """
+        Execute the full ingestion pipeline.
+        
+        Args:
+            stream: Transform and load page by page instead of holding the
+                    whole resource in memory. Defaults to stream_pages.
+            full_refresh: Ignore the stored watermark and reload everything.
+        """
         self._start_time = datetime.utcnow()
+        if stream is None:
+            stream = self.stream_pages
         result = {
             "dataset": self.dataset_name,
             "run_id": self.run_id,
@@ -207,27 +577,57 @@ class BaseIngestor(ABC):
         }
         
         try:
-            # Fetch data
-            records = self.fetch_from_api()
-            result["records_fetched"] = len(records)
+            if self.watermark_column:
+                # Version of the source this run reads; stored with the new watermark
+                entry = self._catalog_entry() or {}
+                self._source_version = {"modified": entry.get("last_modified"),
+                                        "rows": entry.get("row_count")}
+                self._watermark_numeric = None
+                if not full_refresh:
+                    self._load_watermark()
             
-            if not records:
-                result["status"] = "SUCCESS"
-                result["error"] = "No records returned from API"
-                return result
+            if stream:
+                self._run_streaming(result)
+            else:
+                # Fetch data
+                records = self.fetch_from_api()
+                result["records_fetched"] = len(records)
+                
+                if records:
+                    # Transform
+                    df = self._transform_typed(records)
+                    del records
+                    
+                    # Load
+                    result["records_inserted"] = self.load_to_snowflake(df)
             
-            # Transform
-            df = self.transform_records(records)
+            if self.source_unchanged:
+                print(f"Source unchanged since last load (HTTP 304) - skipping")
+                result["status"] = "SKIPPED"
+                result["error"] = "Source unchanged since last load"
+                return result
             
-            # Load
-            rows_inserted = self.load_to_snowflake(df)
-            result["records_inserted"] = rows_inserted
             result["status"] = "SUCCESS"
+            self.session.mark_processed()
+            
+            if self.memory_stats:
+                print(format_memory(self.dataset_name, self.memory_stats))
+            
+            # Advance only after every chunk loaded, so a failed run is retried in full
+            if self._watermark_seen is not None:
+                set_watermark(self.dataset_name, self.watermark_column, self._watermark_seen,
+                              resource_id=self.resource_id, run_id=self.run_id,
+                              source_modified=self._source_version.get("modified"),
+                              source_rows=self._source_version.get("rows"))
+            
+            if not result["records_fetched"]:
+                result["error"] = "No records returned from API"
+                return result
             
             # Log success
             self.log_ingestion(
-                records_fetched=len(records),
-                records_inserted=rows_inserted,
+                records_fetched=result["records_fetched"],
+                records_inserted=result["records_inserted"],
                 status="SUCCESS",
                 api_url=f"{CKAN_BASE_URL}/datastore_search?resource_id={self.resource_id}"
             )
@@ -236,7 +636,7 @@ class BaseIngestor(ABC):
             result["error"] = str(e)
             self.log_ingestion(
                 records_fetched=result["records_fetched"],
-                records_inserted=0,
+                records_inserted=result["records_inserted"],
                 status="FAILED",
                 error_message=str(e)
             )
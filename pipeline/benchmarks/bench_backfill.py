@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark the backfill transform stage across process counts.
+
+Usage:
+    python benchmarks/bench_backfill.py
+    python benchmarks/bench_backfill.py --rows 2000000 --workers 1 2 4 8
+
+Runs offline on synthetic rows shaped like wastewater_aggregate.csv, split
+into (province, EpiYear) partitions as backfill_wastewater.py does, and
+times transforming every partition with each worker count. Nothing is
+loaded. The speedup column should track the worker count up to the number
+of cores (minus the cost of pickling partitions to and from the workers).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add pipeline dir to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backfill_wastewater import transform_partition
+from bench_wastewater_transform import make_rows
+
+
+def partitions_of(df) -> dict:
+    return {
+        (province, int(year)): rows.reset_index(drop=True)
+        for (province, year), rows in df.groupby(["province", "EpiYear"])
+    }
+
+
+def time_transform(partitions: dict, workers: int) -> float:
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(transform_partition, p, rows, "compact") for p, rows in partitions.items()]
+        for future in futures:
+            future.result()
+    return time.perf_counter() - started
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark the backfill transform stage")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic rows to transform")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores}), help="Worker counts to compare")
+    args = parser.parse_args()
+    
+    partitions = partitions_of(make_rows(args.rows))
+    
+    print("\n" + "="*60)
+    print(f"BACKFILL TRANSFORM BENCHMARK ({args.rows:,} rows, "
+          f"{len(partitions)} partitions, {cores} cores)")
+    print("="*60)
+    
+    baseline = None
+    for workers in args.workers:
+        seconds = time_transform(partitions, workers)
+        baseline = baseline or seconds
+        print(f"  {workers:3} workers  {seconds:7.2f}s  speedup {baseline / seconds:4.1f}x")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
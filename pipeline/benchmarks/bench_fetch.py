@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark sequential vs concurrent CKAN page fetching.
+
+Usage:
+    python benchmarks/bench_fetch.py                       # Live CKAN, school cases
+    python benchmarks/bench_fetch.py --concurrency 8
+    python benchmarks/bench_fetch.py --simulate 0.5        # Offline, 0.5s per page
+
+Live mode hits data.ontario.ca; simulated mode replaces each page request
+with a fixed-latency sleep so the fan-out can be measured offline.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add pipeline dir to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ingest_school_cases import SchoolCasesIngestor
+
+
+def simulate_pages(ingestor: SchoolCasesIngestor, total: int, latency: float):
+    """Replace network page fetches with a fixed-latency fake datastore."""
+    ingestor._resource_id = "simulated"
+    
+    def fake_page(offset: int, limit: int) -> dict:
+        time.sleep(latency)
+        end = min(offset + limit, total)
+        return {
+            "total": total,
+            "records": [{"_id": i} for i in range(offset, end)]
+        }
+    
+    ingestor._fetch_page = fake_page
+
+
+def time_fetch(concurrency: int, limit: int, simulate: float | None, total: int) -> tuple[float, int]:
+    ingestor = SchoolCasesIngestor(fetch_concurrency=concurrency)
+    if simulate is not None:
+        simulate_pages(ingestor, total, simulate)
+    
+    started = time.perf_counter()
+    records = ingestor.fetch_from_api(limit=limit)
+    return time.perf_counter() - started, len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CKAN fetch concurrency")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=10000, help="Rows per page")
+    parser.add_argument("--simulate", type=float, default=None,
+                        help="Seconds of latency per simulated page (offline mode)")
+    parser.add_argument("--rows", type=int, default=50000,
+                        help="Total rows in simulated mode")
+    args = parser.parse_args()
+    
+    seq_time, seq_rows = time_fetch(1, args.limit, args.simulate, args.rows)
+    par_time, par_rows = time_fetch(args.concurrency, args.limit, args.simulate, args.rows)
+    
+    print("\n" + "="*60)
+    print("FETCH BENCHMARK")
+    print("="*60)
+    print(f"  Sequential:          {seq_time:7.2f}s  ({seq_rows:,} rows)")
+    print(f"  Concurrent (x{args.concurrency}):    {par_time:7.2f}s  ({par_rows:,} rows)")
+    print(f"  Speedup:             {seq_time / par_time:7.2f}x")
+    
+    if seq_rows != par_rows:
+        print("  WARNING: row counts differ between runs")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
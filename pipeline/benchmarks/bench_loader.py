@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark Parquet + COPY INTO (loader.BulkLoader) against write_pandas.
+
+Usage:
+    python benchmarks/bench_loader.py
+    python benchmarks/bench_loader.py --rows 1000000 --file-rows 100000 --compression zstd
+
+Loads synthetic wastewater-shaped rows into a temporary clone of
+RAW.WASTEWATER_SURVEILLANCE with each loader and reports wall time,
+rows/sec and warehouse execution seconds (from QUERY_HISTORY for the
+benchmark session). Requires Snowflake credentials; nothing is written to
+the real table.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Add pipeline dir to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import snowflake_connection, SCHEMA_RAW
+from loader import BulkLoader
+
+BENCH_TABLE = "BENCH_LOADER_WASTEWATER"
+
+
+def make_rows(n: int) -> pd.DataFrame:
+    rng = random.Random(42)
+    viruses = ["covN2", "fluA", "fluB", "rsv"]
+    rows = []
+    for i in range(n):
+        avg = rng.uniform(0, 500)
+        rows.append({
+            "SOURCE_FILE": "bench_loader",
+            "LOCATION": f"Site {i % 60}",
+            "SITE": f"Site {i % 60}",
+            "CITY": "Toronto",
+            "PROVINCE": "Ontario",
+            "COUNTRY": "Canada",
+            "EPI_YEAR": 2020 + i % 6,
+            "EPI_WEEK": i % 52 + 1,
+            "WEEK_START": "2025-01-06",
+            "VIRUS_CODE": viruses[i % 4],
+            "VIRUS_NAME": viruses[i % 4],
+            "VIRAL_LOAD_AVG": avg,
+            "VIRAL_LOAD_MIN": avg * 0.8,
+            "VIRAL_LOAD_MAX": avg * 1.2,
+            "POPULATION_COVERAGE": rng.uniform(0, 1),
+            "RAW_JSON": json.dumps({"i": i, "w": avg})
+        })
+    return pd.DataFrame(rows)
+
+
+def warehouse_seconds(cursor, since_ms: int) -> float:
+    """Execution time of this session's queries since a point in time."""
+    cursor.execute("""
+        SELECT COALESCE(SUM(execution_time), 0)
+        FROM TABLE(information_schema.query_history_by_session(RESULT_LIMIT => 10000))
+        WHERE start_time >= TO_TIMESTAMP_LTZ(%s, 3)
+    """, (since_ms,))
+    return cursor.fetchone()[0] / 1000
+
+
+def measure(df: pd.DataFrame, mode: str, file_rows: int, compression: str) -> dict:
+    with snowflake_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+        cursor.execute(f"CREATE OR REPLACE TEMPORARY TABLE {BENCH_TABLE} LIKE WASTEWATER_SURVEILLANCE")
+        
+        since_ms = int(time.time() * 1000)
+        started = time.perf_counter()
+        loader = BulkLoader(conn=conn, mode=mode, file_rows=file_rows, compression=compression)
+        loader.add(BENCH_TABLE, df)
+        rows = loader.flush()[BENCH_TABLE]
+        elapsed = time.perf_counter() - started
+        
+        # QUERY_HISTORY lags slightly behind the queries themselves
+        time.sleep(2)
+        wh_seconds = warehouse_seconds(cursor, since_ms)
+        cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        cursor.close()
+    
+    return {
+        "mode": loader.mode,
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed else 0,
+        "warehouse_seconds": wh_seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark COPY INTO vs write_pandas")
+    parser.add_argument("--rows", type=int, default=200_000, help="Synthetic rows to load")
+    parser.add_argument("--file-rows", type=int, default=100_000, help="Rows per Parquet file")
+    parser.add_argument("--compression", default="snappy", help="Parquet codec")
+    args = parser.parse_args()
+    
+    df = make_rows(args.rows)
+    results = [
+        measure(df, "write_pandas", args.file_rows, args.compression),
+        measure(df, "copy", args.file_rows, args.compression)
+    ]
+    
+    print("\n" + "="*60)
+    print(f"LOADER BENCHMARK ({args.rows:,} rows)")
+    print("="*60)
+    for r in results:
+        print(f"  {r['mode']:12} {r['seconds']:7.2f}s  {r['rows_per_sec']:10,.0f} rows/s  "
+              f"{r['warehouse_seconds']:6.2f} warehouse s  ({r['rows']:,} loaded)")
+    
+    if results[1]["mode"] != "copy":
+        print("\n  NOTE: pyarrow not installed - COPY INTO path fell back to write_pandas")
+    
+    if len({r["rows"] for r in results}) != 1:
+        print("  WARNING: loaders loaded different row counts")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
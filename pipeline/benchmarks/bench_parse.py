@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark hospital scraper parse latency, per scraper.
+
+Usage:
+    python benchmarks/bench_parse.py                                  # Synthetic pages
+    python benchmarks/bench_parse.py --pages tests/fixtures/ed_pages  # Recorded pages
+    python benchmarks/bench_parse.py --repeat 50
+
+Each scraper parses its page twice per round: the old way (html.parser,
+whole page) and the tuned way (the default backend - lxml when installed -
+building only the scraper's declared container). Both must extract the
+same records; the speedup column is old / tuned.
+
+Synthetic pages put each network's wait times inside a realistic amount of
+navigation, script and footer markup, in the container the scraper expects.
+"""
+import argparse
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add pipeline dir to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hospital_scrapers.registry import discover
+from html_parsing import PARSER
+
+# Wait-time markup per scraper, wrapped in the element its container matches
+DATA_BLOCKS = {
+    "halton": "<main><p>Last Updated: Dec 28, 10:30 AM</p>"
+              "<div>georgetown<span>01 Hour(s) and 48 Minute(s)</span></div>"
+              "<div>milton<span>02 Hour(s) and 37 Minute(s)</span></div>"
+              "<div>oakville<span>04 Hour(s) and 04 Minute(s)</span></div></main>",
+    "niagara": "<main><h2>Emergency wait times</h2>"
+               "<div><h3>Greater Niagara General</h3><p>2 hours 15 minutes</p></div>"
+               "<div><h3>St. Catharines Site</h3><p>3 hours 40 minutes</p></div>"
+               "<div><h3>Welland Hospital</h3><p>1 hour 5 minutes</p></div>"
+               "<div><h3>Fort Erie Site</h3><p>45 minutes</p></div></main>",
+    "uhn": "<div id='DeltaPlaceHolderMain'><div><p>Toronto General Hospital</p>"
+           "<span>3 hours 5 min</span></div><div><p>Toronto Western Hospital</p>"
+           "<span>2 hours 50 min</span></div></div>",
+    "london": "<main><p>Victoria Hospital: 4 hours 10 minutes</p>"
+              "<p>University Hospital: 2 hours 30 minutes</p></main>",
+    "lakeridge": "<div><h2>Ajax Pickering</h2><p>1 hr 20 min</p></div>"
+                 "<div><h2>Oshawa</h2><p>2 hr 45 min</p></div>"
+                 "<div><h2>Whitby</h2><p>35 min</p></div>",
+    "lakeridge_selenium": "<div><h2>Oshawa Hospital</h2><p>2 hours 45 minutes</p></div>"
+                          "<div><h2>Whitby Hospital</h2><p>1 hour 10 minutes</p></div>",
+    "hamilton": "<div><p>Juravinski Hospital: 2h 5m</p></div>"
+                "<div><p>Hamilton General Hospital: 3 hours 20 minutes</p></div>"
+}
+
+
+def synthetic_page(data: str, nav_links: int = 400, paragraphs: int = 150) -> str:
+    """Wrap a data block in header, navigation, scripts and footer."""
+    nav = "".join(f'<li><a href="/section/{i}" class="nav-link">Section {i}</a></li>'
+                  for i in range(nav_links))
+    scripts = "".join(f"<script>window.__cfg{i} = {{a: {i}, b: 'x'}};</script>" for i in range(40))
+    footer = "".join(f"<p class='fine-print'>Paragraph {i} about parking, visiting hours "
+                     f"and accessibility at our sites.</p>" for i in range(paragraphs))
+    return (f"<html><head><title>Emergency</title>{scripts}</head><body>"
+            f"<header><nav><ul>{nav}</ul></nav></header>{data}"
+            f"<footer>{footer}</footer></body></html>")
+
+
+def load_pages(pages_dir: Path | None, keys) -> dict[str, str]:
+    if pages_dir:
+        return {path.stem: path.read_text() for path in sorted(pages_dir.glob("*.html"))
+                if path.stem in keys}
+    return {key: synthetic_page(DATA_BLOCKS[key]) for key in keys if key in DATA_BLOCKS}
+
+
+def time_parse(scraper, page: str, repeat: int) -> tuple[float, list]:
+    response = SimpleNamespace(text=page)
+    with redirect_stdout(io.StringIO()):
+        scraper.parse(response)  # Warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            records = scraper.parse(response)
+        seconds = (time.perf_counter() - started) / repeat
+    return seconds, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hospital scraper parse latency")
+    parser.add_argument("--pages", type=Path, help="Directory of saved <scraper key>.html pages")
+    parser.add_argument("--repeat", type=int, default=20, help="Parses per measurement")
+    args = parser.parse_args()
+    
+    scrapers, unavailable = discover()
+    pages = load_pages(args.pages, scrapers)
+    
+    print("\n" + "="*72)
+    print(f"SCRAPER PARSE BENCHMARK (html.parser, whole page vs {PARSER} + container)")
+    print("="*72)
+    print(f"  {'Scraper':20} {'Page KB':>8} {'Old ms':>8} {'Tuned ms':>9} {'Speedup':>8}  Records")
+    
+    for key, page in pages.items():
+        scraper = scrapers[key]()
+        tuned, tuned_records = time_parse(scraper, page, args.repeat)
+        
+        scraper.html_parser = "html.parser"
+        scraper.container = None
+        old, old_records = time_parse(scraper, page, args.repeat)
+        
+        same = "same" if tuned_records == old_records else "DIFFERENT"
+        print(f"  {key:20} {len(page) / 1024:8.0f} {old * 1000:8.2f} {tuned * 1000:9.2f} "
+              f"{old / tuned:7.1f}x  {len(tuned_records)} ({same})")
+    
+    for module in unavailable:
+        print(f"  {module:20} unavailable")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
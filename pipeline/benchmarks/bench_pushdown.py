@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark outbreak filter pushdown (datastore_search_sql) vs client-side filtering.
+
+Usage:
+    python benchmarks/bench_pushdown.py
+    python benchmarks/bench_pushdown.py --halton-only
+
+Hits data.ontario.ca live and reports bytes transferred, request count,
+wall time and rows kept for both modes. The HTTP cache is bypassed so
+every run measures real transfers.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add pipeline dir to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ingest_outbreaks import OutbreaksIngestor
+
+
+def measure(pushdown: bool, halton_only: bool) -> dict:
+    ingestor = OutbreaksIngestor(halton_only=halton_only, pushdown=pushdown)
+    ingestor.session.cache = None
+    
+    transfer = {"bytes": 0, "requests": 0}
+    
+    def count_bytes(response, *args, **kwargs):
+        transfer["bytes"] += len(response.content)
+        transfer["requests"] += 1
+    
+    ingestor.session.hooks["response"].append(count_bytes)
+    
+    started = time.perf_counter()
+    records = ingestor.fetch_from_api()
+    df = ingestor.transform_records(records)
+    elapsed = time.perf_counter() - started
+    
+    return {
+        "seconds": elapsed,
+        "bytes": transfer["bytes"],
+        "requests": transfer["requests"],
+        "fetched": len(records),
+        "kept": len(df),
+        "pushdown_used": ingestor._pushdown_active
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark outbreak filter pushdown")
+    parser.add_argument("--halton-only", action="store_true", help="Also push down the Halton PHU filter")
+    args = parser.parse_args()
+    
+    client = measure(pushdown=False, halton_only=args.halton_only)
+    server = measure(pushdown=True, halton_only=args.halton_only)
+    
+    print("\n" + "="*60)
+    print("PUSHDOWN BENCHMARK")
+    print("="*60)
+    for label, r in [("Client-side", client), ("Pushdown", server)]:
+        print(f"  {label:12} {r['seconds']:7.2f}s  {r['bytes'] / 1e6:8.2f} MB  "
+              f"{r['requests']:3} requests  {r['fetched']:6,} fetched  {r['kept']:6,} kept")
+    
+    if not server["pushdown_used"]:
+        print("\n  NOTE: datastore_search_sql unavailable - pushdown fell back to client-side")
+    elif server["bytes"]:
+        print(f"\n  Bytes saved: {(client['bytes'] - server['bytes']) / 1e6:.2f} MB "
+              f"({client['bytes'] / server['bytes']:.1f}x less)")
+        print(f"  Time saved:  {client['seconds'] - server['seconds']:.2f}s")
+    
+    if client["kept"] != server["kept"]:
+        print("  WARNING: modes kept different row counts")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
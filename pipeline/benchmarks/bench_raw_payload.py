@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark RAW_JSON payload policies (raw_payload.RawPayloadPolicy).
+
+Usage:
+    python benchmarks/bench_raw_payload.py
+    python benchmarks/bench_raw_payload.py --rows 500000 --snowflake
+
+Encodes synthetic wastewater rows under each policy and reports encode
+time and payload bytes (also with the stdlib json encoder when orjson is
+installed). With --snowflake, each policy's transformed frame is also
+loaded into a transient clone of RAW.WASTEWATER_SURVEILLANCE and the load
+time and table bytes are reported; the clones are dropped afterwards.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add pipeline dir to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import raw_payload
+from bench_wastewater_transform import make_rows
+from ingest_wastewater import WastewaterIngestor
+
+POLICIES = ["full", "compact", "sampled", "off"]
+
+
+def payload_bytes(values: list) -> int:
+    return sum(len(v) for v in values if v is not None)
+
+
+def measure_encode(df, mode: str, archive_dir: str) -> dict:
+    ingestor = WastewaterIngestor(province_filter=None, raw_payload=mode)
+    ingestor.raw_payload.archive_dir = Path(archive_dir)
+    
+    started = time.perf_counter()
+    transformed = ingestor.transform(df)
+    elapsed = time.perf_counter() - started
+    
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "bytes": payload_bytes(transformed["RAW_JSON"].tolist()),
+        "frame": transformed
+    }
+
+
+def measure_load(transformed, mode: str) -> dict:
+    from config import snowflake_connection, SCHEMA_RAW
+    from loader import BulkLoader
+    
+    table = f"BENCH_RAW_PAYLOAD_{mode.upper()}"
+    with snowflake_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+        cursor.execute(f"CREATE OR REPLACE TRANSIENT TABLE {table} LIKE WASTEWATER_SURVEILLANCE")
+        
+        started = time.perf_counter()
+        loader = BulkLoader(conn=conn, write_mode="append")
+        loader.add(table, transformed)
+        loader.flush()
+        elapsed = time.perf_counter() - started
+        
+        cursor.execute(f"SHOW TABLES LIKE '{table}' IN SCHEMA {SCHEMA_RAW}")
+        columns = [c[0].lower() for c in cursor.description]
+        table_bytes = cursor.fetchone()[columns.index("bytes")]
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.close()
+    
+    return {"load_seconds": elapsed, "table_bytes": table_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAW_JSON payload policies")
+    parser.add_argument("--rows", type=int, default=200_000, help="Synthetic rows to encode")
+    parser.add_argument("--snowflake", action="store_true",
+                        help="Also load each policy into Snowflake (needs credentials)")
+    args = parser.parse_args()
+    
+    df = make_rows(args.rows)
+    results = []
+    
+    with tempfile.TemporaryDirectory() as archive_dir:
+        for mode in POLICIES:
+            result = measure_encode(df, mode, archive_dir)
+            if args.snowflake:
+                result.update(measure_load(result["frame"], mode))
+            results.append(result)
+        
+        stdlib = None
+        if raw_payload.HAS_ORJSON:
+            # The compact policy again, serialized with the json module
+            def stdlib_dumps(record) -> str:
+                return json.dumps(record, default=raw_payload._json_default, separators=(",", ":"))
+            
+            with patch.object(raw_payload, "dumps", stdlib_dumps):
+                stdlib = measure_encode(df, "compact", archive_dir)
+    
+    print("\n" + "="*60)
+    print(f"RAW_JSON PAYLOAD BENCHMARK ({args.rows:,} rows)")
+    print("="*60)
+    for r in results:
+        line = f"  {r['mode']:8} transform {r['seconds']:6.2f}s  RAW_JSON {r['bytes'] / 1e6:8.1f} MB"
+        if "load_seconds" in r:
+            line += f"  load {r['load_seconds']:6.2f}s  table {r['table_bytes'] / 1e6:8.1f} MB"
+        print(line)
+    
+    if stdlib:
+        compact = next(r for r in results if r["mode"] == "compact")
+        print(f"\n  compact with json instead of orjson: {stdlib['seconds']:.2f}s "
+              f"({stdlib['seconds'] / compact['seconds']:.1f}x)")
+    else:
+        print("\n  NOTE: orjson not installed - all policies used the json module")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
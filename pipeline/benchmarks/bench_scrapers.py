@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark every hospital scraper against the recorded page corpus.
+
+Usage:
+    python benchmarks/bench_scrapers.py
+    python benchmarks/bench_scrapers.py --latency 0.2          # Simulated round trip
+    python benchmarks/bench_scrapers.py --parser html.parser --no-container
+
+Runs offline: pages from tests/fixtures/ed_pages are served by a local
+ReplayServer (see page_replay.py) and each scraper fetches and parses its
+page --rounds times. Per scraper it reports the median fetch and parse
+time, the peak memory allocated while parsing (tracemalloc) and extraction
+accuracy against expected.json (correct / expected, plus unexpected
+records). The last line times one scrape of all networks through the
+concurrent engine, as MultiNetworkEDScraper runs it.
+
+Compare parser changes by running this before and after: speed and
+accuracy should both hold or improve.
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add pipeline dir to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from hospital_scrapers.engine import scrape_networks
+from hospital_scrapers.registry import discover
+from html_parsing import PARSER
+from page_replay import ED_PAGES_DIR, ReplayServer, load_expected, replay_scraper, score
+
+
+def measure(scraper, rounds: int) -> dict:
+    fetch_times, parse_times = [], []
+    with redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            started = time.perf_counter()
+            response = scraper.fetch()
+            fetch_times.append(time.perf_counter() - started)
+            
+            started = time.perf_counter()
+            records = scraper.parse(response)
+            parse_times.append(time.perf_counter() - started)
+        
+        # Separate pass: tracing slows parsing down too much to time it
+        tracemalloc.start()
+        try:
+            scraper.parse(response)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    
+    return {
+        "fetch": statistics.median(fetch_times),
+        "parse": statistics.median(parse_times),
+        "peak_kb": peak / 1024,
+        "page_kb": len(response.text) / 1024,
+        "records": records
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hospital scrapers on recorded pages")
+    parser.add_argument("--pages", type=Path, default=ED_PAGES_DIR, help="Recorded pages directory")
+    parser.add_argument("--rounds", type=int, default=20, help="Fetch + parse rounds per scraper")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per response")
+    parser.add_argument("--parser", default=PARSER, help="BeautifulSoup backend (lxml, html.parser)")
+    parser.add_argument("--no-container", action="store_true",
+                        help="Parse whole pages instead of each scraper's container")
+    args = parser.parse_args()
+    
+    scrapers, unavailable = discover()
+    expected = load_expected(args.pages)
+    
+    print("\n" + "="*88)
+    print(f"SCRAPER BENCHMARK ({args.parser}, {'whole page' if args.no_container else 'container'}, "
+          f"{args.latency * 1000:.0f} ms latency, {args.rounds} rounds)")
+    print("="*88)
+    print(f"  {'Scraper':20} {'Page KB':>7} {'Fetch ms':>9} {'Parse ms':>9} {'Peak KB':>8}  "
+          f"{'Accuracy':>8}  Unexpected")
+    
+    totals = {"correct": 0, "expected": 0, "unexpected": 0}
+    with ReplayServer(args.pages, latency=args.latency) as server:
+        targets = []
+        for key, cls in scrapers.items():
+            if key not in expected:
+                print(f"  {key:20} no recorded page")
+                continue
+            
+            scraper = replay_scraper(cls, server.url_for(key))
+            scraper.html_parser = args.parser
+            if args.no_container:
+                scraper.container = None
+            targets.append(scraper)
+            
+            result = measure(scraper, args.rounds)
+            accuracy = score(result["records"], expected[key])
+            for field in totals:
+                totals[field] += accuracy[field] if field != "unexpected" else len(accuracy["unexpected"])
+            
+            print(f"  {key:20} {result['page_kb']:7.0f} {result['fetch'] * 1000:9.2f} "
+                  f"{result['parse'] * 1000:9.2f} {result['peak_kb']:8.0f}  "
+                  f"{accuracy['correct']:>3}/{accuracy['expected']:<4}  {len(accuracy['unexpected'])}")
+        
+        for module in unavailable:
+            print(f"  {module:20} unavailable")
+        
+        with redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            outcomes = scrape_networks(targets)
+            elapsed = time.perf_counter() - started
+    
+    print("-"*88)
+    print(f"  Accuracy: {totals['correct']}/{totals['expected']} records, "
+          f"{totals['unexpected']} unexpected")
+    print(f"  All networks through the scrape engine: {elapsed * 1000:.1f} ms "
+          f"({sum(o['status'] == 'ok' for o in outcomes)}/{len(outcomes)} ok)")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of the wastewater CSV fetch.
+
+Usage:
+    python benchmarks/bench_wastewater_fetch.py
+    python benchmarks/bench_wastewater_fetch.py --rows 2000000 --chunk-rows 50000
+
+Writes a synthetic national wastewater_aggregate.csv (5 provinces) and
+parses it the old way (response.text -> StringIO -> full DataFrame -> filter)
+and with WastewaterIngestor.iter_chunks, reporting the peak Python heap
+(tracemalloc) and the number of Ontario rows each produced. Runs offline.
+"""
+import argparse
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+# Add pipeline dir to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from bench_wastewater_transform import make_rows
+from ingest_wastewater import WastewaterIngestor
+
+
+def legacy_fetch(body: bytes, province: str) -> pd.DataFrame:
+    """The whole-file parse this benchmark replaces (kept for comparison)."""
+    text = body.decode()
+    df = pd.read_csv(io.StringIO(text))
+    return df[df["province"] == province]
+
+
+def streamed_fetch(body: bytes, province: str, chunk_rows: int) -> pd.DataFrame:
+    ingestor = WastewaterIngestor(province_filter=province)
+    ingestor.csv_chunk_rows = chunk_rows
+    return pd.concat(ingestor.iter_chunks(io.BytesIO(body)), ignore_index=True)
+
+
+def measure(fn, *args) -> tuple[int, float, float]:
+    """Rows, seconds and peak heap MB (timed and traced in separate runs)."""
+    started = time.perf_counter()
+    df = fn(*args)
+    elapsed = time.perf_counter() - started
+    
+    # tracemalloc slows allocation-heavy code, so it isn't timed
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(df), elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wastewater CSV fetch memory")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic national rows")
+    parser.add_argument("--chunk-rows", type=int, default=WastewaterIngestor.csv_chunk_rows)
+    args = parser.parse_args()
+    
+    body = make_rows(args.rows).to_csv(index=False).encode()
+    print(f"Synthetic CSV: {args.rows:,} rows, {len(body) / 1e6:.1f} MB")
+    
+    # The raw body is held by both runs (it stands in for the socket)
+    legacy = measure(legacy_fetch, body, "Ontario")
+    streamed = measure(streamed_fetch, body, "Ontario", args.chunk_rows)
+    
+    print("\n" + "="*60)
+    print("WASTEWATER FETCH BENCHMARK")
+    print("="*60)
+    for name, (rows, seconds, peak) in [("whole file", legacy), ("chunked", streamed)]:
+        print(f"  {name:10}  {rows:>9,} Ontario rows  {seconds:6.2f}s  peak heap {peak:8.1f} MB")
+    
+    return 0 if legacy[0] == streamed[0] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark WastewaterIngestor.transform against the original iterrows version.
+
+Usage:
+    python benchmarks/bench_wastewater_transform.py
+    python benchmarks/bench_wastewater_transform.py --sizes 10000 100000 --max-legacy-rows 100000
+
+Runs offline on synthetic rows shaped like wastewater_aggregate.csv
+(all-provinces mode). For each size it times both implementations and
+checks that every column except RAW_JSON matches.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add pipeline dir to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ingest_wastewater import WastewaterIngestor
+
+
+def legacy_transform(ingestor: WastewaterIngestor, df: pd.DataFrame) -> pd.DataFrame:
+    """The row-by-row transform this benchmark replaces (kept for comparison)."""
+    transformed = []
+    
+    for _, row in df.iterrows():
+        try:
+            year = int(row["EpiYear"])
+            week = int(row["EpiWeek"])
+            week_start = row.get("weekstart")
+            if pd.isna(week_start):
+                week_start = None
+        except (ValueError, TypeError):
+            week_start = None
+        
+        virus_code = row.get("measureid", "")
+        virus_name = ingestor.VIRUS_NAMES.get(virus_code, virus_code)
+        
+        transformed.append({
+            "SOURCE_FILE": f"wastewater_{ingestor.run_id}",
+            "LOCATION": row.get("Location"),
+            "SITE": row.get("site"),
+            "CITY": row.get("city"),
+            "PROVINCE": row.get("province"),
+            "COUNTRY": row.get("country", "Canada"),
+            "EPI_YEAR": int(row["EpiYear"]) if pd.notna(row.get("EpiYear")) else None,
+            "EPI_WEEK": int(row["EpiWeek"]) if pd.notna(row.get("EpiWeek")) else None,
+            "WEEK_START": week_start,
+            "VIRUS_CODE": virus_code,
+            "VIRUS_NAME": virus_name,
+            "VIRAL_LOAD_AVG": float(row["w_avg"]) if pd.notna(row.get("w_avg")) else None,
+            "VIRAL_LOAD_MIN": float(row["min"]) if pd.notna(row.get("min")) else None,
+            "VIRAL_LOAD_MAX": float(row["max"]) if pd.notna(row.get("max")) else None,
+            "POPULATION_COVERAGE": float(row["populationcoverage"]) if pd.notna(row.get("populationcoverage")) else None,
+            "RAW_JSON": json.dumps(row.to_dict(), default=str)
+        })
+    
+    return pd.DataFrame(transformed)
+
+
+def make_rows(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    provinces = ["Ontario", "Quebec", "Alberta", "British Columbia", "Manitoba"]
+    measures = ["covN2", "fluA", "fluB", "rsv"]
+    avg = rng.uniform(0, 500, n)
+    avg[rng.random(n) < 0.05] = np.nan  # Some weeks have no measurement
+    
+    return pd.DataFrame({
+        "Location": [f"Site {i % 80}" for i in range(n)],
+        "site": [f"Site {i % 80}" for i in range(n)],
+        "city": "Toronto",
+        "province": [provinces[i % 5] for i in range(n)],
+        "country": "Canada",
+        "EpiYear": 2020 + np.arange(n) % 6,
+        "EpiWeek": np.arange(n) % 52 + 1,
+        "weekstart": "2025-01-05",
+        "measureid": [measures[i % 4] for i in range(n)],
+        "w_avg": avg,
+        "min": avg * 0.8,
+        "max": avg * 1.2,
+        "populationcoverage": rng.uniform(1e4, 3e6, n),
+        "pruid": 35
+    })
+
+
+def outputs_match(new: pd.DataFrame, old: pd.DataFrame) -> bool:
+    columns = [c for c in old.columns if c != "RAW_JSON"]
+    new, old = new[columns].astype(object), old[columns].astype(object)
+    return bool((new.eq(old) | (new.isna() & old.isna())).all().all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the wastewater transform")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--max-legacy-rows", type=int, default=1_000_000,
+                        help="Skip the (slow) iterrows version above this size")
+    args = parser.parse_args()
+    
+    ingestor = WastewaterIngestor(province_filter=None)
+    results = []
+    
+    for n in args.sizes:
+        df = make_rows(n)
+        
+        started = time.perf_counter()
+        new = ingestor.transform(df)
+        vectorized = time.perf_counter() - started
+        
+        legacy = None
+        match = None
+        if n <= args.max_legacy_rows:
+            started = time.perf_counter()
+            old = legacy_transform(ingestor, df)
+            legacy = time.perf_counter() - started
+            match = outputs_match(new, old)
+        
+        results.append((n, vectorized, legacy, match))
+    
+    print("\n" + "="*60)
+    print("WASTEWATER TRANSFORM BENCHMARK")
+    print("="*60)
+    for n, vectorized, legacy, match in results:
+        line = f"  {n:>9,} rows  vectorized {vectorized:7.2f}s"
+        if legacy is not None:
+            line += f"  iterrows {legacy:7.2f}s  {legacy / vectorized:6.1f}x faster"
+            line += "  outputs match" if match else "  OUTPUTS DIFFER"
+        print(line)
+    
+    return 0 if all(m is not False for *_, m in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Local catalog of Ontario Data Catalogue (CKAN) resources.
+
+Maps dataset slug -> resource ID, format, last_modified, datastore field
+schema and row count, persisted to CKAN_CATALOG_FILE with a TTL. Ingestors resolve their
+resource IDs here instead of calling package_show on every run; a warm
+catalog needs no network at all. When the catalog is stale every known
+dataset is refreshed together with a single package_search call; if that
+fails, stale entries are served without retrying until another TTL passes.
+
+Usage:
+    python ckan_catalog.py              # Show catalog contents
+    python ckan_catalog.py --refresh    # Force a bulk refresh
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config import (
+    CKAN_BASE_URL,
+    CKAN_CATALOG_FILE,
+    CKAN_CATALOG_TTL_HOURS,
+    DATASETS
+)
+from http_cache import CachedSession
+
+
+class ResourceCatalog:
+    """Slug -> resource metadata, cached on disk."""
+    
+    # Resource formats in order of preference
+    PREFERRED_FORMATS = ["CSV", "JSON"]
+    
+    def __init__(self, path: Path | str = CKAN_CATALOG_FILE,
+                 ttl_hours: float = CKAN_CATALOG_TTL_HOURS,
+                 session=None):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_hours * 3600
+        self.session = session if session is not None else CachedSession()
+        self._lock = threading.Lock()
+        self._data: dict | None = None
+        self._refresh_failed_at = 0.0
+    
+    def _load(self) -> dict:
+        if self._data is None:
+            try:
+                self._data = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                self._data = {"refreshed_at": 0, "datasets": {}}
+        return self._data
+    
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".json.{os.getpid()}")
+        tmp.write_text(json.dumps(self._data, indent=2))
+        os.replace(tmp, self.path)
+    
+    def is_stale(self) -> bool:
+        return time.time() - self._load().get("refreshed_at", 0) > self.ttl_seconds
+    
+    def get(self, slug: str) -> dict | None:
+        """Catalog entry for slug, refreshing in bulk if stale or missing."""
+        with self._lock:
+            data = self._load()
+            # After a failed refresh, serve stale entries until the next TTL
+            backing_off = time.time() - self._refresh_failed_at <= self.ttl_seconds
+            if slug not in data["datasets"] or (self.is_stale() and not backing_off):
+                try:
+                    self._refresh(self._known_slugs() | {slug})
+                except Exception as e:
+                    # A stale entry is still better than no entry
+                    self._refresh_failed_at = time.time()
+                    print(f"Warning: Could not refresh CKAN catalog: {e}")
+            return data["datasets"].get(slug)
+    
+    def resource_id(self, slug: str) -> str | None:
+        entry = self.get(slug)
+        return entry["resource_id"] if entry else None
+    
+    def last_modified(self, slug: str) -> datetime | None:
+        """Resource last_modified (UTC, naive) as reported by CKAN."""
+        entry = self.get(slug)
+        if not entry or not entry.get("last_modified"):
+            return None
+        try:
+            return datetime.fromisoformat(entry["last_modified"])
+        except ValueError:
+            return None
+    
+    def fields(self, slug: str) -> list[dict]:
+        entry = self.get(slug)
+        return entry.get("fields", []) if entry else []
+    
+    def row_count(self, slug: str) -> int | None:
+        """Datastore row count as of the resource's last_modified."""
+        entry = self.get(slug)
+        return entry.get("row_count") if entry else None
+    
+    def refresh(self, slugs: set[str] | None = None):
+        """Refresh the given slugs (default: every known dataset) in bulk."""
+        with self._lock:
+            self._load()
+            self._refresh(slugs or self._known_slugs())
+    
+    def _known_slugs(self) -> set[str]:
+        slugs = {d["slug"] for d in DATASETS.values() if d.get("slug")}
+        return slugs | set(self._load()["datasets"])
+    
+    def _refresh(self, slugs: set[str]):
+        if not slugs:
+            return
+        print(f"Refreshing CKAN catalog ({len(slugs)} datasets)...")
+        
+        # One package_search call covers every dataset
+        name_filter = " OR ".join(f'"{slug}"' for slug in sorted(slugs))
+        response = self.session.get(
+            f"{CKAN_BASE_URL}/package_search",
+            params={"fq": f"name:({name_filter})", "rows": len(slugs)},
+            timeout=30
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("success"):
+            raise ValueError(f"API returned error: {data.get('error', 'Unknown')}")
+        
+        datasets = self._data["datasets"]
+        for package in data["result"].get("results", []):
+            resource = self._pick_resource(package.get("resources", []))
+            if resource is None:
+                print(f"No CSV/JSON resource found for dataset: {package['name']}")
+                continue
+            
+            previous = datasets.get(package["name"], {})
+            entry = {
+                "resource_id": resource["id"],
+                "format": resource.get("format", "").upper(),
+                "last_modified": resource.get("last_modified") or resource.get("metadata_modified"),
+                "datastore_active": bool(resource.get("datastore_active")),
+                "url": resource.get("url"),
+                "fields": previous.get("fields", []),
+                "row_count": previous.get("row_count")
+            }
+            
+            # Field schema and row count only change with the resource itself
+            if entry["datastore_active"] and (
+                previous.get("resource_id") != entry["resource_id"]
+                or previous.get("last_modified") != entry["last_modified"]
+                or not entry["fields"]
+            ):
+                entry.update(self._fetch_schema(entry["resource_id"]))
+            
+            datasets[package["name"]] = entry
+            print(f"  {package['name']}: {entry['format']} {entry['resource_id']}")
+        
+        self._data["refreshed_at"] = time.time()
+        self._save()
+    
+    def _pick_resource(self, resources: list[dict]) -> dict | None:
+        for fmt in self.PREFERRED_FORMATS:
+            for resource in resources:
+                if resource.get("format", "").upper() == fmt:
+                    return resource
+        return None
+    
+    def _fetch_schema(self, resource_id: str) -> dict:
+        """{"fields", "row_count"} from a limit=0 datastore_search (empty on failure)."""
+        try:
+            response = self.session.get(
+                f"{CKAN_BASE_URL}/datastore_search",
+                params={"resource_id": resource_id, "limit": 0},
+                timeout=30
+            )
+            response.raise_for_status()
+            data = response.json()
+            if data.get("success"):
+                return {
+                    "fields": [
+                        {"id": f["id"], "type": f.get("type")}
+                        for f in data["result"].get("fields", [])
+                    ],
+                    "row_count": data["result"].get("total")
+                }
+        except Exception as e:
+            print(f"  Warning: Could not fetch fields for {resource_id}: {e}")
+        return {}
+
+
+_catalog: ResourceCatalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> ResourceCatalog:
+    """Process-wide catalog shared by all ingestors."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ResourceCatalog()
+        return _catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or refresh the local CKAN catalog")
+    parser.add_argument("--refresh", action="store_true", help="Force a bulk refresh")
+    args = parser.parse_args()
+    
+    catalog = get_catalog()
+    if args.refresh:
+        catalog.refresh()
+    
+    data = catalog._load()
+    refreshed = data.get("refreshed_at", 0)
+    print(f"\nCatalog: {catalog.path}")
+    print(f"Refreshed: {datetime.fromtimestamp(refreshed).isoformat() if refreshed else 'never'}"
+          f"{' (stale)' if catalog.is_stale() else ''}")
+    
+    for slug, entry in sorted(data["datasets"].items()):
+        print(f"\n  {slug}")
+        print(f"    Resource: {entry['format']} {entry['resource_id']}")
+        print(f"    Last modified: {entry.get('last_modified')}")
+        print(f"    Fields: {', '.join(f['id'] for f in entry.get('fields', []))}")
+
+
+if __name__ == "__main__":
+    main()
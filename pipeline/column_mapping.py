@@ -0,0 +1,158 @@
+"""
+Declarative column mappings for record transforms (CKAN records, CSV rows).
+
+Each ingestor describes its target table as an ordered mapping of target
+column -> rule, and apply_mapping() compiles the rules into column-wise
+DataFrame operations over the whole batch of records:
+
+    column_mapping = {
+        "SOURCE_FILE": {"value": "ckan_outbreaks_{now:%Y%m%d}"},
+        "OUTBREAK_ID": {"source": ["outbreak_id", "_id"], "type": "str"},
+        "TOTAL_CASES": {"source": "cases_total", "type": "int",
+                        "fallback": {"sum": ["resident_cases", "staff_cases"]}},
+        "RAW_JSON": {"type": "json"}
+    }
+
+Rule keys:
+    source:   Source field, or list of fields coalesced left to right
+              (like `a or b`: the first value that is not None / NaN / "").
+    sum:      List of fields converted to int and added (type is int).
+    value:    Constant for every row; strings are formatted with `now`
+              (evaluated once per batch, not per record).
+    type:     "raw" (default, values as-is), "str", "int", "float",
+              "date" (YYYY-MM-DD strings via date_parsing) or "json"
+              (the source record, serialized per the dataset's RAW_JSON
+              policy; see raw_payload.py).
+    default:  Used where the result is missing (int defaults to 0).
+    fallback: Rule whose result replaces falsy results (None, "", 0).
+    apply:    Callable applied to the finished Series (derived columns).
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from date_parsing import format_dates
+from raw_payload import RawPayloadPolicy, dumps
+
+TYPES = {"raw", "str", "int", "float", "date", "json"}
+
+
+def _present(values: pd.Series) -> pd.Series:
+    """True where a value counts for coalescing (not None / NaN / "")."""
+    return values.notna() & (values.astype(str) != "")
+
+
+def _truthy(values: pd.Series) -> pd.Series:
+    """Vectorized bool(value) for mapped columns (None, NaN, "" and 0 are falsy)."""
+    present = _present(values)
+    numeric = pd.to_numeric(values, errors="coerce")
+    return present & ~(numeric == 0)
+
+
+def _field(frame: pd.DataFrame, name: str) -> pd.Series:
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(None, index=frame.index, dtype=object)
+
+
+def _to_int(values: pd.Series, default: int = 0) -> pd.Series:
+    """int(float(value)) per value, with default for missing/unparseable."""
+    numeric = pd.to_numeric(values, errors="coerce")
+    return numeric.fillna(default).astype("int64")
+
+
+def _evaluate(frame: pd.DataFrame, records: list[dict] | pd.DataFrame, rule: dict, now: datetime,
+              payload: RawPayloadPolicy | None) -> pd.Series:
+    kind = rule.get("type", "int" if "sum" in rule else "raw")
+    if kind not in TYPES:
+        raise ValueError(f"Unknown column type: {kind}")
+    default = rule.get("default", 0 if kind == "int" else None)
+    
+    if "value" in rule:
+        value = rule["value"]
+        if isinstance(value, str):
+            value = value.format(now=now)
+        result = pd.Series([value] * len(frame), index=frame.index, dtype=object)
+    elif kind == "json":
+        if isinstance(records, pd.DataFrame):
+            encoded = payload.encode_frame(records) if payload else [dumps(r) for r in records.to_dict("records")]
+        else:
+            encoded = payload.encode(records) if payload else [dumps(r) for r in records]
+        result = pd.Series(encoded, index=frame.index, dtype=object)
+    elif "sum" in rule:
+        result = sum((_to_int(_field(frame, f)) for f in rule["sum"]),
+                     pd.Series(0, index=frame.index, dtype="int64"))
+    else:
+        sources = rule["source"]
+        if isinstance(sources, str):
+            sources = [sources]
+        
+        # `a or b or c`: walk right to left so the leftmost present value wins
+        result = _field(frame, sources[-1])
+        for name in reversed(sources[:-1]):
+            values = _field(frame, name)
+            result = values.where(_present(values), result)
+        
+        if kind == "str":
+            result = result.map(str, na_action="ignore").astype(object)
+            result = result.where(result.notna(), default)
+        elif kind == "int":
+            result = _to_int(result, default)
+        elif kind == "float":
+            result = pd.to_numeric(result, errors="coerce").astype(float)
+            if default is not None:
+                result = result.fillna(default)
+        elif kind == "date":
+            result = pd.Series(format_dates(result), index=frame.index, dtype=object)
+            result = result.where(result.notna(), default)
+        else:
+            result = result.astype(object).where(result.notna(), default)
+    
+    if "fallback" in rule:
+        fallback = _evaluate(frame, records, rule["fallback"], now, payload)
+        result = result.where(_truthy(result), fallback)
+    
+    if "apply" in rule:
+        result = rule["apply"](result)
+    
+    return result
+
+
+def mapped_fields(mapping: dict[str, dict] | None) -> set[str]:
+    """Source fields read by a mapping (already stored in typed columns)."""
+    fields = set()
+    for rule in (mapping or {}).values():
+        while rule:
+            sources = rule.get("source", [])
+            fields.update([sources] if isinstance(sources, str) else sources)
+            fields.update(rule.get("sum", []))
+            rule = rule.get("fallback")
+    return fields
+
+
+def apply_mapping(records: list[dict] | pd.DataFrame, mapping: dict[str, dict],
+                  now: datetime | None = None,
+                  payload: RawPayloadPolicy | None = None) -> pd.DataFrame:
+    """
+    Build a target DataFrame from raw records using a column mapping.
+    
+    Args:
+        records: Raw records (dicts; keys may differ between records), or a
+                 DataFrame of source rows (e.g. a parsed CSV chunk).
+        mapping: Ordered {target column: rule} (see module docstring).
+        now: Timestamp for "value" templates (default: datetime.now()).
+        payload: RAW_JSON policy for "json" columns (default: full records).
+    
+    Returns:
+        DataFrame with one row per record and the mapping's columns in order.
+    """
+    now = now or datetime.now()
+    if isinstance(records, pd.DataFrame):
+        records = records.reset_index(drop=True)
+        frame = records
+    else:
+        # object dtype keeps ints with gaps as ints and strings as they came
+        frame = pd.DataFrame(records, dtype=object) if records else pd.DataFrame()
+    
+    columns = {target: _evaluate(frame, records, rule, now, payload) for target, rule in mapping.items()}
+    return pd.DataFrame(columns, index=frame.index, columns=list(mapping))
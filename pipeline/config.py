@@ -4,7 +4,12 @@ Configuration for Ontario Health Data Pipeline.
 Snowflake connection uses PAT (Programmatic Access Token) authentication.
 Token should be stored in ~/.snowflake/ontario_health_token
 """
+import atexit
 import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
 # Snowflake Configuration (Service Account)
@@ -27,8 +32,9 @@ SCHEMA_MARTS_OPS = "MARTS_OPS"                    # Pipeline operations
 PRIVATE_KEY_FILE = Path.home() / ".snowflake" / "ontario_health_key.p8"
 
 
+@lru_cache(maxsize=1)
 def get_private_key_bytes() -> bytes:
-    """Read private key from file."""
+    """Read private key from file (decoded once per process)."""
     if not PRIVATE_KEY_FILE.exists():
         raise FileNotFoundError(
             f"Private key file not found at {PRIVATE_KEY_FILE}. "
@@ -53,7 +59,12 @@ def get_private_key_bytes() -> bytes:
 
 
 def get_snowflake_connection():
-    """Create Snowflake connection using key-pair authentication (service account)."""
+    """
+    Create a new Snowflake connection using key-pair authentication (service account).
+    
+    The caller owns the connection and must close it. Pipeline code should
+    prefer snowflake_connection(), which reuses pooled sessions.
+    """
     import snowflake.connector
     
     return snowflake.connector.connect(
@@ -66,27 +77,286 @@ def get_snowflake_connection():
     )
 
 
+# Snowflake session pool (shared by every module in the process)
+SNOWFLAKE_POOL_SIZE = int(os.environ.get("ONTARIO_HEALTH_SNOWFLAKE_POOL_SIZE", "4"))
+SNOWFLAKE_POOL_CHECK_AFTER_SECONDS = 300  # Ping sessions idle longer than this
+
+
+class SnowflakeConnectionPool:
+    """
+    Small thread-safe pool of Snowflake sessions.
+    
+    Opening a session costs TLS, key-pair auth and often a warehouse resume,
+    so sessions are checked back in and reused instead of closed. At most
+    max_size sessions are open at once; extra checkouts wait for a release.
+    Sessions that were closed, or idle long enough to have expired, are
+    health-checked before reuse and replaced if they fail.
+    """
+    
+    def __init__(self, max_size: int = SNOWFLAKE_POOL_SIZE, connect=get_snowflake_connection,
+                 check_after_seconds: float = SNOWFLAKE_POOL_CHECK_AFTER_SECONDS):
+        self.max_size = max_size
+        self._connect = connect
+        self.check_after_seconds = check_after_seconds
+        self._idle: list[tuple[object, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.opened = 0
+    
+    def _is_healthy(self, conn, idle_seconds: float) -> bool:
+        if conn.is_closed():
+            return False
+        if idle_seconds < self.check_after_seconds:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            return True
+        except Exception:
+            return False
+    
+    def acquire(self):
+        """Check out a healthy session, opening one if none are idle."""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, released_at = self._idle.pop()
+                if self._is_healthy(conn, time.monotonic() - released_at):
+                    return conn
+                self._close_quietly(conn)
+            
+            conn = self._connect()
+            with self._lock:
+                self.opened += 1
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def release(self, conn, discard: bool = False):
+        """Return a session to the pool (or close it if discard is set)."""
+        try:
+            if discard or conn.is_closed():
+                self._close_quietly(conn)
+            else:
+                with self._lock:
+                    self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+    
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close_quietly(conn)
+    
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+_pool: SnowflakeConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> SnowflakeConnectionPool:
+    """Process-wide Snowflake session pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SnowflakeConnectionPool()
+            atexit.register(_pool.close_all)
+        return _pool
+
+
+@contextmanager
+def snowflake_connection():
+    """
+    Check out a pooled Snowflake session for the duration of a with block.
+    
+    Sessions keep their USE DATABASE / USE SCHEMA state between checkouts,
+    so callers should set the schema they need. A session that raised a
+    connector error is discarded rather than handed to the next caller.
+    """
+    pool = get_connection_pool()
+    conn = pool.acquire()
+    discard = False
+    try:
+        yield conn
+    except Exception as e:
+        discard = type(e).__module__.startswith("snowflake")
+        raise
+    finally:
+        pool.release(conn, discard=discard)
+
+
+# Bulk loading (see loader.py): "copy" stages Parquet files and runs COPY INTO,
+# "write_pandas" uses the connector's write_pandas for every load.
+LOADER_MODE = os.environ.get("ONTARIO_HEALTH_LOADER", "copy")
+LOADER_FILE_ROWS = 250_000          # Rows per staged Parquet file
+LOADER_COMPRESSION = "snappy"       # Parquet codec: snappy, zstd, gzip or none
+LOADER_PUT_THREADS = 4              # Parallel uploads per PUT
+LOADER_STAGE = "ONTARIO_HEALTH_LOAD_STAGE"  # Session-scoped temporary stage
+
+# "merge" upserts tables listed in NATURAL_KEYS (re-runs don't duplicate rows);
+# "append" inserts every row as before.
+LOADER_WRITE_MODE = os.environ.get("ONTARIO_HEALTH_LOADER_WRITE_MODE", "merge")
+
+# Natural key of each RAW table, used by MERGE loads
+NATURAL_KEYS = {
+    "WASTEWATER_SURVEILLANCE": ["EPI_YEAR", "EPI_WEEK", "VIRUS_CODE", "LOCATION"],
+    "WASTEWATER_TRENDS": ["EPI_YEAR", "EPI_WEEK", "VIRUS_CODE", "LOCATION"],
+    "SCHOOL_CASES": ["SCHOOL_NAME", "REPORTED_DATE"],
+    "OUTBREAKS": ["OUTBREAK_ID"],
+    "ED_WAIT_TIMES": ["HOSPITAL_CODE", "SOURCE_UPDATED"]
+}
+
+# Key columns that may be empty, and the column keying the row instead. Most
+# hospital sites publish no "last updated" time, so each scrape of them is
+# its own reading, keyed by when it was taken.
+NATURAL_KEY_FALLBACKS = {
+    "ED_WAIT_TIMES": {"SOURCE_UPDATED": "SCRAPED_AT"}
+}
+
+# Low-cardinality columns stored as pandas categoricals (dictionary-encoded in
+# memory and in the staged Parquet files); see frame_dtypes.py
+CATEGORICAL_COLUMNS = {
+    "WASTEWATER_SURVEILLANCE": ["SOURCE_FILE", "LOCATION", "SITE", "CITY", "PROVINCE",
+                                "COUNTRY", "VIRUS_CODE", "VIRUS_NAME"],
+    "WASTEWATER_TRENDS": ["SOURCE_FILE", "LOCATION", "SITE", "CITY", "PROVINCE",
+                          "VIRUS_CODE", "VIRUS_NAME", "TREND"],
+    "SCHOOL_CASES": ["SOURCE_FILE", "SCHOOL_BOARD", "SCHOOL_NAME", "MUNICIPALITY", "SCHOOL_TYPE"],
+    "OUTBREAKS": ["SOURCE_FILE", "OUTBREAK_STATUS", "INSTITUTION_CITY", "INSTITUTION_TYPE",
+                  "OUTBREAK_TYPE", "PHU_ID", "PHU_NAME"],
+    "ED_WAIT_TIMES": ["SOURCE_FILE", "SCRAPED_AT", "HOSPITAL_CODE", "HOSPITAL_NAME",
+                      "NETWORK", "CITY", "REGION"]
+}
+
+# Columns that vary between loads of identical data (ignored when deciding
+# whether a matched row changed)
+MERGE_IGNORE_COLUMNS = ["SOURCE_FILE", "RAW_JSON", "SCRAPED_AT"]
+
+
+# Local cache directory for HTTP responses and pipeline state.
+# GitHub Actions restores this between runs (see weekly-ingest.yml).
+CACHE_DIR = Path(os.environ.get("ONTARIO_HEALTH_CACHE_DIR", Path.home() / ".cache" / "ontario_health"))
+
+# HTTP response cache (conditional GETs with ETag / Last-Modified)
+HTTP_CACHE_ENABLED = os.environ.get("ONTARIO_HEALTH_HTTP_CACHE", "1") != "0"
+HTTP_CACHE_DIR = CACHE_DIR / "http"
+HTTP_CACHE_MAX_BYTES = 500 * 1024 * 1024  # 500 MB
+HTTP_CACHE_MAX_AGE_DAYS = 30
+
+# Wastewater trend feed (ingest_wastewater_trends.py). Its column names haven't
+# been checked against the live file yet, so "all" and "wastewater" runs leave
+# it out unless ONTARIO_HEALTH_WASTEWATER_TRENDS=1; `run_ingestion.py
+# wastewater_trends` always runs it.
+WASTEWATER_TRENDS_ENABLED = os.environ.get("ONTARIO_HEALTH_WASTEWATER_TRENDS", "0") == "1"
+
+
+# Hospital ED scraping (see hospital_scrapers/engine.py): every network is
+# fetched at once; networks still running at the deadline are reported as
+# timed out and the run continues with what it has
+SCRAPE_DEADLINE_SECONDS = float(os.environ.get("ONTARIO_HEALTH_SCRAPE_DEADLINE", "45"))
+SCRAPE_PER_HOST_LIMIT = 2           # Concurrent requests to one host
+SCRAPE_FETCH_WORKERS = 16           # Threads fetching pages (I/O bound)
+SCRAPE_PARSE_WORKERS = 2            # Threads parsing fetched pages
+
+# Hospital scrapers run by ingest_all_ed_wait_times.py, keyed by module name
+# in hospital_scrapers/ (see hospital_scrapers/registry.py). Scrapers that
+# aren't listed are discovered but not run. ONTARIO_HEALTH_SCRAPERS
+# (comma-separated keys) replaces this selection for one run.
+SCRAPERS_ENABLED = {
+    "halton": True,
+    "niagara": True,
+    "uhn": True,
+    "london": True,
+    "hamilton": False,              # JSON API needs auth
+    "lakeridge": False,             # Wait times are JS-rendered
+    "lakeridge_selenium": False     # Needs Chrome (selenium extra)
+}
+SCRAPERS_OVERRIDE = os.environ.get("ONTARIO_HEALTH_SCRAPERS")
+
+# HTML parsing for scraped pages (html_parsing.py): "lxml" or "html.parser".
+# Default is lxml when it is installed, otherwise the stdlib parser.
+HTML_PARSER = os.environ.get("ONTARIO_HEALTH_HTML_PARSER")
+
+# Headless Chrome for JavaScript-rendered pages (hospital_scrapers/browser_pool.py)
+SELENIUM_POOL_SIZE = int(os.environ.get("ONTARIO_HEALTH_BROWSERS", "2"))  # Warm browsers
+SELENIUM_MAX_PAGES = 50             # Pages per browser before it is restarted
+SELENIUM_READY_TIMEOUT = 15         # Seconds to wait for a scraper's ready condition
+SELENIUM_DRIVER_PATH = os.environ.get("ONTARIO_HEALTH_CHROMEDRIVER")  # Skips webdriver_manager
+
+
+# RAW_JSON payload policy per dataset (see raw_payload.py):
+#   "full"     - the whole source record
+#   "compact"  - the record without nulls or fields already in typed columns
+#   "sampled"  - the whole record for 1 in RAW_PAYLOAD_SAMPLE_EVERY rows, else NULL
+#   "off"      - NULL; records are archived to RAW_PAYLOAD_ARCHIVE_DIR instead (in
+#                the cache directory: evictable, so the raw records can be lost)
+# ONTARIO_HEALTH_RAW_PAYLOAD overrides the policy for every dataset.
+RAW_PAYLOAD_DEFAULT = "full"
+RAW_PAYLOAD_OVERRIDE = os.environ.get("ONTARIO_HEALTH_RAW_PAYLOAD")
+RAW_PAYLOAD_POLICIES = {
+    "wastewater_surveillance": "compact",
+    "wastewater_trends": "full",
+    "school_cases": "full",
+    "outbreaks": "full",
+    "ed_wait_times": "full"
+}
+RAW_PAYLOAD_SAMPLE_EVERY = 100
+RAW_PAYLOAD_ARCHIVE_DIR = CACHE_DIR / "raw_payloads"
+
+
+# Local ingestion state (watermarks and source content hashes) so unchanged
+# or already-loaded sources can be skipped without querying Snowflake; it is
+# reconciled against Snowflake after LOCAL_STATE_RECONCILE_DAYS
+LOCAL_STATE_FILE = CACHE_DIR / "ingestion_state.json"
+LOCAL_STATE_RECONCILE_DAYS = 7
+
+# Per-partition checkpoints for backfill_wastewater.py
+BACKFILL_STATE_FILE = CACHE_DIR / "wastewater_backfill.json"
+
+
 # Ontario Data Catalogue (CKAN) Configuration
 CKAN_BASE_URL = "https://data.ontario.ca/api/3/action"
 
+# Full-resource CSV export for datastore resources (streamed for large pulls)
+CKAN_DUMP_URL = "https://data.ontario.ca/datastore/dump"
+
+# Local catalog of dataset slug -> resource ID / format / last_modified / fields
+CKAN_CATALOG_FILE = CACHE_DIR / "ckan_catalog.json"
+CKAN_CATALOG_TTL_HOURS = 24
+
 # Dataset Resource IDs - these are the actual data files within datasets
 # Note: Resource IDs may change; verify at data.ontario.ca if ingestion fails
+# A non-None resource_id pins the resource and bypasses the catalog lookup.
 DATASETS = {
     "school_cases": {
         "name": "Summary of Cases in Schools",
         "dataset_url": "https://data.ontario.ca/dataset/summary-of-cases-in-schools",
+        "slug": "summary-of-cases-in-schools",
         "resource_id": None,  # Will be discovered via API
         "refresh": "daily"
     },
     "outbreaks": {
         "name": "Ongoing Outbreaks",
         "dataset_url": "https://data.ontario.ca/dataset/ontario-covid-19-outbreaks-data", 
+        "slug": "ontario-covid-19-outbreaks-data",
         "resource_id": None,  # Will be discovered via API
         "refresh": "daily"
     },
     "confirmed_positive_cases": {
         "name": "Confirmed Positive Cases of COVID-19 in Ontario",
         "dataset_url": "https://data.ontario.ca/dataset/confirmed-positive-cases-of-covid-19-in-ontario",
+        "slug": "confirmed-positive-cases-of-covid-19-in-ontario",
         "resource_id": None,  # Will be discovered via API
         "refresh": "daily"
     }
@@ -0,0 +1,131 @@
+"""
+Column-wise date parsing for CKAN records.
+
+CKAN resources report dates either as Unix epochs (seconds, milliseconds,
+microseconds or nanoseconds) or as strings in one of a few formats. Rather
+than trying every representation for every value, each column is factorized
+so repeated raw values are parsed once, the string format is detected once
+per column, and epochs and strings are each converted with vectorized calls
+(the epoch unit follows from each value's magnitude).
+
+Epochs are interpreted as UTC.
+"""
+import numpy as np
+import pandas as pd
+
+# Candidate string formats, in order of preference for ambiguous columns
+# (only the first 10 characters are considered, so timestamps parse as dates)
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%m/%d/%Y"
+]
+
+# Epoch units by magnitude (current dates: ~1.7e9 s, ~1.7e12 ms, ~1.7e18 ns)
+EPOCH_DIVISORS = [
+    (1e17, 1e9),   # nanoseconds
+    (1e14, 1e6),   # microseconds
+    (1e11, 1e3),   # milliseconds
+]
+
+# Unique values used to pick a column's string format
+FORMAT_SAMPLE_SIZE = 200
+
+# Largest |seconds| representable as datetime64[ns]
+_MAX_EPOCH_SECONDS = 9.2e9
+
+
+def _empty(n: int) -> np.ndarray:
+    return np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+
+
+def _parse_epochs(numeric: np.ndarray) -> np.ndarray:
+    """Epoch numbers in any unit -> datetime64[ns] (UTC, naive)."""
+    magnitude = np.abs(numeric)
+    divisor = np.select([magnitude > t for t, _ in EPOCH_DIVISORS],
+                        [d for _, d in EPOCH_DIVISORS], default=1.0)
+    seconds = numeric / divisor
+    
+    parsed = _empty(len(numeric))
+    in_range = np.abs(seconds) < _MAX_EPOCH_SECONDS
+    parsed[in_range] = np.round(seconds[in_range] * 1e9).astype("int64").view("datetime64[ns]")
+    return parsed
+
+
+def _detect_format(values: pd.Series) -> str | None:
+    """Format that parses the most sampled values (ties go to DATE_FORMATS order)."""
+    sample = values.iloc[:FORMAT_SAMPLE_SIZE]
+    best, best_count = None, 0
+    for fmt in DATE_FORMATS:
+        count = pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum()
+        if count > best_count:
+            best, best_count = fmt, count
+    return best
+
+
+def _parse_strings(values: pd.Series) -> np.ndarray:
+    values = values.str.slice(0, 10)
+    parsed = _empty(len(values))
+    
+    detected = _detect_format(values)
+    if detected is None:
+        return parsed
+    
+    # Detected format first, then the others for any stragglers
+    for fmt in [detected] + [f for f in DATE_FORMATS if f != detected]:
+        missing = np.isnat(parsed)
+        if not missing.any():
+            break
+        converted = pd.to_datetime(values[missing], format=fmt, errors="coerce")
+        parsed[missing] = converted.to_numpy(dtype="datetime64[ns]")
+    return parsed
+
+
+def _parse_unique(values: pd.Series) -> np.ndarray:
+    """Parse distinct raw values (already free of None / empty strings)."""
+    parsed = _empty(len(values))
+    
+    numeric = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    is_epoch = np.isfinite(numeric)
+    if is_epoch.any():
+        parsed[is_epoch] = _parse_epochs(numeric[is_epoch])
+    
+    if not is_epoch.all():
+        parsed[~is_epoch] = _parse_strings(values[~is_epoch].astype(str))
+    
+    return parsed
+
+
+def parse_dates(values) -> pd.Series:
+    """
+    Parse a column of raw CKAN date values.
+    
+    Args:
+        values: Sequence or Series of epochs, date strings, None or "".
+    
+    Returns:
+        datetime64 Series (NaT where a value is missing or unparseable),
+        aligned with values.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    if series.empty:
+        return pd.Series([], index=series.index, dtype="datetime64[ns]")
+    
+    series = series.astype(object).where(series.notna() & (series.astype(str) != ""), None)
+    
+    # Factorize so each distinct raw value is parsed once
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if len(uniques) == 0:
+        return pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    
+    parsed_uniques = _parse_unique(pd.Series(uniques, dtype=object))
+    result = parsed_uniques[np.maximum(codes, 0)]
+    result[codes < 0] = np.datetime64("NaT")
+    return pd.Series(result, index=series.index, dtype="datetime64[ns]")
+
+
+def format_dates(values, fmt: str = "%Y-%m-%d") -> list[str | None]:
+    """Parse a column and format it for Snowflake DATE columns (None if missing)."""
+    parsed = parse_dates(values)
+    formatted = parsed.dt.strftime(fmt)
+    return [None if pd.isna(v) else v for v in formatted]
@@ -0,0 +1,85 @@
+"""
+Typed, compact DataFrames for the load path.
+
+Transforms produce object-dtype columns (one Python object per cell).
+optimize_dtypes() converts a transformed frame once, before it is buffered
+or handed to the loader:
+
+    - columns in CATEGORICAL_COLUMNS[table] become categoricals, so repeated
+      strings (LOCATION, HOSPITAL_NAME, ...) are stored once per batch and
+      written to Parquet as dictionary-encoded columns
+    - other all-string columns become the pandas string dtype (Arrow-backed
+      when pyarrow is installed)
+    - numeric columns keep their numpy / nullable integer dtypes
+
+concat_frames() concatenates typed chunks without falling back to object
+dtype when their categories differ.
+"""
+import pandas as pd
+from pandas.api.types import infer_dtype, union_categoricals
+
+from config import CATEGORICAL_COLUMNS
+
+try:
+    import pyarrow  # noqa: F401 - backs the string dtype
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+STRING_DTYPE = pd.StringDtype("pyarrow" if HAS_PYARROW else "python")
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """Bytes held by df, including the Python objects in object columns."""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def optimize_dtypes(df: pd.DataFrame, table: str, stats: dict | None = None) -> pd.DataFrame:
+    """
+    Convert a transformed frame to compact dtypes for table.
+    
+    Args:
+        df: Transformed frame (typically object dtype).
+        table: RAW table name (key of CATEGORICAL_COLUMNS).
+        stats: Optional {"before": bytes, "after": bytes} accumulator for
+               memory reporting (see format_memory).
+    """
+    categorical = set(CATEGORICAL_COLUMNS.get(table, []))
+    before = frame_memory(df) if stats is not None else 0
+    
+    converted = {}
+    for name, column in df.items():
+        if name in categorical:
+            if not isinstance(column.dtype, pd.CategoricalDtype):
+                converted[name] = column.astype("category")
+        elif column.dtype == object and infer_dtype(column, skipna=True) in ("string", "empty"):
+            converted[name] = column.astype(STRING_DTYPE)
+    
+    if converted:
+        df = df.assign(**converted)
+    
+    if stats is not None:
+        stats["before"] = stats.get("before", 0) + before
+        stats["after"] = stats.get("after", 0) + frame_memory(df)
+    return df
+
+
+def concat_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """pd.concat that keeps categorical columns categorical."""
+    if len(frames) == 1:
+        return frames[0]
+    
+    df = pd.concat(frames, ignore_index=True)
+    for name, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and not isinstance(df[name].dtype, pd.CategoricalDtype):
+            parts = [f[name] for f in frames if isinstance(f[name].dtype, pd.CategoricalDtype)]
+            if len(parts) == len(frames):
+                df[name] = pd.Series(union_categoricals(parts), index=df.index)
+    return df
+
+
+def format_memory(dataset: str, stats: dict) -> str:
+    """One-line before/after memory report."""
+    before, after = stats.get("before", 0), stats.get("after", 0)
+    saved = f" ({before / after:.1f}x smaller)" if after else ""
+    return f"  {dataset} frame memory: {before / 1e6:.1f} MB object -> {after / 1e6:.1f} MB typed{saved}"
@@ -2,16 +2,32 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import List, Dict
+import re
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+from html_parsing import PARSER, make_soup
+from http_cache import CachedSession
 
 
 class BaseHospitalScraper(ABC):
     """Base scraper for hospital ED wait times."""
     
+    timeout = 30  # Seconds per request
+    consumer = "multi_network_ed"  # Ingestion the page cache's processed flag is kept for
+    container: SoupStrainer | None = None  # Element holding the wait times (None: whole page)
+    html_parser = PARSER
+    
+    # extract_time() patterns, tried in order: (pattern, groups it captures)
+    TIME_PATTERNS = [
+        (re.compile(r'(\d+)\s*(?:hour|hr|h)(?:s)?\s+(\d+)\s*(?:minute|min|m)', re.IGNORECASE), 'hm'),
+        (re.compile(r'(\d+)\s*(?:hour|hr|h)(?:s)?', re.IGNORECASE), 'h'),
+        (re.compile(r'(\d+)\s*(?:minute|min|m)(?:s)?', re.IGNORECASE), 'm')
+    ]
+    
     def __init__(self, network_name: str):
         self.network_name = network_name
-        self.session = requests.Session()
+        self.session = CachedSession(consumer=self.consumer)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) OntarioHealthPipeline/1.0'
         })
@@ -37,51 +53,66 @@ class BaseHospitalScraper(ABC):
         """
         pass
     
+    def fetch(self, timeout: float | None = None) -> requests.Response | None:
+        """GET the page (None if unchanged since the last processed scrape)."""
+        timeout = min(timeout, self.timeout) if timeout else self.timeout
+        response = self.session.get(self.url, timeout=timeout)
+        response.raise_for_status()
+        
+        if self.session.is_unchanged(response):
+            print(f"  {self.network_name}: page unchanged since last scrape (HTTP 304)")
+            return None
+        return response
+    
+    def parse_response(self, response: requests.Response) -> List[Dict]:
+        """
+        Parse a fetched page and add network metadata.
+        
+        The page is not marked processed here; call mark_processed() once
+        its records are loaded, or the next run would skip them on a 304.
+        """
+        hospitals = self.parse(response)
+        
+        # Add metadata
+        for h in hospitals:
+            h['network'] = self.network_name
+            h['scraped_at'] = datetime.now().isoformat()
+        
+        return hospitals
+    
+    def mark_processed(self):
+        """Record that the fetched page's records were loaded."""
+        self.session.mark_processed()
+    
     def fetch_and_parse(self) -> List[Dict]:
         """Fetch URL and parse data."""
         try:
-            response = self.session.get(self.url, timeout=30)
-            response.raise_for_status()
-            
-            hospitals = self.parse(response)
-            
-            # Add metadata
-            for h in hospitals:
-                h['network'] = self.network_name
-                h['scraped_at'] = datetime.now().isoformat()
-            
-            return hospitals
-            
+            response = self.fetch()
+            if response is None:
+                return []
+            return self.parse_response(response)
+        
         except Exception as e:
             print(f"  Error scraping {self.network_name}: {e}")
             return []
     
+    def soup(self, markup: str) -> BeautifulSoup:
+        """Parse a page, building only the declared container's subtree."""
+        return make_soup(markup, self.container, self.html_parser)
+    
     def extract_time(self, text: str) -> tuple[int, int]:
         """
         Extract hours and minutes from text like '2 hours 30 minutes' or '2h 30m'.
         Returns: (hours, minutes)
         """
-        import re
-        
-        # Try various patterns
-        patterns = [
-            r'(\d+)\s*(?:hour|hr|h)(?:s)?\s+(\d+)\s*(?:minute|min|m)',
-            r'(\d+)\s*(?:hour|hr|h)(?:s)?',
-            r'(\d+)\s*(?:minute|min|m)(?:s)?'
-        ]
-        
-        text_lower = text.lower()
-        
-        for pattern in patterns:
-            match = re.search(pattern, text_lower)
+        for pattern, groups in self.TIME_PATTERNS:
+            match = pattern.search(text)
             if match:
-                groups = match.groups()
-                if len(groups) == 2:
-                    return int(groups[0]), int(groups[1])
-                elif 'hour' in pattern or 'hr' in pattern or pattern.endswith('h'):
-                    return int(groups[0]), 0
+                if groups == 'hm':
+                    return int(match.group(1)), int(match.group(2))
+                elif groups == 'h':
+                    return int(match.group(1)), 0
                 else:
-                    return 0, int(groups[0])
+                    return 0, int(match.group(1))
         
         return 0, 0
-
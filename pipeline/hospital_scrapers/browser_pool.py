@@ -0,0 +1,169 @@
+"""
+Warm headless Chrome instances shared by the Selenium scrapers.
+
+Launching Chrome (and resolving its chromedriver binary) costs seconds per
+page, so SeleniumHospitalScraper renders pages in a process-wide pool of
+browsers instead of starting one per fetch:
+
+    - chromedriver is resolved once per process (SELENIUM_DRIVER_PATH skips
+      webdriver_manager altogether)
+    - at most SELENIUM_POOL_SIZE browsers run at once; extra checkouts wait
+      for a release, so concurrent scrapes share warm instances
+    - a released browser is parked on about:blank with its cookies cleared,
+      so the last site's scripts stop using CPU and nothing leaks between
+      scrapers
+    - browsers are restarted after SELENIUM_MAX_PAGES pages, or when they
+      stop responding, to bound Chrome's memory growth
+
+selenium is only imported when a browser is launched, so the pool itself
+has no hard dependency on it.
+"""
+import atexit
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+from config import SELENIUM_DRIVER_PATH, SELENIUM_MAX_PAGES, SELENIUM_POOL_SIZE
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
+
+
+@lru_cache(maxsize=1)
+def chromedriver_path() -> str:
+    """Resolve the chromedriver binary (once per process)."""
+    if SELENIUM_DRIVER_PATH:
+        return SELENIUM_DRIVER_PATH
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
+def launch_chrome():
+    """Start a headless Chrome driver."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument(f'--user-agent={USER_AGENT}')
+    # Return after DOMContentLoaded; scrapers wait for their own ready condition
+    chrome_options.page_load_strategy = 'eager'
+    
+    service = Service(chromedriver_path())
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+
+class BrowserPool:
+    """
+    Small thread-safe pool of headless browsers.
+    
+    Mirrors SnowflakeConnectionPool: browsers are checked back in and reused
+    instead of quit, and a browser that fails its health check (or raised
+    while checked out) is replaced with a fresh one.
+    """
+    
+    def __init__(self, max_size: int = SELENIUM_POOL_SIZE, launch=launch_chrome,
+                 max_pages: int = SELENIUM_MAX_PAGES):
+        self.max_size = max_size
+        self._launch = launch
+        self.max_pages = max_pages
+        self._idle: list[tuple[object, int]] = []
+        self._pages: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.launched = 0
+    
+    @staticmethod
+    def _is_healthy(driver) -> bool:
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+    
+    def acquire(self):
+        """Check out a responsive browser, launching one if none are idle."""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    driver, pages = self._idle.pop()
+                if self._is_healthy(driver):
+                    with self._lock:
+                        self._pages[id(driver)] = pages
+                    return driver
+                self._quit_quietly(driver)
+            
+            driver = self._launch()
+            with self._lock:
+                self.launched += 1
+                self._pages[id(driver)] = 0
+            return driver
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def release(self, driver, discard: bool = False):
+        """Return a browser to the pool (or quit it if discard is set)."""
+        try:
+            with self._lock:
+                pages = self._pages.pop(id(driver), 0) + 1
+            if discard or pages >= self.max_pages:
+                self._quit_quietly(driver)
+                return
+            try:
+                driver.delete_all_cookies()
+                driver.get("about:blank")
+            except Exception:
+                self._quit_quietly(driver)
+                return
+            with self._lock:
+                self._idle.append((driver, pages))
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def browser(self):
+        """Check out a browser for the duration of a with block."""
+        driver = self.acquire()
+        discard = False
+        try:
+            yield driver
+        except Exception:
+            # A page that raised may have left the browser wedged
+            discard = True
+            raise
+        finally:
+            self.release(driver, discard=discard)
+    
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            self._quit_quietly(driver)
+    
+    @staticmethod
+    def _quit_quietly(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+_pool: BrowserPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Process-wide browser pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close_all)
+        return _pool
@@ -0,0 +1,116 @@
+"""
+Concurrent scraping of hospital networks.
+
+scrape_networks() fetches every network's page at once from an asyncio
+event loop:
+
+    - fetches run on a thread pool (requests + CachedSession, so ETag
+      revalidation still applies); at most per_host_limit requests hit
+      the same host at a time
+    - parsing runs on a separate, smaller thread pool, so BeautifulSoup
+      work never holds up the loop or the remaining fetches
+    - the whole scrape has one deadline; networks still fetching or
+      parsing when it passes are reported as timed out and the results
+      gathered so far are returned immediately
+
+A target is anything with network_name, url, fetch(timeout) and
+parse_response(response) (BaseHospitalScraper provides all four); fetch
+returns None when the page is unchanged since the last processed scrape.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List
+from urllib.parse import urlsplit
+
+from config import (
+    SCRAPE_DEADLINE_SECONDS,
+    SCRAPE_FETCH_WORKERS,
+    SCRAPE_PARSE_WORKERS,
+    SCRAPE_PER_HOST_LIMIT
+)
+
+
+class ScrapeTarget:
+    """Adapter for scrapers that don't subclass BaseHospitalScraper."""
+    
+    def __init__(self, network_name: str, url: str, fetch: Callable, parse: Callable):
+        self.network_name = network_name
+        self.url = url
+        self.fetch = fetch
+        self.parse_response = parse
+
+
+def _outcome(target, status: str, started: float, hospitals=None, error=None) -> Dict:
+    return {
+        "network": target.network_name,
+        "status": status,
+        "hospitals": hospitals or [],
+        "seconds": time.perf_counter() - started,
+        "error": error
+    }
+
+
+async def _scrape(targets: list, deadline: float, per_host_limit: int,
+                  fetch_pool: ThreadPoolExecutor, parse_pool: ThreadPoolExecutor) -> List[Dict]:
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    hosts: dict[str, asyncio.Semaphore] = {}
+    
+    async def scrape_one(target) -> Dict:
+        host = urlsplit(target.url).netloc
+        limit = hosts.setdefault(host, asyncio.Semaphore(per_host_limit))
+        try:
+            async with limit:
+                # Never wait on a socket past the overall deadline
+                remaining = max(deadline - (time.perf_counter() - started), 1.0)
+                response = await loop.run_in_executor(fetch_pool, target.fetch, remaining)
+            if response is None:
+                return _outcome(target, "unchanged", started)
+            
+            hospitals = await loop.run_in_executor(parse_pool, target.parse_response, response)
+        except Exception as e:
+            return _outcome(target, "error", started, error=str(e))
+        
+        scraped_at = datetime.now().isoformat()
+        for h in hospitals:
+            h.setdefault("network", target.network_name)
+            h.setdefault("scraped_at", scraped_at)
+        return _outcome(target, "ok" if hospitals else "empty", started, hospitals)
+    
+    tasks = [asyncio.create_task(scrape_one(t)) for t in targets]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    
+    return [
+        task.result() if task in done
+        else _outcome(target, "timeout", started, error=f"No result within {deadline:.0f}s")
+        for task, target in zip(tasks, targets)
+    ]
+
+
+def scrape_networks(targets: list, deadline: float = SCRAPE_DEADLINE_SECONDS,
+                    per_host_limit: int = SCRAPE_PER_HOST_LIMIT,
+                    fetch_workers: int = SCRAPE_FETCH_WORKERS,
+                    parse_workers: int = SCRAPE_PARSE_WORKERS) -> List[Dict]:
+    """
+    Scrape targets concurrently and return one outcome per target, in order.
+    
+    Each outcome is {"network", "status", "hospitals", "seconds", "error"}
+    with status "ok", "empty", "unchanged", "error" or "timeout".
+    """
+    if not targets:
+        return []
+    
+    # Fetches mostly wait on sockets, so the pool is sized for I/O, not cores
+    fetch_pool = ThreadPoolExecutor(max_workers=min(len(targets), fetch_workers),
+                                    thread_name_prefix="scrape-fetch")
+    parse_pool = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix="scrape-parse")
+    try:
+        return asyncio.run(_scrape(targets, deadline, per_host_limit, fetch_pool, parse_pool))
+    finally:
+        # Timed-out fetches finish (or hit their socket timeout) in the background
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        parse_pool.shutdown(wait=False, cancel_futures=True)
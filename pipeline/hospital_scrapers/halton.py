@@ -0,0 +1,31 @@
+"""Halton Healthcare scraper - 3 hospitals (adapter for ingest_ed_wait_times)."""
+from .base import BaseHospitalScraper
+
+from ingest_ed_wait_times import EDWaitTimesIngestor
+
+
+class HaltonHealthcareScraper(BaseHospitalScraper):
+    """Halton Healthcare, parsed by the production Halton ingestor."""
+    
+    CITIES = {
+        "georgetown": "Georgetown",
+        "milton": "Milton",
+        "oakville": "Oakville"
+    }
+    
+    def __init__(self):
+        super().__init__("Halton Healthcare")
+        self.ingestor = EDWaitTimesIngestor()
+    
+    @property
+    def url(self) -> str:
+        return EDWaitTimesIngestor.URL
+    
+    def parse(self, response):
+        results = self.ingestor.parse_page(response)
+        
+        for r in results:
+            r['city'] = self.CITIES.get(r['hospital_code'], '')
+            r['region'] = 'Halton'
+        
+        return results
@@ -1,11 +1,21 @@
 """Hamilton Health Hub scraper - JSON API."""
 from .base import BaseHospitalScraper
 import json
+import re
+
+# Flat JSON objects with a "hospital" key embedded in the page
+JSON_RECORD = re.compile(r'\{[^{}]*"hospital"[^{}]*\}')
+WAIT_TIME = re.compile(r'(\d+)\s*h.*?(\d+)\s*m')
 
 
 class HamiltonHealthScraper(BaseHospitalScraper):
     """Scraper for Hamilton Emergency Wait Times (JSON backend)."""
     
+    hospitals = [
+        (hospital, re.compile(hospital, re.I))
+        for hospital in ['Hamilton General', 'Juravinski', 'McMaster', "St. Joseph's"]
+    ]
+    
     def __init__(self):
         super().__init__("Hamilton Health Hub")
     
@@ -24,8 +34,7 @@ class HamiltonHealthScraper(BaseHospitalScraper):
         # Pattern 1: Embedded JSON
         if 'application/json' in text or '{' in text:
             # Try to extract JSON
-            import re
-            json_matches = re.findall(r'\{[^{}]*"hospital"[^{}]*\}', text)
+            json_matches = JSON_RECORD.findall(text)
             
             for match in json_matches:
                 try:
@@ -43,13 +52,11 @@ class HamiltonHealthScraper(BaseHospitalScraper):
                     continue
         
         # Pattern 2: HTML parsing
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(text, 'html.parser')
+        soup = self.soup(text)
         
-        hospitals = ['Hamilton General', 'Juravinski', 'McMaster', "St. Joseph's"]
-        for hospital in hospitals:
+        for hospital, name_pattern in self.hospitals:
             # Find hospital name in page
-            for elem in soup.find_all(text=re.compile(hospital, re.I)):
+            for elem in soup.find_all(string=name_pattern):
                 parent = elem.find_parent()
                 if parent:
                     parent_text = parent.get_text()
@@ -68,8 +75,7 @@ class HamiltonHealthScraper(BaseHospitalScraper):
     
     def _parse_wait_time(self, text: str) -> tuple[int, int]:
         """Parse wait time from text."""
-        import re
-        match = re.search(r'(\d+)\s*h.*?(\d+)\s*m', text.lower())
+        match = WAIT_TIME.search(text.lower())
         if match:
             return int(match.group(1)), int(match.group(2))
         return 0, 0
@@ -1,12 +1,23 @@
 """Lakeridge Health scraper - 4 hospitals."""
 from .base import BaseHospitalScraper
-from bs4 import BeautifulSoup
 import re
 
 
 class LakeridgeHealthScraper(BaseHospitalScraper):
     """Scraper for Lakeridge Health network."""
     
+    # (hospital, city, pattern for the name without "Hospital")
+    hospitals = [
+        (name, city, re.compile(name.replace(' Hospital', ''), re.I))
+        for name, city in [
+            ('Ajax Pickering Hospital', 'Ajax'),
+            ('Oshawa Hospital', 'Oshawa'),
+            ('Port Perry Hospital', 'Port Perry'),
+            ('Whitby Hospital', 'Whitby'),
+            ('Bowmanville Hospital', 'Bowmanville')
+        ]
+    ]
+    
     def __init__(self):
         super().__init__("Lakeridge Health")
     
@@ -15,21 +26,12 @@ class LakeridgeHealthScraper(BaseHospitalScraper):
         return "https://edwt.lh.ca/"
     
     def parse(self, response):
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = self.soup(response.text)
         results = []
         
-        hospitals = [
-            ('Ajax Pickering Hospital', 'Ajax'),
-            ('Oshawa Hospital', 'Oshawa'),
-            ('Port Perry Hospital', 'Port Perry'),
-            ('Whitby Hospital', 'Whitby'),
-            ('Bowmanville Hospital', 'Bowmanville')
-        ]
-        
-        for hospital_name, city in hospitals:
+        for hospital_name, city, search_name in self.hospitals:
             # Look for hospital name
-            search_name = hospital_name.replace(' Hospital', '')
-            elements = soup.find_all(text=re.compile(search_name, re.I))
+            elements = soup.find_all(string=search_name)
             
             if elements:
                 for elem in elements:
@@ -1,12 +1,28 @@
 """Lakeridge Health scraper using Selenium."""
 from .selenium_base import SeleniumHospitalScraper
-from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
 import re
 
+# A rendered wait time ("2 hours 15 min"); the page shell has none
+WAIT_TIME = re.compile(r'\d+\s*(hour|hr|min)', re.IGNORECASE)
+
 
 class LakeridgeSeleniumScraper(SeleniumHospitalScraper):
     """Scraper for Lakeridge Health using Selenium (JS-rendered)."""
     
+    # (hospital, city, name followed by "X hours Y minutes")
+    hospitals = [
+        (hospital_name, city,
+         re.compile(rf'({city}|{hospital_name}).*?(\d+)\s*(?:hour|hr)s?(?:\s*(\d+)\s*(?:minute|min))?',
+                    re.IGNORECASE | re.DOTALL))
+        for hospital_name, city in [
+            ('Ajax Pickering Hospital', 'Ajax'),
+            ('Oshawa Hospital', 'Oshawa'),
+            ('Port Perry Hospital', 'Port Perry'),
+            ('Whitby Hospital', 'Whitby')
+        ]
+    ]
+    
     def __init__(self):
         super().__init__("Lakeridge Health")
     
@@ -14,31 +30,25 @@ class LakeridgeSeleniumScraper(SeleniumHospitalScraper):
     def url(self) -> str:
         return "https://edwt.lh.ca/"
     
+    def page_ready(self, driver) -> bool:
+        """Wait times are injected by JavaScript; ready once one is on the page."""
+        return bool(WAIT_TIME.search(driver.find_element(By.TAG_NAME, 'body').text))
+    
     def parse(self, response):
-        soup = BeautifulSoup(response.text, 'html.parser')
+        text = self.soup(response.text).get_text()
+        text_lower = text.lower()
         results = []
         
-        hospitals = [
-            ('Ajax Pickering Hospital', 'Ajax'),
-            ('Oshawa Hospital', 'Oshawa'),
-            ('Port Perry Hospital', 'Port Perry'),
-            ('Whitby Hospital', 'Whitby')
-        ]
-        
         # After JavaScript loads, look for hospital names and wait times
-        for hospital_name, city in hospitals:
-            # Try to find hospital in text
-            text = soup.get_text()
-            
+        for hospital_name, city, pattern in self.hospitals:
             # Look for hospital name
-            if city.lower() in text.lower() or hospital_name.lower() in text.lower():
+            if city.lower() in text_lower or hospital_name.lower() in text_lower:
                 # Extract time near the hospital mention
-                pattern = rf'({city}|{hospital_name}).*?(\d+)\s*(hour|hr).*?(\d+)?\s*(minute|min)?'
-                match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+                match = pattern.search(text)
                 
                 if match:
                     hours = int(match.group(2))
-                    minutes = int(match.group(4)) if match.group(4) else 0
+                    minutes = int(match.group(3)) if match.group(3) else 0
                     
                     results.append({
                         'hospital_name': hospital_name,
@@ -1,12 +1,20 @@
 """London Health Sciences scraper - 2 EDs."""
 from .base import BaseHospitalScraper
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 import re
 
 
 class LondonHealthScraper(BaseHospitalScraper):
     """Scraper for London Health Sciences Centre."""
     
+    container = SoupStrainer('main')
+    
+    # (hospital, city, search patterns: full name first, then without "Hospital")
+    hospitals = [
+        (name, 'London', [re.compile(term, re.I) for term in (name, name.replace(' Hospital', ''))])
+        for name in ['Victoria Hospital', 'University Hospital']
+    ]
+    
     def __init__(self):
         super().__init__("London Health Sciences")
     
@@ -15,20 +23,13 @@ class LondonHealthScraper(BaseHospitalScraper):
         return "https://www.lhsc.on.ca/adult-ed/emergency-department-wait-times"
     
     def parse(self, response):
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = self.soup(response.text)
         results = []
         
-        hospitals = [
-            ('Victoria Hospital', 'London'),
-            ('University Hospital', 'London')
-        ]
-        
-        for hospital_name, city in hospitals:
+        for hospital_name, city, search_terms in self.hospitals:
             # Find hospital and extract wait time
-            search_terms = [hospital_name, hospital_name.replace(' Hospital', '')]
-            
             for term in search_terms:
-                elements = soup.find_all(text=re.compile(term, re.I))
+                elements = soup.find_all(string=term)
                 if elements:
                     for elem in elements:
                         context = elem.find_parent().get_text() if elem.find_parent() else ''
@@ -1,48 +1,59 @@
 """Niagara Health scraper - 4 hospitals."""
 from .base import BaseHospitalScraper
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 import re
 
 
 class NiagaraHealthScraper(BaseHospitalScraper):
     """Scraper for Niagara Health network."""
     
+    container = SoupStrainer('main')
+    
+    hospitals = [
+        "Greater Niagara General",
+        "St. Catharines Site",
+        "Welland Hospital",
+        "Fort Erie Site",
+        "Niagara Falls Site"
+    ]
+    
+    # Hospital name followed by "X hours Y minutes", or by minutes only
+    PATTERNS = [
+        (hospital,
+         re.compile(rf'{re.escape(hospital)}.*?(\d+)\s*(?:hour|hr).*?(\d+)\s*(?:minute|min)',
+                    re.IGNORECASE | re.DOTALL),
+         re.compile(rf'{re.escape(hospital)}.*?(\d+)\s*(?:minute|min)', re.IGNORECASE | re.DOTALL))
+        for hospital in hospitals
+    ]
+    
     def __init__(self):
         super().__init__("Niagara Health")
-        self.hospitals = [
-            "Greater Niagara General",
-            "St. Catharines Site", 
-            "Welland Hospital",
-            "Fort Erie Site",
-            "Niagara Falls Site"
-        ]
     
     @property
     def url(self) -> str:
         return "https://www.niagarahealth.on.ca/site/waiting-times"
     
     def parse(self, response):
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = self.soup(response.text)
         results = []
         
         # Find all sections with wait time data
         # Pattern: look for hospital names and nearby time elements
         text = soup.get_text()
+        text_lower = text.lower()
         
-        for hospital in self.hospitals:
+        for hospital, hours_minutes, minutes_only in self.PATTERNS:
             # Find hospital name in text
-            if hospital.lower() in text.lower():
+            if hospital.lower() in text_lower:
                 # Look for time pattern near the hospital name
                 # This is a simplified parser - may need adjustment based on actual HTML
-                pattern = rf'{re.escape(hospital)}.*?(\d+)\s*(?:hour|hr).*?(\d+)\s*(?:minute|min)'
-                match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+                match = hours_minutes.search(text)
                 
                 if match:
                     hours, minutes = int(match.group(1)), int(match.group(2))
                 else:
                     # Try just minutes
-                    pattern = rf'{re.escape(hospital)}.*?(\d+)\s*(?:minute|min)'
-                    match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+                    match = minutes_only.search(text)
                     if match:
                         hours, minutes = 0, int(match.group(1))
                     else:
@@ -0,0 +1,84 @@
+"""
+Registry of hospital network scrapers.
+
+Every module in this package is imported and each concrete
+BaseHospitalScraper subclass is registered under its module name
+(hospital_scrapers/niagara.py -> "niagara"). Adding a network is just
+adding a module; SCRAPERS_ENABLED in config.py decides which ones run.
+
+Modules whose optional dependencies are missing (e.g. selenium for the
+*_selenium scrapers) are reported as unavailable instead of failing the
+import of the whole package.
+"""
+import importlib
+import inspect
+import pkgutil
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from config import SCRAPERS_ENABLED, SCRAPERS_OVERRIDE
+from .base import BaseHospitalScraper
+
+# Shared infrastructure, not networks
+_INFRASTRUCTURE = {"base", "selenium_base", "browser_pool", "engine", "registry"}
+
+
+def _subclasses(cls) -> Iterator[type]:
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from _subclasses(sub)
+
+
+def discover() -> Tuple[Dict[str, type], Dict[str, str]]:
+    """
+    Import every scraper module.
+    
+    Returns:
+        ({key: scraper class}, {module: import error} for unavailable modules)
+    """
+    unavailable = {}
+    for module in pkgutil.iter_modules([str(Path(__file__).parent)]):
+        if module.name in _INFRASTRUCTURE:
+            continue
+        try:
+            importlib.import_module(f"{__package__}.{module.name}")
+        except ImportError as e:
+            unavailable[module.name] = str(e)
+    
+    scrapers = {}
+    for cls in _subclasses(BaseHospitalScraper):
+        if inspect.isabstract(cls) or not cls.__module__.startswith(f"{__package__}."):
+            continue
+        key = cls.__module__.rsplit(".", 1)[-1]
+        scrapers.setdefault(key, cls)
+    
+    return dict(sorted(scrapers.items())), unavailable
+
+
+def enabled_keys(flags: Dict[str, bool] | None = None, override: str | None = SCRAPERS_OVERRIDE) -> List[str]:
+    """Keys selected by ONTARIO_HEALTH_SCRAPERS, else by the enable flags."""
+    if override:
+        return [k.strip() for k in override.split(",") if k.strip()]
+    flags = SCRAPERS_ENABLED if flags is None else flags
+    return [key for key, enabled in flags.items() if enabled]
+
+
+def build_scrapers(flags: Dict[str, bool] | None = None,
+                   override: str | None = SCRAPERS_OVERRIDE) -> List[BaseHospitalScraper]:
+    """Instantiate the enabled scrapers (unknown or unavailable keys are reported and skipped)."""
+    scrapers, unavailable = discover()
+    
+    instances = []
+    for key in enabled_keys(flags, override):
+        if key in unavailable:
+            print(f"  ⚠️  Scraper {key} unavailable: {unavailable[key]}")
+            continue
+        if key not in scrapers:
+            print(f"  ⚠️  Unknown scraper: {key} (known: {', '.join(scrapers)})")
+            continue
+        try:
+            instances.append(scrapers[key]())
+        except Exception as e:
+            print(f"  ⚠️  Could not create scraper {key}: {e}")
+    
+    return instances
@@ -1,66 +1,53 @@
 """Base scraper using Selenium for JavaScript-rendered sites."""
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import time
-from typing import List, Dict
+
+from config import SELENIUM_READY_TIMEOUT
 from .base import BaseHospitalScraper
+from .browser_pool import get_browser_pool, launch_chrome
 
 
 class SeleniumHospitalScraper(BaseHospitalScraper):
-    """Base scraper for JavaScript-rendered sites."""
+    """
+    Base scraper for JavaScript-rendered sites.
+    
+    Pages are rendered in the shared pool of warm browsers (browser_pool.py).
+    Instead of sleeping a fixed time, fetch_with_selenium polls page_ready()
+    until the page has rendered what parse() needs; subclasses override
+    page_ready() with a condition for their site.
+    """
+    
+    ready_timeout = SELENIUM_READY_TIMEOUT
     
     def get_driver(self):
-        """Create headless Chrome driver."""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)')
-        
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(service=service, options=chrome_options)
+        """Create a headless Chrome driver outside the pool."""
+        return launch_chrome()
     
-    def fetch_with_selenium(self, wait_seconds: int = 3) -> str:
-        """Fetch page with Selenium, wait for JavaScript to load."""
-        driver = self.get_driver()
+    def page_ready(self, driver) -> bool:
+        """True once the page's data has rendered (default: document loaded)."""
+        return driver.execute_script("return document.readyState") == "complete"
+    
+    def fetch_with_selenium(self, timeout: float | None = None) -> str:
+        """Render the page in a pooled browser and return its HTML once ready."""
+        wait = min(timeout, self.ready_timeout) if timeout else self.ready_timeout
         
-        try:
+        with get_browser_pool().browser() as driver:
+            driver.set_page_load_timeout(max(wait, 1))
             driver.get(self.url)
-            time.sleep(wait_seconds)  # Wait for JS to execute
-            
-            html = driver.page_source
-            return html
+            try:
+                WebDriverWait(driver, wait, poll_frequency=0.2).until(self.page_ready)
+            except TimeoutException:
+                print(f"  {self.network_name}: not ready after {wait:.0f}s, parsing what rendered")
             
-        finally:
-            driver.quit()
+            return driver.page_source
     
-    def fetch_and_parse(self) -> List[Dict]:
-        """Override to use Selenium instead of requests."""
-        try:
-            html = self.fetch_with_selenium()
-            
-            # Create mock response object
-            class MockResponse:
-                def __init__(self, text):
-                    self.text = text
-            
-            hospitals = self.parse(MockResponse(html))
-            
-            # Add metadata
-            for h in hospitals:
-                h['network'] = self.network_name
-                from datetime import datetime
-                h['scraped_at'] = datetime.now().isoformat()
-            
-            return hospitals
-            
-        except Exception as e:
-            print(f"  Error with Selenium for {self.network_name}: {e}")
-            return []
+    def fetch(self, timeout: float | None = None) -> "RenderedPage":
+        """Render the page in Chrome (no conditional GET for rendered pages)."""
+        return RenderedPage(self.fetch_with_selenium(timeout))
+
 
+class RenderedPage:
+    """Response-like wrapper for HTML rendered by Selenium (parse() reads .text)."""
+    
+    def __init__(self, text: str):
+        self.text = text
@@ -1,12 +1,20 @@
 """UHN Toronto scraper - 2 hospitals."""
 from .base import BaseHospitalScraper
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 import re
 
 
 class UHNScraper(BaseHospitalScraper):
     """Scraper for University Health Network Toronto."""
     
+    # SharePoint's main content placeholder
+    container = SoupStrainer(id='DeltaPlaceHolderMain')
+    
+    hospitals = [
+        ('Toronto General Hospital', 'Toronto', re.compile('Toronto General Hospital', re.I)),
+        ('Toronto Western Hospital', 'Toronto', re.compile('Toronto Western Hospital', re.I))
+    ]
+    
     def __init__(self):
         super().__init__("UHN Toronto")
     
@@ -15,17 +23,12 @@ class UHNScraper(BaseHospitalScraper):
         return "https://www.uhn.ca/PatientsFamilies/Visit_UHN/Emergency/Pages/ED_wait_times.aspx"
     
     def parse(self, response):
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = self.soup(response.text)
         results = []
         
-        hospitals = [
-            ('Toronto General Hospital', 'Toronto'),
-            ('Toronto Western Hospital', 'Toronto')
-        ]
-        
-        for hospital_name, city in hospitals:
+        for hospital_name, city, name_pattern in self.hospitals:
             # Look for the hospital name and nearby wait time
-            for elem in soup.find_all(text=re.compile(hospital_name, re.I)):
+            for elem in soup.find_all(string=name_pattern):
                 # Get surrounding text
                 parent = elem.find_parent()
                 if parent:
@@ -0,0 +1,36 @@
+"""
+HTML parsing for scraped pages.
+
+make_soup() builds a BeautifulSoup tree with the fastest available backend:
+lxml when it is installed (several times faster than html.parser on large
+pages), otherwise the standard library parser. HTML_PARSER in config.py
+forces one or the other.
+
+Hospital pages are mostly navigation, scripts and footers around a small
+block of wait times, so scrapers can pass only= (a SoupStrainer for the
+element that holds the data) and only that subtree is built. If the
+strainer matches nothing - the site changed its layout - the whole page is
+parsed instead: a stale container costs a second parse, never data.
+"""
+from bs4 import BeautifulSoup, SoupStrainer
+
+from config import HTML_PARSER
+
+try:
+    import lxml  # noqa: F401 - BeautifulSoup's "lxml" tree builder
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+PARSER = HTML_PARSER or ("lxml" if HAS_LXML else "html.parser")
+
+
+def make_soup(markup: str, only: SoupStrainer | None = None,
+              parser: str | None = None) -> BeautifulSoup:
+    """Parse markup, building only the elements matched by only (if given)."""
+    parser = parser or PARSER
+    if only is not None:
+        soup = BeautifulSoup(markup, parser, parse_only=only)
+        if soup.contents:
+            return soup
+    return BeautifulSoup(markup, parser)
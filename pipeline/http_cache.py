@@ -0,0 +1,334 @@
+"""
+Persistent HTTP response cache with ETag / Last-Modified revalidation.
+
+Every source (Health Infobase CSVs, CKAN pages, hospital pages) is
+re-requested on each run. CachedSession stores responses that carry
+validators on disk and sends conditional requests next time; a 304 is
+served from disk and flagged with ``response.from_cache = True``.
+
+Ingestors call ``session.mark_processed()`` after a successful load, so a
+later 304 on the same URL means "nothing new since the last good run" and
+the whole fetch/transform/load can be skipped. A 304 for a response that
+was never fully processed (e.g. the load failed) is replayed normally.
+The processed flag is kept per consumer (each session names the ingestor
+it fetches for), so two ingestors reading the same URL into different
+loads never skip each other's data.
+
+Usage:
+    python http_cache.py            # Show per-source cache stats
+    python http_cache.py --prune    # Evict by age and size
+    python http_cache.py --clear    # Remove everything
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+
+from config import (
+    HTTP_CACHE_DIR,
+    HTTP_CACHE_ENABLED,
+    HTTP_CACHE_MAX_AGE_DAYS,
+    HTTP_CACHE_MAX_BYTES
+)
+
+
+class HTTPCache:
+    """On-disk store of response bodies plus their validators."""
+    
+    def __init__(self, cache_dir: Path | str = HTTP_CACHE_DIR,
+                 max_bytes: int = HTTP_CACHE_MAX_BYTES,
+                 max_age_days: float = HTTP_CACHE_MAX_AGE_DAYS):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, int]] = {}
+    
+    @staticmethod
+    def key_for(url: str) -> str:
+        """Cache key for a fully-qualified URL (including query string)."""
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+    
+    def _meta_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+    
+    def body_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.body"
+    
+    def lookup(self, key: str) -> dict | None:
+        """Return stored metadata for key, or None if not cached."""
+        meta_path = self._meta_path(key)
+        if not meta_path.exists() or not self.body_path(key).exists():
+            return None
+        try:
+            return json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+    
+    def _write_meta(self, key: str, meta: dict):
+        tmp = self._meta_path(key).with_suffix(f".json.{os.getpid()}.{threading.get_ident()}")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self._meta_path(key))
+    
+    def store(self, key: str, url: str, response: requests.Response, stream: bool = False):
+        """
+        Persist a 200 response body and its validators.
+        
+        For streamed responses the body is copied to disk chunk by chunk and
+        response.raw is swapped for the cached file, so the caller can still
+        stream it without the body ever being held in memory.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        body_path = self.body_path(key)
+        tmp = body_path.with_suffix(f".body.{os.getpid()}.{threading.get_ident()}")
+        
+        if stream:
+            with open(tmp, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+        else:
+            tmp.write_bytes(response.content)
+        os.replace(tmp, body_path)
+        
+        now = time.time()
+        self._write_meta(key, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "size": body_path.stat().st_size,
+            "stored_at": now,
+            "last_used": now,
+            "processed_by": []
+        })
+        
+        if stream:
+            self._attach_body(response, key)
+    
+    def _attach_body(self, response: requests.Response, key: str):
+        """
+        Point a streamed response at the cached body on disk.
+        
+        response.cache_path names the file, so callers that need a seekable
+        body can open it directly instead of copying the stream.
+        """
+        response.cache_path = self.body_path(key)
+        response.raw = open(response.cache_path, "rb")
+        response._content = False
+        response._content_consumed = False
+    
+    def replay(self, key: str, entry: dict, response: requests.Response, stream: bool = False):
+        """Turn a 304 response into a 200 served from the cached body."""
+        response.status_code = 200
+        response.from_cache = True
+        if entry.get("content_type"):
+            response.headers["Content-Type"] = entry["content_type"]
+        
+        if stream:
+            self._attach_body(response, key)
+        else:
+            response._content = self.body_path(key).read_bytes()
+        
+        entry["last_used"] = time.time()
+        self._write_meta(key, entry)
+    
+    def mark_processed(self, key: str, consumer: str = ""):
+        """Record that consumer fully ingested the cached body for key."""
+        with self._lock:
+            entry = self.lookup(key)
+            if entry and consumer not in entry.get("processed_by", []):
+                entry["processed_by"] = entry.get("processed_by", []) + [consumer]
+                self._write_meta(key, entry)
+    
+    def is_processed(self, key: str, consumer: str = "") -> bool:
+        entry = self.lookup(key)
+        return bool(entry and consumer in entry.get("processed_by", []))
+    
+    def record(self, url: str, hit: bool, nbytes: int = 0):
+        """Count a request against its source host."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            stats = self._stats.setdefault(host, {"requests": 0, "hits": 0, "bytes_saved": 0})
+            stats["requests"] += 1
+            if hit:
+                stats["hits"] += 1
+                stats["bytes_saved"] += nbytes
+    
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Per-source hit rate and bytes saved for this process."""
+        with self._lock:
+            return {
+                host: {**s, "hit_rate": s["hits"] / s["requests"] if s["requests"] else 0.0}
+                for host, s in self._stats.items()
+            }
+    
+    def print_stats(self):
+        stats = self.stats()
+        if not stats:
+            return
+        print("\nHTTP cache:")
+        for host, s in sorted(stats.items()):
+            print(f"  {host:40} {s['hits']}/{s['requests']} hits "
+                  f"({s['hit_rate']:.0%}), {s['bytes_saved'] / 1e6:.1f} MB saved")
+    
+    def entries(self) -> list[tuple[str, dict]]:
+        if not self.cache_dir.exists():
+            return []
+        result = []
+        for meta_path in self.cache_dir.glob("*.json"):
+            entry = self.lookup(meta_path.stem)
+            if entry:
+                result.append((meta_path.stem, entry))
+        return result
+    
+    def evict(self, key: str):
+        for path in (self._meta_path(key), self.body_path(key)):
+            path.unlink(missing_ok=True)
+    
+    def prune(self) -> int:
+        """Evict entries older than max age, then least recently used until under max size."""
+        now = time.time()
+        evicted = 0
+        live = []
+        
+        for key, entry in self.entries():
+            if now - entry.get("stored_at", 0) > self.max_age_seconds:
+                self.evict(key)
+                evicted += 1
+            else:
+                live.append((key, entry))
+        
+        total = sum(e.get("size", 0) for _, e in live)
+        for key, entry in sorted(live, key=lambda item: item[1].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            self.evict(key)
+            total -= entry.get("size", 0)
+            evicted += 1
+        
+        return evicted
+    
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+class CachedSession(requests.Session):
+    """requests.Session that revalidates GETs against an HTTPCache."""
+    
+    def __init__(self, cache: HTTPCache | None = None, consumer: str = ""):
+        """
+        Args:
+            cache: Response cache (default: the process-wide one).
+            consumer: Name of the ingestor this session fetches for; responses
+                      are marked processed (and skipped on 304) per consumer.
+        """
+        super().__init__()
+        self.cache = cache if cache is not None else get_default_cache()
+        self.consumer = consumer
+        self._fetched_keys: set[str] = set()
+        self._keys_lock = threading.Lock()
+    
+    def request(self, method, url, params=None, headers=None, stream=False, **kwargs):
+        if self.cache is None or method.upper() != "GET":
+            return super().request(method, url, params=params, headers=headers,
+                                   stream=stream, **kwargs)
+        
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        key = HTTPCache.key_for(full_url)
+        entry = self.cache.lookup(key)
+        
+        headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        
+        response = super().request(method, url, params=params, headers=headers,
+                                   stream=stream, **kwargs)
+        response.from_cache = False
+        response.cache_key = key
+        
+        if response.status_code == 304 and entry:
+            self.cache.replay(key, entry, response, stream=stream)
+            self.cache.record(full_url, hit=True, nbytes=entry.get("size", 0))
+        else:
+            if response.status_code == 200 and (
+                response.headers.get("ETag") or response.headers.get("Last-Modified")
+            ):
+                self.cache.store(key, full_url, response, stream=stream)
+            self.cache.record(full_url, hit=False)
+        
+        with self._keys_lock:
+            self._fetched_keys.add(key)
+        return response
+    
+    def is_unchanged(self, response: requests.Response) -> bool:
+        """True if response was a 304 for a body that was already ingested."""
+        if self.cache is None or getattr(response, "from_cache", False) is not True:
+            return False
+        return self.cache.is_processed(response.cache_key, self.consumer)
+    
+    def mark_processed(self):
+        """Mark every response fetched by this session as fully ingested by its consumer."""
+        if self.cache is None:
+            return
+        with self._keys_lock:
+            keys, self._fetched_keys = self._fetched_keys, set()
+        for key in keys:
+            self.cache.mark_processed(key, self.consumer)
+
+
+_default_cache: HTTPCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> HTTPCache | None:
+    """Process-wide cache shared by all sessions (None when disabled)."""
+    global _default_cache
+    if not HTTP_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HTTPCache()
+        return _default_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or prune the HTTP response cache")
+    parser.add_argument("--prune", action="store_true", help="Evict by age and size")
+    parser.add_argument("--clear", action="store_true", help="Remove all cached responses")
+    args = parser.parse_args()
+    
+    cache = HTTPCache()
+    
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {cache.cache_dir}")
+        return
+    
+    if args.prune:
+        print(f"Evicted {cache.prune()} entries")
+    
+    entries = cache.entries()
+    total = sum(e.get("size", 0) for _, e in entries)
+    print(f"{len(entries)} cached responses, {total / 1e6:.1f} MB in {cache.cache_dir}")
+    
+    by_host: dict[str, list[dict]] = {}
+    for _, entry in entries:
+        by_host.setdefault(urlsplit(entry["url"]).netloc, []).append(entry)
+    
+    for host, host_entries in sorted(by_host.items()):
+        size = sum(e.get("size", 0) for e in host_entries)
+        print(f"  {host:40} {len(host_entries):4} entries  {size / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
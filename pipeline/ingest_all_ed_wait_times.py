@@ -3,16 +3,22 @@ Multi-hospital ED wait times ingestor for Ontario.
 
 Attempts to scrape all verified hospital networks.
 Handles failures gracefully - partial data is better than no data.
+
+Networks are fetched concurrently under one deadline (see
+hospital_scrapers/engine.py), so a slow or dead site costs at most
+SCRAPE_DEADLINE_SECONDS instead of delaying every network after it.
 """
-import json
 from datetime import datetime
 from typing import List, Dict
 
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 
-from config import get_snowflake_connection, SNOWFLAKE_DATABASE, SCHEMA_RAW
+from config import SCRAPE_DEADLINE_SECONDS
+from frame_dtypes import optimize_dtypes
+from hospital_scrapers.engine import scrape_networks
+from hospital_scrapers.registry import build_scrapers
+from loader import load_dataframe
+from raw_payload import RawPayloadPolicy
 
 
 # Import existing Halton scraper pattern
@@ -23,6 +29,10 @@ class MultiNetworkEDScraper:
     """
     Scrape ED wait times from multiple Ontario hospital networks.
     
+    Networks come from the scraper registry (every BaseHospitalScraper in
+    hospital_scrapers/, filtered by SCRAPERS_ENABLED) and run concurrently;
+    their records are combined into one ED_WAIT_TIMES batch.
+    
     Current Support: 3 Halton Healthcare hospitals (Oakville, Milton, Georgetown)
     
     Future Expansion: Framework supports additional networks, but most Ontario hospitals
@@ -30,72 +40,70 @@ class MultiNetworkEDScraper:
     Requires Selenium/Playwright for full province coverage.
     """
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) OntarioHealthPipeline/2.0'
-        })
+    def __init__(self, deadline: float = SCRAPE_DEADLINE_SECONDS):
+        """
+        Args:
+            deadline: Seconds allowed for the whole scrape; networks that
+                      haven't finished by then are skipped for this run.
+        """
+        self.deadline = deadline
+        self.outcomes: List[Dict] = []
+        self.scraped: list = []
         self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.raw_payload = RawPayloadPolicy(
+            "ed_wait_times", typed_fields=EDWaitTimesIngestor.TYPED_FIELDS + [
+                "scraped_at", "network", "city", "region"
+            ], run_id=self.run_id
+        )
+    
+    def targets(self) -> list:
+        """Enabled network scrapers (see hospital_scrapers/registry.py)."""
+        return build_scrapers()
     
     def scrape_all(self) -> List[Dict]:
-        """Scrape all networks, return list of hospital records."""
-        all_hospitals = []
+        """Scrape all networks concurrently, return list of hospital records."""
+        targets = self.targets()
+        print(f"Scraping {len(targets)} networks (deadline {self.deadline:.0f}s)...")
+        self.outcomes = scrape_networks(targets, deadline=self.deadline)
+        self.scraped = [t for t, o in zip(targets, self.outcomes) if o["status"] == "ok"]
         
-        # 1. Halton (working scraper)
-        print("Scraping Halton Healthcare...")
-        halton = EDWaitTimesIngestor()
-        try:
-            halton_data = halton.fetch_and_parse()
-            all_hospitals.extend(halton_data)
-            print(f"  ✓ {len(halton_data)} hospitals")
-        except Exception as e:
-            print(f"  ✗ {e}")
-        
-        # 2-7. Other networks (best-effort)
-        networks = [
-            ("Niagara Health", "https://www.niagarahealth.on.ca/site/waiting-times", self.scrape_niagara),
-            ("UHN Toronto", "https://www.uhn.ca/PatientsFamilies/Visit_UHN/Emergency/Pages/ED_wait_times.aspx", self.scrape_uhn),
-            ("London Health", "https://www.lhsc.on.ca/adult-ed/emergency-department-wait-times", self.scrape_london),
-        ]
-        
-        for name, url, scraper_func in networks:
-            print(f"Scraping {name}...")
-            try:
-                hospitals = scraper_func(url)
-                if hospitals:
-                    all_hospitals.extend(hospitals)
-                    print(f"  ✓ {len(hospitals)} hospitals")
-                else:
-                    print(f"  ⚠️  No data (site may have changed)")
-            except Exception as e:
-                print(f"  ✗ {str(e)[:50]}")
+        all_hospitals = []
+        for outcome in self.outcomes:
+            name, hospitals = outcome["network"], outcome["hospitals"]
+            if outcome["status"] == "ok":
+                print(f"  ✓ {name}: {len(hospitals)} hospitals ({outcome['seconds']:.1f}s)")
+            elif outcome["status"] == "empty":
+                print(f"  ⚠️  {name}: No data (site may have changed)")
+            elif outcome["status"] == "unchanged":
+                print(f"  {name}: page unchanged since last scrape")
+            else:
+                print(f"  ✗ {name}: {str(outcome['error'])[:50]}")
+            all_hospitals.extend(hospitals)
         
         return all_hospitals
     
-    def scrape_niagara(self, url: str) -> List[Dict]:
-        """Scrape Niagara Health sites."""
-        response = self.session.get(url, timeout=15)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Niagara uses specific structure - need to find actual pattern
-        # For now, return empty and mark for future implementation
-        return []
-    
-    def scrape_uhn(self, url: str) -> List[Dict]:
-        """Scrape UHN Toronto sites."""
-        response = self.session.get(url, timeout=15)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # UHN structure TBD
-        return []
-    
-    def scrape_london(self, url: str) -> List[Dict]:
-        """Scrape London Health Sciences."""
-        response = self.session.get(url, timeout=15)
-        soup = BeautifulSoup(response.text, 'html.parser')
+    def normalize(self, hospitals: List[Dict]) -> pd.DataFrame:
+        """One ED_WAIT_TIMES batch from every network's records."""
+        df = pd.DataFrame({
+            'SOURCE_FILE': f"multi_network_ed_{self.run_id}",
+            'SCRAPED_AT': [h.get('scraped_at', datetime.now().isoformat()) for h in hospitals],
+            'SOURCE_UPDATED': [h.get('source_updated') or '' for h in hospitals],
+            'HOSPITAL_CODE': [h.get('hospital_code') or h['hospital_name'].lower().replace(' ', '_')
+                              for h in hospitals],
+            'HOSPITAL_NAME': [h['hospital_name'] for h in hospitals],
+            'NETWORK': [h.get('network', 'Unknown') for h in hospitals],
+            'CITY': [h.get('city', '') for h in hospitals],
+            'REGION': [h.get('region', '') for h in hospitals],
+            'WAIT_HOURS': [h['wait_hours'] for h in hospitals],
+            'WAIT_MINUTES': [h['wait_minutes'] for h in hospitals],
+            'WAIT_TOTAL_MINUTES': [h['wait_total_minutes'] for h in hospitals]
+        })
+        df['RAW_JSON'] = self.raw_payload.encode(hospitals)
         
-        # London structure TBD
-        return []
+        # Two scrapers for one network (e.g. requests and Selenium) can report
+        # the same hospital; keep the first reading
+        df = df.drop_duplicates(subset=['NETWORK', 'HOSPITAL_CODE'], ignore_index=True)
+        return optimize_dtypes(df, "ED_WAIT_TIMES")
     
     def load_to_snowflake(self, hospitals: List[Dict]) -> int:
         """Load all hospital data to Snowflake."""
@@ -103,52 +111,14 @@ class MultiNetworkEDScraper:
             print("No data to load")
             return 0
         
-        # Convert to DataFrame
-        df_data = []
-        for h in hospitals:
-            df_data.append({
-                'SOURCE_FILE': f"multi_network_ed_{self.run_id}",
-                'SCRAPED_AT': h.get('scraped_at', datetime.now().isoformat()),
-                'SOURCE_UPDATED': h.get('source_updated', ''),
-                'HOSPITAL_CODE': h.get('hospital_code', h['hospital_name'].lower().replace(' ', '_')),
-                'HOSPITAL_NAME': h['hospital_name'],
-                'NETWORK': h.get('network', 'Unknown'),
-                'CITY': h.get('city', ''),
-                'REGION': h.get('region', ''),
-                'WAIT_HOURS': h['wait_hours'],
-                'WAIT_MINUTES': h['wait_minutes'],
-                'WAIT_TOTAL_MINUTES': h['wait_total_minutes'],
-                'RAW_JSON': json.dumps(h, default=str)
-            })
-        
-        df = pd.DataFrame(df_data)
-        
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
-        try:
-            from snowflake.connector.pandas_tools import write_pandas
-            
-            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
-            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
-            
-            # Schema already exists from original ED scraper
-            success, nchunks, nrows, _ = write_pandas(
-                conn=conn,
-                df=df,
-                table_name="ED_WAIT_TIMES",
-                database=SNOWFLAKE_DATABASE,
-                schema=SCHEMA_RAW,
-                auto_create_table=False,
-                overwrite=False
-            )
-            
-            print(f"\nLoaded {nrows} hospitals to RAW.ED_WAIT_TIMES")
-            return nrows
-            
-        finally:
-            cursor.close()
-            conn.close()
+        # Schema already exists from original ED scraper
+        return load_dataframe(self.normalize(hospitals), "ED_WAIT_TIMES")
+    
+    def mark_processed(self):
+        """Mark the scraped pages processed, so unchanged pages are skipped next run."""
+        for target in self.scraped:
+            if hasattr(target, "mark_processed"):
+                target.mark_processed()
     
     def run(self) -> Dict:
         """Execute full scraping pipeline."""
@@ -163,11 +133,13 @@ class MultiNetworkEDScraper:
         try:
             hospitals = self.scrape_all()
             result["hospitals_scraped"] = len(hospitals)
+            result["networks_attempted"] = len(self.outcomes)
             
             if hospitals:
                 rows = self.load_to_snowflake(hospitals)
                 result["hospitals_inserted"] = rows
                 result["status"] = "SUCCESS"
+                self.mark_processed()
             else:
                 result["status"] = "SUCCESS"
                 result["error"] = "No hospitals scraped"
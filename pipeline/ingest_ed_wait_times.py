@@ -9,19 +9,21 @@ Updated approximately every 30 minutes on the source website.
 
 NOTE: This is web scraping - may break if website structure changes.
 """
-import json
 import re
 from datetime import datetime
 
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 
 from config import (
-    get_snowflake_connection,
+    snowflake_connection,
     SNOWFLAKE_DATABASE,
     SCHEMA_RAW
 )
+from frame_dtypes import optimize_dtypes
+from html_parsing import make_soup
+from http_cache import CachedSession
+from loader import load_dataframe
+from raw_payload import RawPayloadPolicy
 
 
 class EDWaitTimesIngestor:
@@ -36,9 +38,26 @@ class EDWaitTimesIngestor:
         "oakville": "Oakville Trafalgar Memorial Hospital"
     }
     
+    # The format is: "georgetown01 Hour(s) and 48 Minute(s)"
+    WAIT_PATTERNS = {
+        key: re.compile(rf'{key}(\d+)\s*Hour\(s\)\s*and\s*(\d+)\s*Minute\(s\)', re.IGNORECASE)
+        for key in HOSPITALS
+    }
+    LAST_UPDATED = re.compile(r'Last Updated:\s*([^<]+)')
+    
+    # Record fields loaded into typed columns (left out of compact RAW_JSON)
+    TYPED_FIELDS = [
+        "source_updated", "hospital_code", "hospital_name",
+        "wait_hours", "wait_minutes", "wait_total_minutes"
+    ]
+    
     def __init__(self):
         self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.session = requests.Session()
+        self.raw_payload = RawPayloadPolicy(
+            "ed_wait_times", typed_fields=self.TYPED_FIELDS, run_id=self.run_id
+        )
+        self.source_unchanged = False
+        self.session = CachedSession(consumer="ed_wait_times")
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) OntarioHealthPipeline/1.0"
         })
@@ -47,20 +66,34 @@ class EDWaitTimesIngestor:
         """Fetch page and parse ED wait times."""
         print(f"Fetching ED wait times from Halton Healthcare...")
         
-        response = self.session.get(self.URL, timeout=30)
+        response = self.fetch_page()
+        if response is None:
+            return []
+        return self.parse_page(response)
+    
+    def fetch_page(self, timeout: float = 30):
+        """GET the page (None if unchanged since the last processed scrape)."""
+        response = self.session.get(self.URL, timeout=timeout)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        if self.session.is_unchanged(response):
+            print("  Page unchanged since last scrape (HTTP 304)")
+            self.source_unchanged = True
+            return None
+        return response
+    
+    def parse_page(self, response) -> list[dict]:
+        """Parse ED wait times from a fetched page."""
+        soup = make_soup(response.text)
         
         # Find the last updated timestamp
         last_updated = None
-        update_match = re.search(r'Last Updated:\s*([^<]+)', response.text)
+        update_match = self.LAST_UPDATED.search(response.text)
         if update_match:
             last_updated = update_match.group(1).strip()
             print(f"  Source last updated: {last_updated}")
         
         # Parse wait times from the page
-        # The format is: "georgetown01 Hour(s) and 48 Minute(s)"
         records = []
         
         # Find all text that contains wait times
@@ -68,8 +101,7 @@ class EDWaitTimesIngestor:
         
         for hospital_key, hospital_name in self.HOSPITALS.items():
             # Pattern: hospitalname + hours + minutes
-            pattern = rf'{hospital_key}(\d+)\s*Hour\(s\)\s*and\s*(\d+)\s*Minute\(s\)'
-            match = re.search(pattern, text, re.IGNORECASE)
+            match = self.WAIT_PATTERNS[hospital_key].search(text)
             
             if match:
                 hours = int(match.group(1))
@@ -107,11 +139,12 @@ class EDWaitTimesIngestor:
                 "REGION": "Halton",
                 "WAIT_HOURS": rec["wait_hours"],
                 "WAIT_MINUTES": rec["wait_minutes"],
-                "WAIT_TOTAL_MINUTES": rec["wait_total_minutes"],
-                "RAW_JSON": json.dumps(rec, default=str)
+                "WAIT_TOTAL_MINUTES": rec["wait_total_minutes"]
             })
         
-        return pd.DataFrame(transformed)
+        df = pd.DataFrame(transformed)
+        df["RAW_JSON"] = self.raw_payload.encode(records)
+        return optimize_dtypes(df, "ED_WAIT_TIMES")
     
     def load_to_snowflake(self, df: pd.DataFrame) -> int:
         """Load DataFrame to Snowflake."""
@@ -119,49 +152,36 @@ class EDWaitTimesIngestor:
             print("No data to load")
             return 0
         
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
-        try:
-            from snowflake.connector.pandas_tools import write_pandas
-            
-            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
-            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
             
-            # Create table if not exists
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS RAW.ED_WAIT_TIMES (
-                    id NUMBER AUTOINCREMENT PRIMARY KEY,
-                    ingested_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
-                    source_file VARCHAR(500),
-                    scraped_at TIMESTAMP_NTZ,
-                    source_updated VARCHAR(100),
-                    hospital_code VARCHAR(50),
-                    hospital_name VARCHAR(200),
-                    region VARCHAR(100),
-                    wait_hours NUMBER,
-                    wait_minutes NUMBER,
-                    wait_total_minutes NUMBER,
-                    raw_json VARIANT
-                )
-            """)
-            
-            success, nchunks, nrows, _ = write_pandas(
-                conn=conn,
-                df=df,
-                table_name="ED_WAIT_TIMES",
-                database=SNOWFLAKE_DATABASE,
-                schema=SCHEMA_RAW,
-                auto_create_table=False,
-                overwrite=False
-            )
-            
-            print(f"Loaded {nrows} rows to RAW.ED_WAIT_TIMES")
-            return nrows
+            try:
+                cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
+                cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+                
+                # Create table if not exists
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS RAW.ED_WAIT_TIMES (
+                        id NUMBER AUTOINCREMENT PRIMARY KEY,
+                        ingested_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+                        source_file VARCHAR(500),
+                        scraped_at TIMESTAMP_NTZ,
+                        source_updated VARCHAR(100),
+                        hospital_code VARCHAR(50),
+                        hospital_name VARCHAR(200),
+                        region VARCHAR(100),
+                        wait_hours NUMBER,
+                        wait_minutes NUMBER,
+                        wait_total_minutes NUMBER,
+                        raw_json VARIANT
+                    )
+                """)
+                
+                nrows = load_dataframe(df, "ED_WAIT_TIMES", conn=conn)
+                return nrows
             
-        finally:
-            cursor.close()
-            conn.close()
+            finally:
+                cursor.close()
     
     def run(self) -> dict:
         """Execute full ingestion pipeline."""
@@ -179,6 +199,11 @@ class EDWaitTimesIngestor:
             records = self.fetch_and_parse()
             result["records_fetched"] = len(records)
             
+            if self.source_unchanged:
+                result["status"] = "SKIPPED"
+                result["error"] = "Page unchanged since last scrape"
+                return result
+            
             if not records:
                 result["status"] = "SUCCESS"
                 result["error"] = "No records found - check page structure"
@@ -191,7 +216,8 @@ class EDWaitTimesIngestor:
             rows_inserted = self.load_to_snowflake(df)
             result["records_inserted"] = rows_inserted
             result["status"] = "SUCCESS"
-            
+            self.session.mark_processed()
+        
         except Exception as e:
             result["error"] = str(e)
             raise
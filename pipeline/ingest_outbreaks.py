@@ -5,14 +5,16 @@ Data source: Ontario Data Catalogue
 Dataset: Ontario COVID-19 outbreaks data (includes all institution types)
 URL: https://data.ontario.ca/dataset/ontario-covid-19-outbreaks-data
 
-This ingestor fetches all outbreaks and filters to school/daycare during transform.
+This ingestor filters to school/daycare outbreaks server-side (CKAN
+datastore_search_sql) when possible, and always re-applies the same filter
+during transform so the plain datastore_search fallback gives identical rows.
 """
-import json
-from datetime import datetime, date
+import re
 
 import pandas as pd
 
 from base_ingestor import BaseIngestor
+from column_mapping import apply_mapping
 from config import HALTON_PHU_CODES, HALTON_PHU_NAMES
 
 
@@ -33,176 +35,142 @@ class OutbreaksIngestor(BaseIngestor):
         "3 education"
     ]
     
-    def __init__(self, filter_to_schools: bool = True):
-        super().__init__("outbreaks")
-        self._resource_id = None
-        self.filter_to_schools = filter_to_schools
+    dataset_slug = "ontario-covid-19-outbreaks-data"
+    
+    fetch_concurrency = 4
+    stream_pages = True
+    # No watermark: outbreaks are corrected in place (e.g. declared over), so
+    # every new resource version is reloaded in full and MERGEd on OUTBREAK_ID
+    watermark_column = None
+    
+    # Candidate source columns for each filter (the resource schema has changed over time)
+    INSTITUTION_TYPE_FIELDS = ["outbreak_group", "institution_type"]
+    PHU_ID_FIELDS = ["phu_num", "phu_id"]
+    PHU_NAME_FIELDS = ["phu_name", "reporting_phu"]
     
-    def check_already_loaded(self) -> bool:
-        """Check if outbreak data already exists in Snowflake."""
-        try:
-            from config import get_snowflake_connection, SNOWFLAKE_DATABASE, SCHEMA_RAW
-            conn = get_snowflake_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
-            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
-            cursor.execute("SELECT COUNT(*) FROM OUTBREAKS")
-            
-            count = cursor.fetchone()[0]
-            cursor.close()
-            conn.close()
-            
-            return count > 0
-            
-        except Exception:
-            return False
+    # Target column -> rule (see column_mapping)
+    column_mapping = {
+        "SOURCE_FILE": {"value": "ckan_outbreaks_{now:%Y%m%d}"},
+        "OUTBREAK_ID": {"source": ["outbreak_id", "_id"], "type": "str", "default": ""},
+        "DATE_OUTBREAK_BEGAN": {"source": "date_outbreak_began", "type": "date"},
+        "DATE_OUTBREAK_DECLARED_OVER": {"source": "date_outbreak_declared_over", "type": "date"},
+        "OUTBREAK_STATUS": {
+            "source": "date_outbreak_declared_over", "type": "date",
+            "apply": lambda over: over.notna().map({True: "Resolved", False: "Active"})
+        },
+        "INSTITUTION_NAME": {"source": ["outbreak_setting", "institution_name"]},
+        "INSTITUTION_ADDRESS": {"source": "institution_address"},
+        "INSTITUTION_CITY": {"source": "institution_city"},
+        "INSTITUTION_TYPE": {"source": INSTITUTION_TYPE_FIELDS},
+        "OUTBREAK_TYPE": {"source": ["outbreak_type", "causative_agent"]},
+        "RESIDENT_CASES": {"source": "resident_cases", "type": "int"},
+        "STAFF_CASES": {"source": "staff_cases", "type": "int"},
+        "TOTAL_CASES": {
+            "source": "cases_total", "type": "int",
+            "fallback": {"sum": ["resident_cases", "staff_cases"]}
+        },
+        "PHU_ID": {"source": PHU_ID_FIELDS, "type": "str"},
+        "PHU_NAME": {"source": PHU_NAME_FIELDS},
+        "RAW_JSON": {"type": "json"}
+    }
+    
+    def __init__(self, filter_to_schools: bool = True, halton_only: bool = False,
+                 pushdown: bool = True, fetch_concurrency: int | None = None):
+        """
+        Initialize ingestor.
+        
+        Args:
+            filter_to_schools: Keep only school/daycare outbreaks.
+            halton_only: Keep only outbreaks in the Halton PHU.
+            pushdown: Evaluate the filters in CKAN (datastore_search_sql)
+                      instead of downloading every outbreak in the province.
+        """
+        super().__init__("outbreaks", fetch_concurrency=fetch_concurrency)
+        self.filter_to_schools = filter_to_schools
+        self.halton_only = halton_only
+        self.pushdown = pushdown
     
     @property
     def target_table(self) -> str:
         return "OUTBREAKS"
     
-    @property
-    def resource_id(self) -> str | None:
-        if self._resource_id is None:
-            # Try known resource ID first, then discover
-            # This is the "ongoing outbreaks" resource
-            self._resource_id = self.discover_resource_id("ontario-covid-19-outbreaks-data")
-        return self._resource_id
+    def _school_or_daycare_mask(self, institution_types: pd.Series) -> pd.Series:
+        """Which institution types are school/daycare related."""
+        return _contains_any(institution_types, self.SCHOOL_DAYCARE_TYPES)
     
-    def _is_school_or_daycare(self, institution_type: str | None) -> bool:
-        """Check if institution type is school/daycare related."""
-        if not institution_type:
-            return False
-        
-        inst_lower = institution_type.lower()
-        return any(t in inst_lower for t in self.SCHOOL_DAYCARE_TYPES)
+    def _halton_mask(self, phu_ids: pd.Series, phu_names: pd.Series) -> pd.Series:
+        """Which outbreaks are in Halton region."""
+        return phu_ids.isin(HALTON_PHU_CODES) | _contains_any(phu_names, HALTON_PHU_NAMES)
     
-    def _is_halton(self, phu_id: str | None, phu_name: str | None) -> bool:
-        """Check if this outbreak is in Halton region."""
-        if phu_id and phu_id in HALTON_PHU_CODES:
-            return True
-        if phu_name:
-            return any(h.lower() in phu_name.lower() for h in HALTON_PHU_NAMES)
-        return False
+    def pushdown_conditions(self) -> list[str]:
+        """Express the school/daycare and Halton filters as datastore SQL."""
+        if not self.pushdown:
+            return []
+        
+        fields = {f["id"] for f in self.catalog.fields(self.dataset_slug)}
+        conditions = []
+        
+        if self.filter_to_schools:
+            type_fields = [f for f in self.INSTITUTION_TYPE_FIELDS if f in fields]
+            if not type_fields:
+                return []
+            conditions.append(" OR ".join(
+                f"LOWER(\"{field}\") LIKE '%{_sql_escape(t)}%'"
+                for field in type_fields
+                for t in self.SCHOOL_DAYCARE_TYPES
+            ))
+        
+        if self.halton_only:
+            codes = ", ".join(f"'{_sql_escape(code)}'" for code in HALTON_PHU_CODES)
+            halton = [
+                f"CAST(\"{field}\" AS TEXT) IN ({codes})"
+                for field in self.PHU_ID_FIELDS if field in fields
+            ] + [
+                f"LOWER(\"{field}\") LIKE '%{_sql_escape(name.lower())}%'"
+                for field in self.PHU_NAME_FIELDS if field in fields
+                for name in HALTON_PHU_NAMES
+            ]
+            if halton:
+                conditions.append(" OR ".join(halton))
+        
+        return conditions
     
     def transform_records(self, records: list[dict]) -> pd.DataFrame:
         """Transform outbreak records to DataFrame."""
-        transformed = []
+        df = apply_mapping(records, self.column_mapping, payload=self.raw_payload)
         
-        for record in records:
-            institution_type = record.get("outbreak_group") or record.get("institution_type")
-            
-            # Filter to schools/daycares if enabled
-            if self.filter_to_schools and not self._is_school_or_daycare(institution_type):
-                continue
-            
-            date_began = self._parse_date(record.get("date_outbreak_began"))
-            date_over = self._parse_date(record.get("date_outbreak_declared_over"))
-            
-            # Convert to date strings for Snowflake DATE columns
-            date_began_str = date_began.strftime("%Y-%m-%d") if date_began else None
-            date_over_str = date_over.strftime("%Y-%m-%d") if date_over else None
-            
-            phu_id = str(record.get("phu_num", "")) or record.get("phu_id")
-            phu_name = record.get("phu_name") or record.get("reporting_phu")
-            
-            # Sanitize record for JSON
-            sanitized_record = {}
-            for k, v in record.items():
-                if isinstance(v, (datetime,)):
-                    sanitized_record[k] = v.isoformat()
-                else:
-                    sanitized_record[k] = v
-            
-            transformed.append({
-                "SOURCE_FILE": f"ckan_outbreaks_{datetime.now().strftime('%Y%m%d')}",
-                "OUTBREAK_ID": str(record.get("outbreak_id") or record.get("_id", "")),
-                "DATE_OUTBREAK_BEGAN": date_began_str,
-                "DATE_OUTBREAK_DECLARED_OVER": date_over_str,
-                "OUTBREAK_STATUS": "Resolved" if date_over else "Active",
-                "INSTITUTION_NAME": record.get("outbreak_setting") or record.get("institution_name"),
-                "INSTITUTION_ADDRESS": record.get("institution_address"),
-                "INSTITUTION_CITY": record.get("institution_city"),
-                "INSTITUTION_TYPE": institution_type,
-                "OUTBREAK_TYPE": record.get("outbreak_type") or record.get("causative_agent"),
-                "RESIDENT_CASES": self._safe_int(record.get("resident_cases")),
-                "STAFF_CASES": self._safe_int(record.get("staff_cases")),
-                "TOTAL_CASES": self._safe_int(record.get("cases_total")) or 
-                              (self._safe_int(record.get("resident_cases")) + 
-                               self._safe_int(record.get("staff_cases"))),
-                "PHU_ID": phu_id,
-                "PHU_NAME": phu_name,
-                "RAW_JSON": json.dumps(sanitized_record, default=str)
-            })
+        # Filter to schools/daycares and/or Halton if enabled
+        keep = pd.Series(True, index=df.index)
+        if self.filter_to_schools:
+            keep &= self._school_or_daycare_mask(df["INSTITUTION_TYPE"])
+        if self.halton_only:
+            keep &= self._halton_mask(df["PHU_ID"], df["PHU_NAME"])
+        df = df[keep].reset_index(drop=True)
         
-        df = pd.DataFrame(transformed)
         print(f"Filtered to {len(df)} school/daycare outbreaks")
         return df
-    
-    def _parse_date(self, date_val) -> datetime | None:
-        """Parse various date formats from the API, including Unix timestamps."""
-        if date_val is None or date_val == "":
-            return None
-        
-        # Handle Unix timestamp in nanoseconds (common in CKAN)
-        if isinstance(date_val, (int, float)):
-            try:
-                if date_val > 1e15:
-                    date_val = date_val / 1e9
-                elif date_val > 1e12:
-                    date_val = date_val / 1e3
-                return datetime.fromtimestamp(date_val)
-            except (ValueError, OSError):
-                return None
-        
-        date_str = str(date_val)
-        
-        # Try parsing as Unix timestamp string
-        try:
-            ts = float(date_str)
-            if ts > 1e15:
-                ts = ts / 1e9
-            elif ts > 1e12:
-                ts = ts / 1e3
-            return datetime.fromtimestamp(ts)
-        except (ValueError, TypeError):
-            pass
-        
-        # Try various date string formats
-        formats = [
-            "%Y-%m-%d",
-            "%Y-%m-%dT%H:%M:%S",
-            "%d/%m/%Y",
-            "%m/%d/%Y"
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str[:10], fmt[:len(date_str[:10])])
-            except (ValueError, TypeError):
-                continue
-        
-        return None
-    
-    def _safe_int(self, value) -> int:
-        """Safely convert value to int."""
-        if value is None or value == "":
-            return 0
-        try:
-            return int(float(value))
-        except (ValueError, TypeError):
-            return 0
+
+
+def _contains_any(values: pd.Series, needles: list[str]) -> pd.Series:
+    """Case-insensitive substring match of any needle (False for missing values)."""
+    pattern = "|".join(re.escape(n.lower()) for n in needles)
+    text = values.where(values.notna(), "").astype(str).str.lower()
+    return text.str.contains(pattern, regex=True).astype(bool)
+
+
+def _sql_escape(value: str) -> str:
+    """Escape a literal for a single-quoted SQL string."""
+    return value.replace("'", "''")
 
 
 def main():
     """Run outbreaks ingestion."""
     ingestor = OutbreaksIngestor(filter_to_schools=True)
     
-    # Skip if already loaded (static historical data)
+    # Skip if the current resource version is already loaded
     if ingestor.check_already_loaded():
         print(f"\n✓ Outbreaks already loaded - skipping")
-        print(f"  (This is historical 2021 data, no updates expected)")
+        print(f"  (Resource unchanged since last successful load)")
         return
     
     try:
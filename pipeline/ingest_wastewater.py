@@ -8,17 +8,25 @@ Data: https://health-infobase.canada.ca/src/data/wastewater/wastewater_aggregate
 Tracks respiratory virus levels (COVID-19, Influenza A/B, RSV) in wastewater.
 Updated weekly with current 2025 data.
 """
-import json
+import hashlib
+import tempfile
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
 import pandas as pd
-import requests
 
 from config import (
-    get_snowflake_connection,
+    snowflake_connection,
+    LOCAL_STATE_RECONCILE_DAYS,
     SNOWFLAKE_DATABASE,
     SCHEMA_RAW
 )
+from frame_dtypes import format_memory, optimize_dtypes
+from http_cache import CachedSession
+from loader import load_dataframe
+from raw_payload import RawPayloadPolicy
+from watermarks import get_local_state
 
 
 class WastewaterIngestor:
@@ -27,6 +35,32 @@ class WastewaterIngestor:
     DATA_URL = "https://health-infobase.canada.ca/src/data/wastewater/wastewater_aggregate.csv"
     TREND_URL = "https://health-infobase.canada.ca/src/data/wastewater/wastewater_trend.csv"
     
+    # Dataset name (results, RAW_JSON policy, local state) and RAW table
+    DATASET = "wastewater_surveillance"
+    TABLE = "WASTEWATER_SURVEILLANCE"
+    TABLE_DDL = """
+        CREATE TABLE IF NOT EXISTS RAW.WASTEWATER_SURVEILLANCE (
+            id NUMBER AUTOINCREMENT PRIMARY KEY,
+            ingested_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+            source_file VARCHAR(500),
+            location VARCHAR(200),
+            site VARCHAR(200),
+            city VARCHAR(200),
+            province VARCHAR(100),
+            country VARCHAR(100),
+            epi_year NUMBER,
+            epi_week NUMBER,
+            week_start DATE,
+            virus_code VARCHAR(50),
+            virus_name VARCHAR(100),
+            viral_load_avg FLOAT,
+            viral_load_min FLOAT,
+            viral_load_max FLOAT,
+            population_coverage FLOAT,
+            raw_json VARIANT
+        )
+    """
+    
     # Virus code mapping
     VIRUS_NAMES = {
         "covN2": "COVID-19",
@@ -35,116 +69,282 @@ class WastewaterIngestor:
         "rsv": "RSV"
     }
     
-    def __init__(self, province_filter: str | None = "Ontario"):
+    # Source columns loaded into typed columns (left out of compact RAW_JSON)
+    TYPED_FIELDS = [
+        "Location", "site", "city", "province", "country", "EpiYear", "EpiWeek",
+        "weekstart", "measureid", "w_avg", "min", "max", "populationcoverage"
+    ]
+    
+    # Columns read from the CSV (typed columns plus fields kept in RAW_JSON);
+    # other columns are skipped while parsing. Numeric columns are parsed as
+    # float64 (nullable Int64 parsing is ~2x slower; transform casts them).
+    CSV_COLUMNS = TYPED_FIELDS + ["pruid"]
+    CSV_DTYPES = {
+        "EpiYear": "float64", "EpiWeek": "float64",
+        "w_avg": "float64", "min": "float64", "max": "float64",
+        "populationcoverage": "float64"
+    }
+    
+    # Columns the province filter, watermark and natural key depend on; a
+    # file without them fails instead of loading unfiltered rows
+    REQUIRED_COLUMNS = ["province", "EpiYear", "EpiWeek", "measureid"]
+    
+    # Alternative source names renamed to the ones used here (None: as published)
+    COLUMN_ALIASES: dict[str, str] | None = None
+    
+    # Rows parsed per chunk of the streamed CSV
+    csv_chunk_rows = 50_000
+    
+    def __init__(self, province_filter: str | None = "Ontario", raw_payload: str | None = None):
         """
         Initialize ingestor.
         
         Args:
             province_filter: Filter to specific province (default: Ontario).
                             Set to None to ingest all provinces.
+            raw_payload: RAW_JSON policy override (see raw_payload.py).
         """
         self.province_filter = province_filter
         self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.raw_payload = RawPayloadPolicy(
+            self.DATASET, mode=raw_payload,
+            typed_fields=self.TYPED_FIELDS, run_id=self.run_id
+        )
+        self.source_unchanged = False
+        self.memory_stats: dict[str, int] = {}
+        self.rows_read = 0
+        self.rows_in_province = 0
+        self.content_hash = None
+        self.state = get_local_state()
+        self.session = CachedSession(consumer=self.state_key)
     
-    def get_max_week_in_snowflake(self) -> tuple[int, int] | None:
-        """Get the latest (epi_year, epi_week) already in Snowflake."""
-        try:
-            conn = get_snowflake_connection()
+    @property
+    def state_key(self) -> str:
+        """Local state entry (watermarks differ per province filter)."""
+        return f"{self.DATASET}:{self.province_filter or 'all'}"
+    
+    def _query_max_week(self) -> tuple[int, int] | None:
+        """Latest (epi_year, epi_week) in Snowflake for this province filter (errors propagate)."""
+        # The national backfill loads every province into the same table
+        province = "province = %s AND " if self.province_filter else ""
+        params = (self.province_filter,) * 2 if self.province_filter else ()
+        
+        with snowflake_connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
             cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
             
             # Check if table exists and has data
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT MAX(epi_year), MAX(epi_week)
-                FROM WASTEWATER_SURVEILLANCE
-                WHERE epi_year = (SELECT MAX(epi_year) FROM WASTEWATER_SURVEILLANCE)
-            """)
+                FROM {self.TABLE}
+                WHERE {province}epi_year = (
+                    SELECT MAX(epi_year) FROM {self.TABLE}
+                    {"WHERE province = %s" if self.province_filter else ""}
+                )
+            """, params)
             
             result = cursor.fetchone()
             cursor.close()
-            conn.close()
             
             if result and result[0] is not None:
-                return (result[0], result[1])
+                return (int(result[0]), int(result[1]))
             return None
-            
+    
+    def get_max_week_in_snowflake(self) -> tuple[int, int] | None:
+        """Get the latest (epi_year, epi_week) already in Snowflake."""
+        try:
+            return self._query_max_week()
         except Exception as e:
             print(f"  Note: Could not check existing data: {e}")
             return None
     
+    def get_max_week(self) -> tuple[int, int] | None:
+        """
+        Latest loaded (epi_year, epi_week).
+        
+        Served from the local state store; Snowflake is only queried when
+        there is no local watermark or it is due for reconciliation, and
+        Snowflake wins if the two disagree.
+        """
+        local = self.state.get(self.state_key).get("watermark")
+        local = tuple(local) if local else None
+        if not self.state.needs_reconcile(self.state_key):
+            print(f"  Using local watermark (reconciled within {LOCAL_STATE_RECONCILE_DAYS} days)")
+            return local
+        
+        try:
+            max_week = self._query_max_week()
+        except Exception as e:
+            print(f"  Note: Could not check existing data: {e}")
+            return local
+        
+        if local and max_week != local:
+            print(f"  Local watermark {local} differs from Snowflake {max_week} - using Snowflake")
+        self.state.update(self.state_key, watermark=list(max_week) if max_week else None,
+                          reconciled_at=time.time())
+        return max_week
+    
     def fetch_data(self) -> pd.DataFrame:
         """Fetch wastewater data from Health Canada (incremental)."""
         print(f"Fetching wastewater data from Health Canada...")
         
-        # Check what we already have
-        max_week = self.get_max_week_in_snowflake()
-        if max_week:
-            print(f"  Latest data in Snowflake: Year {max_week[0]}, Week {max_week[1]}")
-        
-        response = requests.get(self.DATA_URL, timeout=120)
+        # Conditional GET first: an unchanged file needs no Snowflake query
+        response = self.session.get(self.DATA_URL, stream=True, timeout=120)
         response.raise_for_status()
         
-        df = pd.read_csv(pd.io.common.StringIO(response.text))
-        print(f"  Total records from source: {len(df):,}")
+        if self.session.is_unchanged(response):
+            print("  Source unchanged since last load (HTTP 304)")
+            response.close()
+            self.source_unchanged = True
+            return pd.DataFrame()
         
-        # Filter by province if specified
-        if self.province_filter:
-            df = df[df["province"] == self.province_filter]
-            print(f"  Filtered to {self.province_filter}: {len(df):,} records")
+        with self.open_body(response) as body:
+            # Same bytes as the last successful load (e.g. re-published with a new ETag)
+            if self.content_hash == self.state.get(self.state_key).get("content_hash"):
+                print("  Source content unchanged since last load (same SHA-256)")
+                self.source_unchanged = True
+                # Already loaded: let the next 304 skip the download too
+                self.session.mark_processed()
+                return pd.DataFrame()
+            
+            # Check what we already have
+            max_week = self.get_max_week()
+            if max_week:
+                print(f"  Latest data loaded: Year {max_week[0]}, Week {max_week[1]}")
+            
+            body.seek(0)
+            chunks = list(self.iter_chunks(body, max_week))
         
-        # Incremental: only fetch weeks newer than what we have
+        print(f"  Total records from source: {self.rows_read:,}")
+        if self.province_filter:
+            print(f"  Filtered to {self.province_filter}: {self.rows_in_province:,} records")
         if max_week:
             year, week = max_week
-            df = df[
-                (df["EpiYear"] > year) | 
-                ((df["EpiYear"] == year) & (df["EpiWeek"] > week))
-            ]
-            print(f"  Incremental filter (after Year {year} Week {week}): {len(df):,} new records")
+            print(f"  Incremental filter (after Year {year} Week {week}): "
+                  f"{sum(len(c) for c in chunks):,} new records")
         
-        return df
+        if not chunks:
+            return pd.DataFrame(columns=self.CSV_COLUMNS or [])
+        return pd.concat(chunks, ignore_index=True)
     
-    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Transform data for Snowflake loading."""
-        transformed = []
+    @contextmanager
+    def open_body(self, response):
+        """
+        Seekable file holding a streamed response's body; sets content_hash.
         
-        for _, row in df.iterrows():
-            # Calculate week end date from EpiYear and EpiWeek
-            try:
-                # EpiWeek starts on Sunday, ends on Saturday
-                year = int(row["EpiYear"])
-                week = int(row["EpiWeek"])
-                # Use weekstart if available, otherwise calculate
-                week_start = row.get("weekstart")
-                if pd.isna(week_start):
-                    week_start = None
-            except (ValueError, TypeError):
-                week_start = None
+        The HTTP cache has already written the body to disk (or is replaying
+        it), so that file is read in place. Only uncached responses are
+        spooled to a temporary file.
+        """
+        cache_path = getattr(response, "cache_path", None)
+        try:
+            if cache_path:
+                body = open(cache_path, "rb")
+                self.content_hash = _file_hash(body)
+            else:
+                body = tempfile.TemporaryFile()
+                try:
+                    self.content_hash = _spool(response, body)
+                except BaseException:
+                    body.close()
+                    raise
+        finally:
+            response.close()
+        
+        with body:
+            body.seek(0)
+            yield body
+    
+    def iter_chunks(self, source, max_week: tuple[int, int] | None = None):
+        """
+        Parse a CSV file object in chunks, keeping only wanted rows.
+        
+        The province and (year, week) watermark filters run on each chunk,
+        so only matching rows outlive their chunk and peak memory follows
+        csv_chunk_rows rather than the size of the national file.
+        """
+        self.rows_read = 0
+        self.rows_in_province = 0
+        
+        usecols = None
+        if self.CSV_COLUMNS:
+            wanted = set(self.CSV_COLUMNS)
+            usecols = lambda c: c in wanted
+        
+        for chunk in pd.read_csv(source, chunksize=self.csv_chunk_rows,
+                                 usecols=usecols, dtype=self.CSV_DTYPES):
+            if self.COLUMN_ALIASES:
+                chunk = chunk.rename(columns=self.COLUMN_ALIASES)
+            if self.rows_read == 0:
+                self.check_columns(chunk.columns)
+            self.rows_read += len(chunk)
+            
+            if self.province_filter:
+                chunk = chunk[chunk["province"] == self.province_filter]
+            self.rows_in_province += len(chunk)
             
-            virus_code = row.get("measureid", "")
-            virus_name = self.VIRUS_NAMES.get(virus_code, virus_code)
+            # Incremental: only weeks newer than what we have
+            if max_week:
+                year, week = max_week
+                newer = (chunk["EpiYear"] > year) | ((chunk["EpiYear"] == year) & (chunk["EpiWeek"] > week))
+                chunk = chunk[newer.fillna(False).astype(bool)]
             
-            transformed.append({
-                "SOURCE_FILE": f"wastewater_{self.run_id}",
-                "LOCATION": row.get("Location"),
-                "SITE": row.get("site"),
-                "CITY": row.get("city"),
-                "PROVINCE": row.get("province"),
-                "COUNTRY": row.get("country", "Canada"),
-                "EPI_YEAR": int(row["EpiYear"]) if pd.notna(row.get("EpiYear")) else None,
-                "EPI_WEEK": int(row["EpiWeek"]) if pd.notna(row.get("EpiWeek")) else None,
-                "WEEK_START": week_start,
-                "VIRUS_CODE": virus_code,
-                "VIRUS_NAME": virus_name,
-                "VIRAL_LOAD_AVG": float(row["w_avg"]) if pd.notna(row.get("w_avg")) else None,
-                "VIRAL_LOAD_MIN": float(row["min"]) if pd.notna(row.get("min")) else None,
-                "VIRAL_LOAD_MAX": float(row["max"]) if pd.notna(row.get("max")) else None,
-                "POPULATION_COVERAGE": float(row["populationcoverage"]) if pd.notna(row.get("populationcoverage")) else None,
-                "RAW_JSON": json.dumps(row.to_dict(), default=str)
-            })
+            if not chunk.empty:
+                yield chunk
+    
+    def check_columns(self, columns):
+        """Raise if the file lacks a required column (e.g. the feed renamed one)."""
+        missing = [c for c in self.REQUIRED_COLUMNS if c not in columns]
+        if missing:
+            raise ValueError(f"{self.DATA_URL} is missing required columns {missing}; "
+                             f"found {list(columns)}")
+    
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Transform data for Snowflake loading (column-wise, no per-row Python)."""
+        def column(name: str, default=None) -> pd.Series:
+            if name in df.columns:
+                return df[name]
+            return pd.Series(default, index=df.index, dtype=object)
         
-        return pd.DataFrame(transformed)
+        def numeric(name: str) -> pd.Series:
+            return pd.to_numeric(column(name), errors="coerce")
+        
+        epi_year = numeric("EpiYear").astype("Int64")
+        epi_week = numeric("EpiWeek").astype("Int64")
+        
+        # EpiWeek starts on Sunday, ends on Saturday; use the source's weekstart
+        # (only meaningful when the epi year/week themselves are valid)
+        week_start = column("weekstart")
+        week_start = week_start.where(week_start.notna() & epi_year.notna() & epi_week.notna(), None)
+        
+        virus_code = column("measureid", "")
+        virus_name = virus_code.map(self.VIRUS_NAMES).fillna(virus_code)
+        
+        raw_json = self.raw_payload.encode_frame(df)
+        
+        transformed = pd.DataFrame({
+            "SOURCE_FILE": f"wastewater_{self.run_id}",
+            "LOCATION": column("Location"),
+            "SITE": column("site"),
+            "CITY": column("city"),
+            "PROVINCE": column("province"),
+            "COUNTRY": column("country", "Canada"),
+            "EPI_YEAR": epi_year,
+            "EPI_WEEK": epi_week,
+            "WEEK_START": week_start,
+            "VIRUS_CODE": virus_code,
+            "VIRUS_NAME": virus_name,
+            "VIRAL_LOAD_AVG": numeric("w_avg").astype(float),
+            "VIRAL_LOAD_MIN": numeric("min").astype(float),
+            "VIRAL_LOAD_MAX": numeric("max").astype(float),
+            "POPULATION_COVERAGE": numeric("populationcoverage").astype(float),
+            "RAW_JSON": pd.Series(raw_json, index=df.index, dtype=object)
+        }, index=df.index).reset_index(drop=True)
+        
+        # Categorical / string dtypes go straight to the loader
+        return optimize_dtypes(transformed, self.TABLE, self.memory_stats)
     
     def load_to_snowflake(self, df: pd.DataFrame) -> int:
         """Load DataFrame to Snowflake."""
@@ -152,60 +352,39 @@ class WastewaterIngestor:
             print("No data to load")
             return 0
         
-        conn = get_snowflake_connection()
-        cursor = conn.cursor()
-        
-        try:
-            from snowflake.connector.pandas_tools import write_pandas
-            
-            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
-            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
-            
-            # Create table if not exists
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS RAW.WASTEWATER_SURVEILLANCE (
-                    id NUMBER AUTOINCREMENT PRIMARY KEY,
-                    ingested_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
-                    source_file VARCHAR(500),
-                    location VARCHAR(200),
-                    site VARCHAR(200),
-                    city VARCHAR(200),
-                    province VARCHAR(100),
-                    country VARCHAR(100),
-                    epi_year NUMBER,
-                    epi_week NUMBER,
-                    week_start DATE,
-                    virus_code VARCHAR(50),
-                    virus_name VARCHAR(100),
-                    viral_load_avg FLOAT,
-                    viral_load_min FLOAT,
-                    viral_load_max FLOAT,
-                    population_coverage FLOAT,
-                    raw_json VARIANT
-                )
-            """)
-            
-            success, nchunks, nrows, _ = write_pandas(
-                conn=conn,
-                df=df,
-                table_name="WASTEWATER_SURVEILLANCE",
-                database=SNOWFLAKE_DATABASE,
-                schema=SCHEMA_RAW,
-                auto_create_table=False,
-                overwrite=False
-            )
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
             
-            print(f"Loaded {nrows:,} rows to RAW.WASTEWATER_SURVEILLANCE")
-            return nrows
+            try:
+                cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
+                cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+                
+                # Create table if not exists
+                cursor.execute(self.TABLE_DDL)
+                
+                return load_dataframe(df, self.TABLE, conn=conn)
             
-        finally:
-            cursor.close()
-            conn.close()
+            finally:
+                cursor.close()
+    
+    def save_state(self, df: pd.DataFrame):
+        """Record the loaded file's hash and advance the local watermark."""
+        fields = {"content_hash": self.content_hash, "loaded_at": time.time()}
+        
+        has_weeks = not df.empty and {"EpiYear", "EpiWeek"} <= set(df.columns)
+        weeks = df[["EpiYear", "EpiWeek"]].dropna() if has_weeks else pd.DataFrame()
+        if not weeks.empty:
+            latest = tuple(int(v) for v in weeks.sort_values(["EpiYear", "EpiWeek"]).iloc[-1])
+            current = self.state.get(self.state_key).get("watermark")
+            if current is None or latest > tuple(current):
+                fields["watermark"] = list(latest)
+        
+        self.state.update(self.state_key, **fields)
     
     def run(self) -> dict:
         """Execute full ingestion pipeline."""
         result = {
-            "dataset": "wastewater_surveillance",
+            "dataset": self.DATASET,
             "run_id": self.run_id,
             "status": "FAILED",
             "records_fetched": 0,
@@ -218,19 +397,29 @@ class WastewaterIngestor:
             df = self.fetch_data()
             result["records_fetched"] = len(df)
             
+            if self.source_unchanged:
+                result["status"] = "SKIPPED"
+                result["error"] = "Source unchanged since last load"
+                return result
+            
             if df.empty:
                 result["status"] = "SUCCESS"
                 result["error"] = "No records returned"
+                self.session.mark_processed()
+                self.save_state(df)
                 return result
             
             # Transform
             transformed_df = self.transform(df)
             
             # Load
+            print(format_memory(result["dataset"], self.memory_stats))
             rows_inserted = self.load_to_snowflake(transformed_df)
             result["records_inserted"] = rows_inserted
             result["status"] = "SUCCESS"
-            
+            self.session.mark_processed()
+            self.save_state(df)
+        
         except Exception as e:
             result["error"] = str(e)
             raise
@@ -238,6 +427,23 @@ class WastewaterIngestor:
         return result
 
 
+def _spool(response, body) -> str:
+    """Copy a streamed response body to a file and return its SHA-256."""
+    digest = hashlib.sha256()
+    for chunk in response.iter_content(chunk_size=1024 * 1024):
+        digest.update(chunk)
+        body.write(chunk)
+    return digest.hexdigest()
+
+
+def _file_hash(body) -> str:
+    """SHA-256 of an open binary file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    while block := body.read(1024 * 1024):
+        digest.update(block)
+    return digest.hexdigest()
+
+
 def main():
     """Run wastewater ingestion."""
     print("\n" + "="*60)
@@ -0,0 +1,125 @@
+"""
+Ingestor for Health Canada Wastewater Surveillance trends.
+
+Data source: Health Infobase Canada
+Data: https://health-infobase.canada.ca/src/data/wastewater/wastewater_trend.csv
+
+Health Infobase publishes precomputed week-over-week trends alongside the
+aggregate measurements. They land in RAW.WASTEWATER_TRENDS and are exposed
+as MARTS_SURVEILLANCE.rpt_viral_trends_published, next to the LAG-based
+rpt_viral_trends the D1 sync reads, until the two have been validated
+against each other. The published week_over_week_pct averages per-site
+changes, so it is not the same metric as the change of the Ontario average.
+
+The download, hashing, local watermark and chunked parsing are shared with
+WastewaterIngestor; only the column mapping and target table differ.
+"""
+import pandas as pd
+
+from column_mapping import apply_mapping, mapped_fields
+from frame_dtypes import optimize_dtypes
+from ingest_wastewater import WastewaterIngestor
+
+
+class WastewaterTrendIngestor(WastewaterIngestor):
+    """Ingest precomputed wastewater trends from Health Canada."""
+    
+    DATA_URL = WastewaterIngestor.TREND_URL
+    DATASET = "wastewater_trends"
+    TABLE = "WASTEWATER_TRENDS"
+    TABLE_DDL = """
+        CREATE TABLE IF NOT EXISTS RAW.WASTEWATER_TRENDS (
+            id NUMBER AUTOINCREMENT PRIMARY KEY,
+            ingested_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+            source_file VARCHAR(500),
+            location VARCHAR(200),
+            site VARCHAR(200),
+            city VARCHAR(200),
+            province VARCHAR(100),
+            epi_year NUMBER,
+            epi_week NUMBER,
+            week_start DATE,
+            virus_code VARCHAR(50),
+            virus_name VARCHAR(100),
+            viral_load_avg FLOAT,
+            prev_week_avg FLOAT,
+            week_over_week_pct FLOAT,
+            trend VARCHAR(100),
+            raw_json VARIANT
+        )
+    """
+    
+    # The trend file's columns are read as published (all of them, so the
+    # full record is available in RAW_JSON)
+    CSV_COLUMNS = None
+    CSV_DTYPES = None
+    
+    # The trend file's headers are not pinned down, so names it has been
+    # seen with are renamed to the aggregate file's. The province filter,
+    # watermark and trend values need these after renaming; a file without
+    # them fails the run rather than loading the national file unfiltered.
+    COLUMN_ALIASES = {
+        "location": "Location", "Site": "site", "City": "city", "Province": "province",
+        "epi_year": "EpiYear", "epi_week": "EpiWeek",
+        "week_start": "weekstart", "Date": "weekstart", "measure": "measureid",
+        "viral_load": "w_avg", "prev_w_avg": "w_avg_prev", "previous": "w_avg_prev",
+        "percent_change": "pct_change", "change": "pct_change",
+        "Trend": "trend", "trend_label": "trend"
+    }
+    REQUIRED_COLUMNS = WastewaterIngestor.REQUIRED_COLUMNS + ["Location", "w_avg", "pct_change"]
+    
+    # Target column -> rule (see column_mapping), on the renamed columns
+    column_mapping = {
+        "SOURCE_FILE": {"value": "wastewater_trend_{now:%Y%m%d_%H%M%S}"},
+        "LOCATION": {"source": "Location"},
+        "SITE": {"source": "site"},
+        "CITY": {"source": "city"},
+        "PROVINCE": {"source": "province"},
+        "EPI_YEAR": {"source": "EpiYear", "type": "float"},
+        "EPI_WEEK": {"source": "EpiWeek", "type": "float"},
+        "WEEK_START": {"source": "weekstart", "type": "date"},
+        "VIRUS_CODE": {"source": "measureid"},
+        "VIRUS_NAME": {
+            "source": "measureid",
+            "apply": lambda codes: codes.map(WastewaterIngestor.VIRUS_NAMES).fillna(codes)
+        },
+        "VIRAL_LOAD_AVG": {"source": "w_avg", "type": "float"},
+        "PREV_WEEK_AVG": {"source": "w_avg_prev", "type": "float"},
+        "WEEK_OVER_WEEK_PCT": {"source": "pct_change", "type": "float"},
+        "TREND": {"source": "trend"},
+        "RAW_JSON": {"type": "json"}
+    }
+    TYPED_FIELDS = sorted(mapped_fields(column_mapping))
+    
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Map trend rows to RAW.WASTEWATER_TRENDS columns."""
+        transformed = apply_mapping(df, self.column_mapping, payload=self.raw_payload)
+        # Weeks are parsed as floats; keep them as nullable integers
+        for name in ("EPI_YEAR", "EPI_WEEK"):
+            transformed[name] = pd.to_numeric(transformed[name], errors="coerce").astype("Int64")
+        return optimize_dtypes(transformed, self.TABLE, self.memory_stats)
+
+
+def main():
+    """Run wastewater trend ingestion."""
+    print("\n" + "="*60)
+    print("Wastewater Trend Ingestion (Ontario)")
+    print("="*60)
+    
+    ingestor = WastewaterTrendIngestor(province_filter="Ontario")
+    
+    try:
+        result = ingestor.run()
+        print(f"\nIngestion complete:")
+        print(f"  Status: {result['status']}")
+        print(f"  Records fetched: {result['records_fetched']:,}")
+        print(f"  Records inserted: {result['records_inserted']:,}")
+        if result.get("error"):
+            print(f"  Note: {result['error']}")
+    except Exception as e:
+        print(f"Trend ingestion failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Bulk loader for Snowflake RAW tables.
+
+DataFrames are written to compressed Parquet files locally, uploaded to a
+session-scoped internal stage with one parallel PUT, and loaded with a
+single COPY INTO per table. Tables listed in NATURAL_KEYS are loaded into a
+temporary table first and MERGEd on their key, so re-running a load only
+touches rows that actually changed. Several tables (or several ingestors) can be
+batched into one warehouse session with BulkLoader:
+
+    with BulkLoader() as loader:
+        loader.add("SCHOOL_CASES", school_df)
+        loader.add("OUTBREAKS", outbreaks_df)
+
+Set ONTARIO_HEALTH_LOADER=write_pandas (or install without pyarrow) to use
+the connector's write_pandas instead.
+"""
+import tempfile
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from config import (
+    snowflake_connection,
+    LOADER_COMPRESSION,
+    LOADER_FILE_ROWS,
+    LOADER_MODE,
+    LOADER_PUT_THREADS,
+    LOADER_STAGE,
+    LOADER_WRITE_MODE,
+    MERGE_IGNORE_COLUMNS,
+    NATURAL_KEYS,
+    NATURAL_KEY_FALLBACKS,
+    SNOWFLAKE_DATABASE,
+    SCHEMA_RAW
+)
+from frame_dtypes import concat_frames
+
+try:
+    import pyarrow  # noqa: F401 - required by DataFrame.to_parquet
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class BulkLoader:
+    """Queue DataFrames per table and load them with PUT + COPY INTO."""
+    
+    def __init__(self, conn=None, mode: str = LOADER_MODE,
+                 file_rows: int = LOADER_FILE_ROWS,
+                 compression: str = LOADER_COMPRESSION,
+                 put_threads: int = LOADER_PUT_THREADS,
+                 write_mode: str = LOADER_WRITE_MODE):
+        """
+        Args:
+            conn: Snowflake connection to use. Defaults to a pooled session
+                  checked out for the duration of flush().
+            mode: "copy" (Parquet + COPY INTO) or "write_pandas".
+            file_rows: Rows per staged Parquet file.
+            compression: Parquet codec (snappy, zstd, gzip or none).
+            put_threads: Parallel uploads per PUT.
+            write_mode: "merge" (upsert tables with a natural key) or "append".
+        """
+        self.conn = conn
+        self.mode = mode if HAS_PYARROW else "write_pandas"
+        self.file_rows = file_rows
+        self.compression = None if compression == "none" else compression
+        self.put_threads = put_threads
+        self.write_mode = write_mode
+        self._pending: dict[str, list[pd.DataFrame]] = {}
+        self.rows_loaded: dict[str, int] = {}
+    
+    def add(self, table: str, df: pd.DataFrame):
+        """Queue a DataFrame for table (loaded on flush)."""
+        if not df.empty:
+            self._pending.setdefault(table, []).append(df)
+    
+    def flush(self) -> dict[str, int]:
+        """Load everything queued and return rows loaded per table."""
+        if not self._pending:
+            return {}
+        
+        pending, self._pending = self._pending, {}
+        if self.conn is not None:
+            return self._load_all(self.conn, pending)
+        with snowflake_connection() as conn:
+            return self._load_all(conn, pending)
+    
+    def _load_all(self, conn, pending: dict[str, list[pd.DataFrame]]) -> dict[str, int]:
+        loaded = {}
+        for table, frames in pending.items():
+            df = concat_frames(frames)
+            keys = NATURAL_KEYS.get(table) if self.write_mode == "merge" else None
+            if keys:
+                nrows = self._merge(conn, table, df, keys)
+            else:
+                nrows = self._append(conn, table, df)
+            
+            print(f"Loaded {nrows} rows to {SCHEMA_RAW}.{table}")
+            loaded[table] = nrows
+            self.rows_loaded[table] = self.rows_loaded.get(table, 0) + nrows
+        return loaded
+    
+    def _append(self, conn, table: str, df: pd.DataFrame) -> int:
+        if self.mode == "write_pandas":
+            return self._write_pandas(conn, table, df)
+        return self._copy_into(conn, table, df)
+    
+    def _merge(self, conn, table: str, df: pd.DataFrame, keys: list[str]) -> int:
+        """Load df into a temporary copy of table, then MERGE it in on keys."""
+        # MERGE needs at most one source row per key; the last one wins
+        df = df[~merge_key_frame(table, df, keys).duplicated(keep="last")]
+        temp_table = f"{table}_MERGE_{uuid.uuid4().hex[:8].upper()}"
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
+            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {temp_table} LIKE {SCHEMA_RAW}.{table}")
+            
+            self._append(conn, temp_table, df)
+            cursor.execute(build_merge_sql(table, temp_table, list(df.columns), keys,
+                                           NATURAL_KEY_FALLBACKS.get(table)))
+            # Result row is (inserted, updated); no updated column without WHEN MATCHED
+            counts = cursor.fetchone()
+            inserted, updated = counts[0], counts[1] if len(counts) > 1 else 0
+            
+            print(f"  MERGE {SCHEMA_RAW}.{table}: {inserted} inserted, {updated} updated, "
+                  f"{len(df) - inserted - updated} unchanged")
+            return inserted + updated
+            
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {temp_table}")
+            cursor.close()
+    
+    def write_parquet_files(self, df: pd.DataFrame, directory: Path) -> list[Path]:
+        """Split df into file_rows-sized Parquet files under directory."""
+        paths = []
+        for part, start in enumerate(range(0, len(df), self.file_rows)):
+            path = directory / f"part_{part:05d}.parquet"
+            df.iloc[start:start + self.file_rows].to_parquet(
+                path, engine="pyarrow", compression=self.compression, index=False
+            )
+            paths.append(path)
+        return paths
+    
+    def _copy_into(self, conn, table: str, df: pd.DataFrame) -> int:
+        cursor = conn.cursor()
+        prefix = f"{table.lower()}/{uuid.uuid4().hex}"
+        
+        try:
+            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
+            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+            cursor.execute(f"CREATE TEMPORARY STAGE IF NOT EXISTS {LOADER_STAGE}")
+            
+            with tempfile.TemporaryDirectory(prefix="ontario_health_load_") as tmp:
+                self.write_parquet_files(df, Path(tmp))
+                # Files are already compressed by Parquet; PUT uploads them concurrently
+                cursor.execute(
+                    f"PUT 'file://{Path(tmp).as_posix()}/*.parquet' @{LOADER_STAGE}/{prefix} "
+                    f"PARALLEL={self.put_threads} AUTO_COMPRESS=FALSE"
+                )
+            
+            cursor.execute(f"""
+                COPY INTO {SCHEMA_RAW}.{table}
+                FROM @{LOADER_STAGE}/{prefix}
+                FILE_FORMAT = (TYPE = PARQUET)
+                MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE
+                PURGE = TRUE
+            """)
+            # One result row per file: (file, status, rows_parsed, rows_loaded, ...)
+            return sum(row[3] for row in cursor.fetchall())
+        
+        finally:
+            cursor.close()
+    
+    def _write_pandas(self, conn, table: str, df: pd.DataFrame) -> int:
+        from snowflake.connector.pandas_tools import write_pandas
+        
+        success, nchunks, nrows, _ = write_pandas(
+            conn=conn,
+            df=df,
+            table_name=table,
+            database=SNOWFLAKE_DATABASE,
+            schema=SCHEMA_RAW,
+            auto_create_table=False,  # Table should exist from DDL
+            overwrite=False  # Append mode
+        )
+        return nrows
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        # Don't load a partial batch if the caller failed
+        if exc_type is None:
+            self.flush()
+
+
+def merge_key_frame(table: str, df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """Key columns of df as MERGE matches them (empty keys replaced by their fallback)."""
+    frame = df[keys].copy()
+    for key, fallback in NATURAL_KEY_FALLBACKS.get(table, {}).items():
+        if key in frame and fallback in df:
+            empty = frame[key].isna() | (frame[key].astype(str) == "")
+            frame[key] = frame[key].astype(object).where(~empty, df[fallback].astype(str))
+    return frame
+
+
+def build_merge_sql(table: str, source: str, columns: list[str], keys: list[str],
+                    fallbacks: dict[str, str] | None = None) -> str:
+    """
+    MERGE statement upserting source into RAW.<table> on keys.
+    
+    Keys match NULL to NULL. A key listed in fallbacks is compared as its
+    fallback column when NULL or empty, so rows without it never collapse
+    onto one another. Matched rows are only rewritten when a column outside
+    MERGE_IGNORE_COLUMNS differs, so an unchanged re-load writes nothing.
+    """
+    fallbacks = fallbacks or {}
+    
+    def key_expr(alias: str, key: str) -> str:
+        if key not in fallbacks:
+            return f"{alias}.{key}"
+        return f"COALESCE(NULLIF({alias}.{key}, ''), {alias}.{fallbacks[key]}::VARCHAR)"
+    
+    on = " AND ".join(f"EQUAL_NULL({key_expr('t', k)}, {key_expr('s', k)})" for k in keys)
+    values = [c for c in columns if c not in keys]
+    compared = [c for c in values if c not in MERGE_IGNORE_COLUMNS]
+    
+    matched = ""
+    if compared:
+        changed = " OR ".join(f"NOT EQUAL_NULL(t.{c}, s.{c})" for c in compared)
+        assignments = ", ".join(f"{c} = s.{c}" for c in values)
+        matched = (f"WHEN MATCHED AND ({changed}) THEN UPDATE SET "
+                   f"{assignments}, INGESTED_AT = CURRENT_TIMESTAMP()")
+    
+    return f"""
+        MERGE INTO {SCHEMA_RAW}.{table} t
+        USING {source} s
+        ON {on}
+        {matched}
+        WHEN NOT MATCHED THEN INSERT ({", ".join(columns)})
+            VALUES ({", ".join(f"s.{c}" for c in columns)})
+    """
+
+
+def load_dataframe(df: pd.DataFrame, table: str, conn=None) -> int:
+    """Load a single DataFrame into RAW.<table> and return rows loaded."""
+    if df.empty:
+        print("No data to load")
+        return 0
+    
+    loader = BulkLoader(conn=conn)
+    loader.add(table, df)
+    return loader.flush().get(table, 0)
@@ -0,0 +1,208 @@
+"""
+Offline replay of recorded hospital ED pages.
+
+tests/fixtures/ed_pages holds one recorded page per scraper, named after its
+registry key (hospital_scrapers/niagara.py -> niagara.html). Selenium
+scrapers get the rendered DOM rather than the raw HTML. expected.json lists
+the records each page should yield.
+
+ReplayServer serves that corpus from a local HTTP server, with ETag
+revalidation like the real sites and optional per-response latency.
+replay_scraper() points a scraper at it, so fetch() and parse() run as they
+do in production, just without the internet. Recorded DOMs are fetched over
+plain HTTP, so no browser is needed to replay a Selenium scraper.
+
+Usage:
+    python page_replay.py --serve                  # Serve the corpus locally
+    python page_replay.py --capture niagara uhn    # Re-record pages from the live sites
+"""
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from hospital_scrapers.base import BaseHospitalScraper
+from hospital_scrapers.registry import discover
+from http_cache import HTTPCache
+
+ED_PAGES_DIR = Path(__file__).parent / "tests" / "fixtures" / "ed_pages"
+
+
+def load_expected(pages_dir: Path | str = ED_PAGES_DIR) -> dict[str, list[dict]]:
+    """Expected records per scraper key."""
+    return json.loads((Path(pages_dir) / "expected.json").read_text())
+
+
+def score(records: list[dict], expected: list[dict]) -> dict:
+    """Compare extracted records with the expected ones on (name, hours, minutes)."""
+    def key(r):
+        return (r["hospital_name"], r["wait_hours"], r["wait_minutes"])
+    
+    got = Counter(map(key, records))
+    want = Counter(map(key, expected))
+    return {
+        "expected": len(expected),
+        "extracted": len(records),
+        "correct": sum((got & want).values()),
+        "missing": sorted((want - got).elements()),
+        "unexpected": sorted((got - want).elements())
+    }
+
+
+class ReplayServer:
+    """Serve recorded pages at http://127.0.0.1:<port>/<key> from a background thread."""
+    
+    def __init__(self, pages_dir: Path | str = ED_PAGES_DIR, latency: float = 0.0):
+        """
+        Args:
+            pages_dir: Directory of <key>.html pages.
+            latency: Seconds to wait before each response (simulated round trip).
+        """
+        self.pages_dir = Path(pages_dir)
+        self.latency = latency
+        self.requests: list[tuple[str, int]] = []
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+    
+    def __enter__(self) -> "ReplayServer":
+        self.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def start(self):
+        replay = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                replay._serve(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="page-replay", daemon=True).start()
+    
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def url_for(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+    
+    def _serve(self, handler: BaseHTTPRequestHandler):
+        if self.latency:
+            time.sleep(self.latency)
+        
+        key = handler.path.split("?", 1)[0].strip("/")
+        path = self.pages_dir / f"{key}.html"
+        if not key or "/" in key or not path.is_file():
+            self._respond(handler, key, 404)
+            return
+        
+        body = path.read_bytes()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if handler.headers.get("If-None-Match") == etag:
+            self._respond(handler, key, 304, headers={"ETag": etag})
+        else:
+            self._respond(handler, key, 200, body, {
+                "ETag": etag,
+                "Content-Type": "text/html; charset=utf-8"
+            })
+    
+    def _respond(self, handler, key: str, status: int, body: bytes = b"", headers: dict | None = None):
+        handler.send_response(status)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self._lock:
+            self.requests.append((key, status))
+
+
+def replay_scraper(cls: type, url: str, cache: HTTPCache | None = None) -> BaseHospitalScraper:
+    """
+    Instance of a scraper class that fetches url instead of the live site.
+    
+    Pages are fetched over plain HTTP even for Selenium scrapers (their
+    recordings are already rendered). HTTP caching is off unless a cache is
+    given, so every fetch downloads the page.
+    """
+    replay_cls = type(cls.__name__, (cls,), {"url": url, "fetch": BaseHospitalScraper.fetch})
+    scraper = replay_cls()
+    scraper.session.cache = cache
+    return scraper
+
+
+def capture(keys: list[str] | None = None, pages_dir: Path | str = ED_PAGES_DIR):
+    """Record the live page (rendered DOM for Selenium scrapers) for each scraper."""
+    pages_dir = Path(pages_dir)
+    scrapers, unavailable = discover()
+    
+    for key in keys or list(scrapers):
+        if key not in scrapers:
+            print(f"  {key}: {unavailable.get(key, 'unknown scraper')}")
+            continue
+        
+        scraper = scrapers[key]()
+        scraper.session.cache = None  # Always download the full page
+        try:
+            page = scraper.fetch()
+        except Exception as e:
+            print(f"  {key}: capture failed: {e}")
+            continue
+        
+        (pages_dir / f"{key}.html").write_text(page.text)
+        records = scraper.parse(page)
+        print(f"  {key}: {len(page.text) / 1024:.0f} KB, {len(records)} records")
+        for r in records:
+            print(f"    {r['hospital_name']}: {r['wait_hours']}h {r['wait_minutes']}m")
+    
+    print("\nCheck the records against the live pages, then update expected.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay or re-record ED wait time pages")
+    parser.add_argument("--serve", action="store_true", help="Serve the recorded pages until interrupted")
+    parser.add_argument("--capture", nargs="*", metavar="KEY",
+                        help="Re-record pages from the live sites (default: every scraper)")
+    parser.add_argument("--pages", type=Path, default=ED_PAGES_DIR, help="Recorded pages directory")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per response")
+    args = parser.parse_args()
+    
+    if args.capture is not None:
+        capture(args.capture, args.pages)
+        return 0
+    
+    if args.serve:
+        with ReplayServer(args.pages, latency=args.latency) as server:
+            for path in sorted(args.pages.glob("*.html")):
+                print(f"  {server.url_for(path.stem)}")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+        return 0
+    
+    parser.print_help()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+RAW_JSON payloads for RAW tables.
+
+Every RAW table keeps the source record in a RAW_JSON VARIANT column for
+debugging and reprocessing. For some datasets that payload is larger than
+the typed columns themselves, so each dataset has a policy (see
+RAW_PAYLOAD_POLICIES in config.py):
+
+    full      the whole source record
+    compact   the record without nulls / empty strings and without the
+              fields already stored in typed columns
+    sampled   the whole record for 1 in N rows, NULL for the rest
+    off       NULL; the records are appended to a gzipped JSON Lines file
+              under RAW_PAYLOAD_ARCHIVE_DIR instead
+
+The "off" archive is not durable storage. RAW_PAYLOAD_ARCHIVE_DIR lives in
+the cache directory, which CI only carries between runs through the GitHub
+Actions cache, and that cache can be evicted at any time. Use "off" only
+for datasets whose raw records can be lost or fetched again from the source.
+
+Records are serialized with orjson when it is installed, otherwise with the
+standard json module (same compact output).
+"""
+import gzip
+import json
+import math
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+
+from config import (
+    RAW_PAYLOAD_ARCHIVE_DIR,
+    RAW_PAYLOAD_DEFAULT,
+    RAW_PAYLOAD_OVERRIDE,
+    RAW_PAYLOAD_POLICIES,
+    RAW_PAYLOAD_SAMPLE_EVERY
+)
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+MODES = {"full", "compact", "sampled", "off"}
+
+
+def _json_default(value):
+    """Serialize datetimes as ISO strings, anything else via str()."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+if HAS_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    
+    def dumps(record) -> str:
+        """Serialize one record as compact JSON."""
+        return orjson.dumps(record, default=_json_default, option=_ORJSON_OPTIONS).decode()
+else:
+    def dumps(record) -> str:
+        """Serialize one record as compact JSON."""
+        return json.dumps(record, default=_json_default, separators=(",", ":"))
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+class RawPayloadPolicy:
+    """Build RAW_JSON values for one dataset according to its policy."""
+    
+    def __init__(self, dataset: str, mode: str | None = None,
+                 typed_fields=(), sample_every: int = RAW_PAYLOAD_SAMPLE_EVERY,
+                 archive_dir: Path = RAW_PAYLOAD_ARCHIVE_DIR, run_id: str | None = None):
+        """
+        Args:
+            dataset: Dataset name (key of RAW_PAYLOAD_POLICIES).
+            mode: Policy override; defaults to ONTARIO_HEALTH_RAW_PAYLOAD,
+                  then the dataset's configured policy.
+            typed_fields: Source fields already loaded into typed columns
+                          (left out of "compact" payloads).
+            sample_every: Keep 1 in N payloads in "sampled" mode.
+            archive_dir: Where "off" archives records.
+            run_id: Archive file suffix (default: current timestamp).
+        """
+        self.dataset = dataset
+        self.mode = mode or RAW_PAYLOAD_OVERRIDE or RAW_PAYLOAD_POLICIES.get(dataset, RAW_PAYLOAD_DEFAULT)
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown RAW_JSON policy for {dataset}: {self.mode}")
+        self.typed_fields = set(typed_fields)
+        self.sample_every = max(1, sample_every)
+        self.archive_dir = Path(archive_dir)
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.archived = 0
+    
+    @property
+    def archive_path(self) -> Path:
+        return self.archive_dir / f"{self.dataset}_{self.run_id}.jsonl.gz"
+    
+    def encode(self, records: list[dict]) -> list[str | None]:
+        """RAW_JSON value for each record (None where the policy drops it)."""
+        if self.mode == "full":
+            return [dumps(r) for r in records]
+        
+        if self.mode == "compact":
+            return [
+                dumps({k: v for k, v in r.items()
+                       if k not in self.typed_fields and not _is_empty(v)})
+                for r in records
+            ]
+        
+        if self.mode == "sampled":
+            return [dumps(r) if i % self.sample_every == 0 else None
+                    for i, r in enumerate(records)]
+        
+        self._archive(records)
+        return [None] * len(records)
+    
+    def encode_frame(self, df: pd.DataFrame) -> list[str | None]:
+        """RAW_JSON value for each row of a source DataFrame."""
+        if df.empty:
+            return []
+        if self.mode == "full":
+            # One vectorized encode for the whole frame
+            return df.to_json(
+                orient="records", lines=True, date_format="iso",
+                double_precision=15, default_handler=str
+            ).splitlines()
+        if self.mode == "sampled":
+            # Only the sampled rows are converted to dicts
+            values = [None] * len(df)
+            values[::self.sample_every] = [dumps(r) for r in df.iloc[::self.sample_every].to_dict("records")]
+            return values
+        if self.mode == "compact":
+            df = df.drop(columns=[c for c in df.columns if c in self.typed_fields])
+        # to_dict() of a frame with no columns left is [], not one {} per row
+        records = df.to_dict("records") if len(df.columns) else [{}] * len(df)
+        return self.encode(records)
+    
+    def _archive(self, records: list[dict]):
+        if not records:
+            return
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        # Appending adds a gzip member per batch; readers see one stream
+        with gzip.open(self.archive_path, "at", compresslevel=6, encoding="utf-8") as f:
+            f.writelines(dumps(r) + "\n" for r in records)
+        self.archived += len(records)
+        print(f"  Archived {len(records):,} {self.dataset} payloads to {self.archive_path}")
@@ -6,14 +6,32 @@ Usage:
     python run_ingestion.py                  # Run all ingestors
     python run_ingestion.py school_cases     # Run specific ingestor
     python run_ingestion.py outbreaks
+    python run_ingestion.py wastewater_trends  # Trend feed (off in "all" by default)
+    python run_ingestion.py --workers 1      # Run ingestors one at a time
     python run_ingestion.py --explore        # Explore available datasets
+
+Independent ingestors run concurrently (see task_graph.py); one failing
+doesn't stop the others.
 """
 import argparse
 import sys
+import time
 from datetime import datetime
 
+from config import WASTEWATER_TRENDS_ENABLED
+from task_graph import TaskGraph
+
+
+def refresh_catalog():
+    """Refresh the CKAN catalog once, before the CKAN ingestors share it."""
+    from ckan_catalog import get_catalog
+    
+    catalog = get_catalog()
+    if catalog.is_stale():
+        catalog.refresh()
+
 
-def run_school_cases():
+def run_school_cases(full_refresh: bool = False):
     """Run school cases ingestion."""
     from ingest_school_cases import SchoolCasesIngestor
     
@@ -23,10 +41,10 @@ def run_school_cases():
     
     ingestor = SchoolCasesIngestor()
     
-    # Skip if already loaded (static historical data)
-    if ingestor.check_already_loaded():
+    # Skip if the current resource version is already loaded
+    if not full_refresh and ingestor.check_already_loaded():
         print(f"\n✓ School cases already loaded - skipping")
-        print(f"  (This is historical 2021 data, no updates expected)")
+        print(f"  (Resource unchanged since last successful load)")
         return {
             "dataset": "school_cases",
             "status": "SKIPPED",
@@ -35,10 +53,10 @@ def run_school_cases():
             "error": "Already loaded"
         }
     
-    return ingestor.run()
+    return ingestor.run(full_refresh=full_refresh)
 
 
-def run_outbreaks():
+def run_outbreaks(full_refresh: bool = False):
     """Run outbreaks ingestion."""
     from ingest_outbreaks import OutbreaksIngestor
     
@@ -48,10 +66,10 @@ def run_outbreaks():
     
     ingestor = OutbreaksIngestor(filter_to_schools=True)
     
-    # Skip if already loaded (static historical data)
-    if ingestor.check_already_loaded():
+    # Skip if the current resource version is already loaded
+    if not full_refresh and ingestor.check_already_loaded():
         print(f"\n✓ Outbreaks already loaded - skipping")
-        print(f"  (This is historical 2021 data, no updates expected)")
+        print(f"  (Resource unchanged since last successful load)")
         return {
             "dataset": "outbreaks",
             "status": "SKIPPED",
@@ -60,7 +78,7 @@ def run_outbreaks():
             "error": "Already loaded"
         }
     
-    return ingestor.run()
+    return ingestor.run(full_refresh=full_refresh)
 
 
 def run_wastewater():
@@ -75,6 +93,18 @@ def run_wastewater():
     return ingestor.run()
 
 
+def run_wastewater_trends():
+    """Run wastewater trend ingestion (precomputed week-over-week trends)."""
+    from ingest_wastewater_trends import WastewaterTrendIngestor
+    
+    print("\n" + "="*60)
+    print("Running Wastewater Trend Ingestion (Ontario)")
+    print("="*60)
+    
+    ingestor = WastewaterTrendIngestor(province_filter="Ontario")
+    return ingestor.run()
+
+
 def run_ed_wait_times():
     """Run ED wait times scraper (Halton Healthcare)."""
     from ingest_ed_wait_times import EDWaitTimesIngestor
@@ -122,7 +152,7 @@ def main():
     parser.add_argument(
         "dataset",
         nargs="?",
-        choices=["school_cases", "outbreaks", "wastewater", "ed_wait_times", "all"],
+        choices=["school_cases", "outbreaks", "wastewater", "wastewater_trends", "ed_wait_times", "all"],
         default="all",
         help="Which dataset to ingest (default: all)"
     )
@@ -131,6 +161,17 @@ def main():
         action="store_true",
         help="Explore available datasets instead of ingesting"
     )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Ignore stored watermarks and reload CKAN datasets in full"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Maximum ingestors to run concurrently (default: 4)"
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -146,24 +187,53 @@ def main():
         explore_datasets()
         return 0
     
-    results = []
+    graph = TaskGraph()
+    if args.dataset in ["school_cases", "outbreaks", "all"]:
+        graph.add("ckan_catalog", refresh_catalog)
     
-    try:
-        if args.dataset in ["school_cases", "all"]:
-            results.append(("school_cases", run_school_cases()))
-        
-        if args.dataset in ["outbreaks", "all"]:
-            results.append(("outbreaks", run_outbreaks()))
-        
-        if args.dataset in ["wastewater", "all"]:
-            results.append(("wastewater", run_wastewater()))
-        
-        if args.dataset in ["ed_wait_times", "all"]:
-            results.append(("ed_wait_times", run_ed_wait_times()))
+    if args.dataset in ["school_cases", "all"]:
+        graph.add("school_cases", lambda: run_school_cases(args.full_refresh),
+                  depends_on=["ckan_catalog"])
+    
+    if args.dataset in ["outbreaks", "all"]:
+        graph.add("outbreaks", lambda: run_outbreaks(args.full_refresh),
+                  depends_on=["ckan_catalog"])
+    
+    if args.dataset in ["wastewater", "all"]:
+        graph.add("wastewater", run_wastewater)
+    
+    # Independent download and table: runs alongside the aggregate feed once
+    # its schema is confirmed (see WASTEWATER_TRENDS_ENABLED)
+    if args.dataset == "wastewater_trends" or (
+        args.dataset in ["wastewater", "all"] and WASTEWATER_TRENDS_ENABLED
+    ):
+        graph.add("wastewater_trends", run_wastewater_trends)
+    
+    if args.dataset in ["ed_wait_times", "all"]:
+        graph.add("ed_wait_times", run_ed_wait_times)
+    
+    started = time.perf_counter()
+    outcomes = graph.run(max_workers=args.workers)
+    elapsed = time.perf_counter() - started
+    
+    results = []
+    for name, outcome in outcomes.items():
+        if outcome["error"] is not None:
+            print(f"\nError during {name}: {outcome['error']}")
+        if name == "ckan_catalog":
+            continue
         
-    except Exception as e:
-        print(f"\nError during ingestion: {e}")
-        return 1
+        result = outcome["value"]
+        if outcome["error"] is not None:
+            result = {
+                "dataset": name,
+                "status": "FAILED",
+                "records_fetched": 0,
+                "records_inserted": 0,
+                "error": str(outcome["error"])
+            }
+        result["seconds"] = outcome["seconds"]
+        results.append((name, result))
     
     # Summary
     print("\n" + "="*60)
@@ -184,10 +254,20 @@ def main():
         print(f"    Status: {result['status']}")
         print(f"    Fetched: {result['records_fetched']}")
         print(f"    Inserted: {result['records_inserted']}")
+        print(f"    Time: {result['seconds']:.1f}s")
         if result.get("error") and result["status"] != "SKIPPED":
             print(f"    Error: {result['error']}")
     
-    print(f"\nCompleted at: {datetime.utcnow().isoformat()}Z")
+    # Report cache effectiveness and keep the on-disk cache bounded
+    from http_cache import get_default_cache
+    cache = get_default_cache()
+    if cache is not None:
+        cache.print_stats()
+        cache.prune()
+    
+    print(f"\nWall time: {elapsed:.1f}s "
+          f"(sum of tasks: {sum(r['seconds'] for _, r in results):.1f}s)")
+    print(f"Completed at: {datetime.utcnow().isoformat()}Z")
     
     return 0 if all_success else 1
 
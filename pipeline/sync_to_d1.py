@@ -18,7 +18,7 @@ from pathlib import Path
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import get_snowflake_connection
+from config import snowflake_connection
 
 D1_DATABASE_ID = "1b818f56-47aa-4c11-b1fa-4c9e98009d0e"
 D1_DATABASE_NAME = "ontario-health-cache"
@@ -26,24 +26,23 @@ D1_DATABASE_NAME = "ontario-health-cache"
 
 def query_snowflake(sql: str) -> list[dict]:
     """Query Snowflake and return results as list of dicts."""
-    conn = get_snowflake_connection()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute(sql)
-        
-        # Get column names
-        columns = [col[0] for col in cur.description]
-        
-        # Fetch all rows
-        rows = cur.fetchall()
-        
-        # Convert to list of dicts
-        return [dict(zip(columns, row)) for row in rows]
+    with snowflake_connection() as conn:
+        cur = conn.cursor()
         
-    finally:
-        cur.close()
-        conn.close()
+        try:
+            cur.execute(sql)
+            
+            # Get column names
+            columns = [col[0] for col in cur.description]
+            
+            # Fetch all rows
+            rows = cur.fetchall()
+            
+            # Convert to list of dicts
+            return [dict(zip(columns, row)) for row in rows]
+            
+        finally:
+            cur.close()
 
 
 def sync_current_week():
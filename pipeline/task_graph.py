@@ -0,0 +1,81 @@
+"""
+Dependency-aware parallel task runner.
+
+Used by run_ingestion.py to run independent ingestors concurrently. A task
+starts as soon as every task it depends on has finished; dependencies only
+order the work, so a failed task is recorded and its dependents still run
+(e.g. ingestors fall back to a stale catalog if the catalog refresh fails).
+
+Ingestors spend their time waiting on HTTP and Snowflake, so a thread pool
+is enough to overlap them.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+
+class TaskGraph:
+    """A set of named callables with depends_on edges."""
+    
+    def __init__(self):
+        self._tasks: dict[str, tuple[Callable[[], Any], list[str]]] = {}
+    
+    def add(self, name: str, fn: Callable[[], Any], depends_on: list[str] | None = None):
+        """Register a task. Dependencies that aren't registered are ignored."""
+        if name in self._tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        self._tasks[name] = (fn, list(depends_on or []))
+    
+    def _pending_deps(self) -> dict[str, set[str]]:
+        deps = {
+            name: {d for d in depends_on if d in self._tasks}
+            for name, (_, depends_on) in self._tasks.items()
+        }
+        
+        # Reject cycles up front rather than deadlocking
+        remaining = {name: set(d) for name, d in deps.items()}
+        while remaining:
+            ready = [name for name, d in remaining.items() if not d]
+            if not ready:
+                raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+            for d in remaining.values():
+                d.difference_update(ready)
+        
+        return deps
+    
+    @staticmethod
+    def _timed(fn: Callable[[], Any]) -> dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            return {"value": fn(), "error": None, "seconds": time.perf_counter() - start}
+        except Exception as e:
+            return {"value": None, "error": e, "seconds": time.perf_counter() - start}
+    
+    def run(self, max_workers: int = 4) -> dict[str, dict[str, Any]]:
+        """
+        Run every task, respecting dependencies.
+        
+        Returns {name: {"value", "error", "seconds"}} in registration order.
+        Exceptions are captured per task instead of aborting the run.
+        """
+        pending = self._pending_deps()
+        outcomes: dict[str, dict[str, Any]] = {}
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            running = {}
+            
+            while pending or running:
+                for name in [n for n, d in pending.items() if not d]:
+                    del pending[name]
+                    running[executor.submit(self._timed, self._tasks[name][0])] = name
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outcomes[name] = future.result()
+                    for d in pending.values():
+                        d.discard(name)
+        
+        return {name: outcomes[name] for name in self._tasks}
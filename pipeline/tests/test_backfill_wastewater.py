@@ -0,0 +1,128 @@
+"""
+Unit tests for the partitioned wastewater backfill.
+
+Run with: pytest pipeline/tests/test_backfill_wastewater.py
+"""
+import io
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from pipeline.backfill_wastewater import (
+    WastewaterBackfill, checkpoint_key, iter_partitions, split_partitions
+)
+from pipeline.ingest_wastewater import WastewaterIngestor
+from pipeline.watermarks import LocalStateStore
+
+CSV_BODY = "Location,province,EpiYear,EpiWeek,measureid,w_avg,pruid\n" + "".join(
+    f"Site {i},{province},{year},{week},covN2,{i}.5,{35 if province == 'Ontario' else 24}\n"
+    for i, (province, year, week) in enumerate(
+        (province, year, week)
+        for province in ["Ontario", "Quebec"]
+        for year in [2023, 2024]
+        for week in [1, 2, 3]
+    )
+)
+
+
+class TestSplitPartitions(unittest.TestCase):
+    """Rows are grouped by (province, EpiYear) across CSV chunks."""
+    
+    def test_groups_across_chunks(self):
+        ingestor = WastewaterIngestor(province_filter=None)
+        ingestor.csv_chunk_rows = 4
+        
+        parts = dict(iter_partitions(split_partitions(ingestor, io.StringIO(CSV_BODY))))
+        
+        self.assertEqual(list(parts), [("Ontario", 2023), ("Ontario", 2024),
+                                       ("Quebec", 2023), ("Quebec", 2024)])
+        self.assertEqual(parts[("Quebec", 2024)]["EpiWeek"].tolist(), [1, 2, 3])
+    
+    def test_year_and_province_filters(self):
+        ingestor = WastewaterIngestor(province_filter=None)
+        parts = split_partitions(ingestor, io.StringIO(CSV_BODY), years=[2024], provinces=["Quebec"])
+        self.assertEqual(list(parts), [("Quebec", 2024)])
+
+
+class TestWastewaterBackfill(unittest.TestCase):
+    """Partitions are transformed in worker processes and checkpointed one by one."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = LocalStateStore(Path(self.tmp.name) / "backfill.json")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _backfill(self, fail: set = frozenset(), body: str = CSV_BODY) -> tuple[WastewaterBackfill, list]:
+        backfill = WastewaterBackfill(workers=2, state=self.state)
+        response = SimpleNamespace(
+            iter_content=lambda chunk_size: iter([body.encode()]),
+            raise_for_status=lambda: None,
+            close=lambda: None
+        )
+        backfill.ingestor.session.get = Mock(return_value=response)
+        
+        loads = []
+        
+        def load(df):
+            partition = (df["PROVINCE"].iloc[0], int(df["EPI_YEAR"].iloc[0]))
+            if partition in fail:
+                raise RuntimeError("load failed")
+            loads.append(partition)
+            return len(df)
+        
+        @contextmanager
+        def loader():
+            yield load
+        
+        backfill.loader = loader
+        return backfill, loads
+    
+    def test_failed_partition_is_retried_alone(self):
+        backfill, loads = self._backfill(fail={("Quebec", 2023)})
+        result = backfill.run()
+        
+        self.assertEqual(result["status"], "FAILED")
+        self.assertEqual(result["failed"], [("Quebec", 2023)])
+        self.assertEqual(sorted(loads), [("Ontario", 2023), ("Ontario", 2024), ("Quebec", 2024)])
+        self.assertEqual(result["records_inserted"], 9)
+        self.assertEqual(self.state.get(checkpoint_key(("Quebec", 2023)))["status"], "failed")
+        self.assertEqual(self.state.get(checkpoint_key(("Ontario", 2024)))["rows"], 3)
+        
+        # Second run only reloads the failed partition
+        backfill, loads = self._backfill()
+        result = backfill.run()
+        
+        self.assertEqual(result["status"], "SUCCESS")
+        self.assertEqual(loads, [("Quebec", 2023)])
+        self.assertEqual(len(result["skipped"]), 3)
+        self.assertEqual(self.state.get(checkpoint_key(("Quebec", 2023)))["status"], "loaded")
+    
+    def test_changed_partition_is_reloaded(self):
+        backfill, _ = self._backfill()
+        backfill.run()
+        
+        # A corrected value in one partition; the rest hash the same
+        corrected = CSV_BODY.replace("Site 0,Ontario,2023,1,covN2,0.5,", "Site 0,Ontario,2023,1,covN2,9.5,")
+        backfill, loads = self._backfill(body=corrected)
+        result = backfill.run()
+        
+        self.assertEqual(loads, [("Ontario", 2023)])
+        self.assertEqual(len(result["skipped"]), 3)
+    
+    def test_force_reloads_everything(self):
+        backfill, _ = self._backfill()
+        backfill.run()
+        
+        backfill, loads = self._backfill()
+        backfill.force = True
+        backfill.run()
+        self.assertEqual(len(loads), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
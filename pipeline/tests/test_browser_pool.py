@@ -0,0 +1,146 @@
+"""
+Unit tests for the pooled headless browsers used by the Selenium scrapers.
+
+Run with: pytest pipeline/tests/test_browser_pool.py
+"""
+import sys
+import threading
+import time
+import unittest
+from types import ModuleType
+from unittest.mock import Mock, patch
+
+from pipeline.hospital_scrapers import browser_pool
+from pipeline.hospital_scrapers.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    """Stands in for a selenium WebDriver."""
+    
+    def __init__(self):
+        self.alive = True
+        self.visited = []
+        self.quit_called = False
+    
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return self.visited[-1] if self.visited else "data:,"
+    
+    def get(self, url):
+        self.visited.append(url)
+    
+    def delete_all_cookies(self):
+        pass
+    
+    def quit(self):
+        self.quit_called = True
+
+
+class TestBrowserPool(unittest.TestCase):
+    """Browsers are reused, capped, health-checked and recycled."""
+    
+    def test_reuses_warm_browser(self):
+        pool = BrowserPool(max_size=2, launch=FakeDriver)
+        
+        for url in ["https://a.example", "https://b.example", "https://c.example"]:
+            with pool.browser() as driver:
+                driver.get(url)
+        
+        self.assertEqual(pool.launched, 1)
+        # Parked on about:blank between checkouts
+        self.assertEqual(driver.visited[-1], "about:blank")
+    
+    def test_concurrent_checkouts_capped_at_max_size(self):
+        pool = BrowserPool(max_size=2, launch=FakeDriver)
+        in_use, peak = [0], [0]
+        lock = threading.Lock()
+        
+        def scrape():
+            with pool.browser():
+                with lock:
+                    in_use[0] += 1
+                    peak[0] = max(peak[0], in_use[0])
+                time.sleep(0.05)
+                with lock:
+                    in_use[0] -= 1
+        
+        threads = [threading.Thread(target=scrape) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(pool.launched, 2)
+    
+    def test_dead_browser_is_replaced(self):
+        pool = BrowserPool(max_size=1, launch=FakeDriver)
+        with pool.browser() as first:
+            pass
+        first.alive = False
+        
+        with pool.browser() as second:
+            pass
+        
+        self.assertIsNot(first, second)
+        self.assertTrue(first.quit_called)
+        self.assertEqual(pool.launched, 2)
+    
+    def test_browser_that_raised_is_discarded(self):
+        pool = BrowserPool(max_size=1, launch=FakeDriver)
+        with self.assertRaises(RuntimeError):
+            with pool.browser() as driver:
+                raise RuntimeError("page crashed")
+        
+        self.assertTrue(driver.quit_called)
+        with pool.browser():
+            pass
+        self.assertEqual(pool.launched, 2)
+    
+    def test_restarted_after_max_pages(self):
+        pool = BrowserPool(max_size=1, launch=FakeDriver, max_pages=2)
+        for _ in range(5):
+            with pool.browser():
+                pass
+        self.assertEqual(pool.launched, 3)
+    
+    def test_close_all_quits_idle_browsers(self):
+        pool = BrowserPool(max_size=2, launch=FakeDriver)
+        with pool.browser() as driver:
+            pass
+        pool.close_all()
+        self.assertTrue(driver.quit_called)
+
+
+class TestChromedriverPath(unittest.TestCase):
+    """The driver binary is resolved once per process."""
+    
+    def setUp(self):
+        browser_pool.chromedriver_path.cache_clear()
+    
+    def tearDown(self):
+        browser_pool.chromedriver_path.cache_clear()
+    
+    def test_resolved_once(self):
+        manager = Mock()
+        manager.return_value.install.return_value = "/opt/chromedriver"
+        fake = ModuleType("webdriver_manager.chrome")
+        fake.ChromeDriverManager = manager
+        
+        with patch.object(browser_pool, "SELENIUM_DRIVER_PATH", None), \
+                patch.dict(sys.modules, {"webdriver_manager": ModuleType("webdriver_manager"),
+                                         "webdriver_manager.chrome": fake}):
+            paths = [browser_pool.chromedriver_path() for _ in range(3)]
+        
+        self.assertEqual(paths, ["/opt/chromedriver"] * 3)
+        self.assertEqual(manager.return_value.install.call_count, 1)
+    
+    def test_configured_path_skips_webdriver_manager(self):
+        with patch.object(browser_pool, "SELENIUM_DRIVER_PATH", "/usr/bin/chromedriver"):
+            self.assertEqual(browser_pool.chromedriver_path(), "/usr/bin/chromedriver")
+
+
+if __name__ == "__main__":
+    unittest.main()
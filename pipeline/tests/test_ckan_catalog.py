@@ -0,0 +1,109 @@
+"""
+Unit tests for the local CKAN resource catalog.
+
+Run with: pytest pipeline/tests/test_ckan_catalog.py
+"""
+import io
+import json
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import Mock
+
+from pipeline.ckan_catalog import ResourceCatalog
+
+
+def package(name, resources):
+    return {"name": name, "resources": resources}
+
+
+class TestResourceCatalog(unittest.TestCase):
+    """Test catalog lookups, TTL and bulk refresh."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "catalog.json"
+        self.session = Mock()
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _response(self, payload):
+        response = Mock()
+        response.json.return_value = payload
+        return response
+    
+    def test_warm_catalog_makes_no_requests(self):
+        """A fresh catalog answers from disk without touching the network."""
+        self.path.write_text(json.dumps({
+            "refreshed_at": time.time(),
+            "datasets": {
+                "summary-of-cases-in-schools": {
+                    "resource_id": "abc",
+                    "format": "CSV",
+                    "last_modified": "2021-06-30T14:05:12.123456",
+                    "fields": [{"id": "school", "type": "text"}]
+                }
+            }
+        }))
+        catalog = ResourceCatalog(path=self.path, session=self.session)
+        
+        self.assertEqual(catalog.resource_id("summary-of-cases-in-schools"), "abc")
+        self.assertEqual(
+            catalog.last_modified("summary-of-cases-in-schools"),
+            datetime(2021, 6, 30, 14, 5, 12, 123456)
+        )
+        self.session.get.assert_not_called()
+    
+    def test_stale_catalog_refreshes_in_bulk(self):
+        """A stale catalog refreshes every dataset with one package_search."""
+        search = self._response({"success": True, "result": {"results": [
+            package("summary-of-cases-in-schools", [
+                {"id": "json-id", "format": "JSON"},
+                {"id": "csv-id", "format": "csv", "last_modified": "2021-07-01T00:00:00",
+                 "datastore_active": True}
+            ]),
+            package("ontario-covid-19-outbreaks-data", [
+                {"id": "outbreak-id", "format": "CSV", "datastore_active": False}
+            ])
+        ]}})
+        fields = self._response({"success": True, "result": {"fields": [{"id": "_id", "type": "int"}],
+                                                              "total": 95}})
+        self.session.get.side_effect = [search, fields]
+        
+        catalog = ResourceCatalog(path=self.path, ttl_hours=1, session=self.session)
+        
+        self.assertEqual(catalog.resource_id("summary-of-cases-in-schools"), "csv-id")
+        self.assertEqual(catalog.resource_id("ontario-covid-19-outbreaks-data"), "outbreak-id")
+        self.assertEqual(catalog.fields("summary-of-cases-in-schools"), [{"id": "_id", "type": "int"}])
+        self.assertEqual(catalog.row_count("summary-of-cases-in-schools"), 95)
+        
+        # One package_search plus one field lookup for the datastore resource
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertTrue(self.path.exists())
+    
+    def test_failed_refresh_backs_off_until_next_ttl(self):
+        """Stale entries are served without retrying the network after a failed refresh."""
+        self.path.write_text(json.dumps({
+            "refreshed_at": time.time() - 7200,
+            "datasets": {"summary-of-cases-in-schools": {"resource_id": "abc", "format": "CSV"}}
+        }))
+        self.session.get.side_effect = ConnectionError("CKAN is down")
+        catalog = ResourceCatalog(path=self.path, ttl_hours=1, session=self.session)
+        
+        with redirect_stdout(io.StringIO()):
+            for _ in range(3):
+                self.assertEqual(catalog.resource_id("summary-of-cases-in-schools"), "abc")
+            self.assertEqual(self.session.get.call_count, 1)
+            
+            # Once another TTL has passed the refresh is retried
+            catalog._refresh_failed_at -= 3601
+            catalog.resource_id("summary-of-cases-in-schools")
+        self.assertEqual(self.session.get.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Unit tests for declarative column mappings.
+
+Run with: pytest pipeline/tests/test_column_mapping.py
+"""
+import json
+import unittest
+from datetime import datetime
+
+from pipeline.column_mapping import apply_mapping
+
+
+class TestApplyMapping(unittest.TestCase):
+    """Test rule compilation against per-record semantics."""
+    
+    RECORDS = [
+        {"_id": 1, "outbreak_id": "OB-1", "cases_total": "", "resident_cases": "2", "staff_cases": 1.0},
+        {"_id": 2, "cases_total": "5", "resident_cases": None},
+        {"_id": 3, "outbreak_id": "", "staff_cases": "n/a", "began": "2021-03-01"}
+    ]
+    
+    def test_coalesce_and_types(self):
+        """Source lists behave like `a or b`; str/int conversions match the old helpers."""
+        df = apply_mapping(self.RECORDS, {
+            "OUTBREAK_ID": {"source": ["outbreak_id", "_id"], "type": "str"},
+            "RESIDENT_CASES": {"source": "resident_cases", "type": "int"},
+            "STAFF_CASES": {"source": "staff_cases", "type": "int"},
+            "BEGAN": {"source": "began", "type": "date"}
+        })
+        
+        self.assertEqual(list(df.columns), ["OUTBREAK_ID", "RESIDENT_CASES", "STAFF_CASES", "BEGAN"])
+        self.assertEqual(df["OUTBREAK_ID"].tolist(), ["OB-1", "2", "3"])
+        self.assertEqual(df["RESIDENT_CASES"].tolist(), [2, 0, 0])
+        self.assertEqual(df["STAFF_CASES"].tolist(), [1, 0, 0])
+        self.assertEqual(df["BEGAN"].tolist(), [None, None, "2021-03-01"])
+    
+    def test_fallback_sum(self):
+        """`cases_total or resident + staff`."""
+        df = apply_mapping(self.RECORDS, {
+            "TOTAL_CASES": {
+                "source": "cases_total", "type": "int",
+                "fallback": {"sum": ["resident_cases", "staff_cases"]}
+            }
+        })
+        self.assertEqual(df["TOTAL_CASES"].tolist(), [3, 5, 0])
+    
+    def test_value_json_and_apply(self):
+        """Constants are formatted once; JSON keeps each record's own keys."""
+        df = apply_mapping(self.RECORDS, {
+            "SOURCE_FILE": {"value": "ckan_{now:%Y%m%d}"},
+            "HAS_ID": {"source": "outbreak_id", "apply": lambda s: s.notna()},
+            "RAW_JSON": {"type": "json"}
+        }, now=datetime(2025, 1, 2))
+        
+        self.assertEqual(set(df["SOURCE_FILE"]), {"ckan_20250102"})
+        self.assertEqual(df["HAS_ID"].tolist(), [True, False, True])
+        self.assertEqual(json.loads(df["RAW_JSON"][1]), self.RECORDS[1])
+    
+    def test_empty_records(self):
+        df = apply_mapping([], {"A": {"source": "a"}, "B": {"type": "json"}})
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), ["A", "B"])
+    
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            apply_mapping(self.RECORDS, {"A": {"source": "a", "type": "decimal"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
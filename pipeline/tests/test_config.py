@@ -5,6 +5,7 @@ Run with: pytest pipeline/tests/test_config.py
 """
 import unittest
 from pathlib import Path
+from unittest.mock import Mock
 
 from pipeline.config import (
     SNOWFLAKE_ACCOUNT,
@@ -12,7 +13,8 @@ from pipeline.config import (
     SCHEMA_RAW,
     SCHEMA_MARTS_SURVEILLANCE,
     get_private_key_bytes,
-    PRIVATE_KEY_FILE
+    PRIVATE_KEY_FILE,
+    SnowflakeConnectionPool
 )
 
 
@@ -46,6 +48,47 @@ class TestConfig(unittest.TestCase):
         self.assertGreater(len(key_bytes), 0)
 
 
+class TestSnowflakeConnectionPool(unittest.TestCase):
+    """Test session reuse and health checks in the connection pool."""
+    
+    def _connect(self):
+        conn = Mock()
+        conn.is_closed.return_value = False
+        self.connections.append(conn)
+        return conn
+    
+    def setUp(self):
+        self.connections = []
+        self.pool = SnowflakeConnectionPool(max_size=2, connect=self._connect)
+    
+    def test_released_session_is_reused(self):
+        """A checked-in session is handed to the next caller."""
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        
+        self.assertIs(self.pool.acquire(), conn)
+        self.assertEqual(self.pool.opened, 1)
+    
+    def test_closed_session_is_replaced(self):
+        """Sessions that died while idle are dropped."""
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        conn.is_closed.return_value = True
+        
+        self.assertIsNot(self.pool.acquire(), conn)
+        self.assertEqual(self.pool.opened, 2)
+    
+    def test_stale_session_is_pinged(self):
+        """Sessions idle past the threshold must answer SELECT 1."""
+        self.pool.check_after_seconds = 0
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        conn.cursor.return_value.execute.side_effect = Exception("Session expired")
+        
+        self.assertIsNot(self.pool.acquire(), conn)
+        conn.close.assert_called_once()
+
+
 if __name__ == "__main__":
     unittest.main()
 
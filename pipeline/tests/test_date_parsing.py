@@ -0,0 +1,43 @@
+"""
+Unit tests for column-wise CKAN date parsing.
+
+Run with: pytest pipeline/tests/test_date_parsing.py
+"""
+import unittest
+
+import pandas as pd
+
+from pipeline.date_parsing import format_dates, parse_dates
+
+
+class TestDateParsing(unittest.TestCase):
+    """Test epoch and string detection."""
+    
+    def test_epoch_units(self):
+        """Seconds, milliseconds and nanoseconds are told apart by magnitude."""
+        values = [1631491200, "1631491200000", 1631491200 * 10**9]
+        self.assertEqual(format_dates(values), ["2021-09-13"] * 3)
+    
+    def test_string_formats(self):
+        """ISO dates and timestamps parse; unknown strings become None."""
+        values = ["2021-09-13", "2021-09-14T08:30:00", "not a date"]
+        self.assertEqual(format_dates(values), ["2021-09-13", "2021-09-14", None])
+    
+    def test_format_detected_per_column(self):
+        """Month-first columns are recognised when day-first can't parse them."""
+        self.assertEqual(format_dates(["09/13/2021", "01/02/2021"]), ["2021-09-13", "2021-01-02"])
+        self.assertEqual(format_dates(["13/09/2021", "01/02/2021"]), ["2021-09-13", "2021-02-01"])
+    
+    def test_missing_values(self):
+        self.assertEqual(format_dates([None, "", float("nan")]), [None, None, None])
+        self.assertEqual(format_dates([]), [])
+    
+    def test_preserves_index(self):
+        series = pd.Series(["2021-09-13", None, "2021-09-13"], index=[10, 20, 30])
+        parsed = parse_dates(series)
+        self.assertEqual(list(parsed.index), [10, 20, 30])
+        self.assertTrue(pd.isna(parsed[20]))
+
+
+if __name__ == "__main__":
+    unittest.main()
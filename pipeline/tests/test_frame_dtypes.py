@@ -0,0 +1,54 @@
+"""
+Unit tests for compact DataFrame dtypes.
+
+Run with: pytest pipeline/tests/test_frame_dtypes.py
+"""
+import unittest
+
+import pandas as pd
+
+from pipeline.frame_dtypes import concat_frames, optimize_dtypes
+
+
+class TestOptimizeDtypes(unittest.TestCase):
+    """Test conversions applied before frames reach the loader."""
+    
+    def make_frame(self, hospitals: list[str]) -> pd.DataFrame:
+        return pd.DataFrame({
+            "HOSPITAL_NAME": pd.Series(hospitals, dtype=object),
+            "SOURCE_UPDATED": pd.Series([f"2025-01-0{i + 1}" for i in range(len(hospitals))], dtype=object),
+            "WAIT_TOTAL_MINUTES": list(range(len(hospitals))),
+            "RAW_JSON": pd.Series([None] * len(hospitals), dtype=object)
+        })
+    
+    def test_categorical_and_string_columns(self):
+        stats = {}
+        df = optimize_dtypes(self.make_frame(["Milton", "Oakville", "Milton"]), "ED_WAIT_TIMES", stats)
+        
+        self.assertIsInstance(df["HOSPITAL_NAME"].dtype, pd.CategoricalDtype)
+        self.assertEqual(list(df["HOSPITAL_NAME"].cat.categories), ["Milton", "Oakville"])
+        self.assertIsInstance(df["SOURCE_UPDATED"].dtype, pd.StringDtype)
+        self.assertEqual(df["WAIT_TOTAL_MINUTES"].dtype, "int64")
+        self.assertTrue(df["RAW_JSON"].isna().all())
+        self.assertGreater(stats["before"], 0)
+        self.assertGreater(stats["after"], 0)
+    
+    def test_mixed_object_columns_are_left_alone(self):
+        df = pd.DataFrame({"VALUE": pd.Series(["a", 1, None], dtype=object)})
+        self.assertEqual(optimize_dtypes(df, "ED_WAIT_TIMES")["VALUE"].dtype, object)
+    
+    def test_concat_keeps_categories(self):
+        """Chunks with different categories still concatenate to a categorical."""
+        chunks = [
+            optimize_dtypes(self.make_frame(["Milton"]), "ED_WAIT_TIMES"),
+            optimize_dtypes(self.make_frame(["Oakville", "Georgetown"]), "ED_WAIT_TIMES")
+        ]
+        df = concat_frames(chunks)
+        
+        self.assertIsInstance(df["HOSPITAL_NAME"].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["HOSPITAL_NAME"].tolist(), ["Milton", "Oakville", "Georgetown"])
+        self.assertEqual(len(df), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
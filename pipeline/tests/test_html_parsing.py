@@ -0,0 +1,78 @@
+"""
+Unit tests for the HTML parsing backend and the scrapers' precompiled patterns.
+
+Run with: pytest pipeline/tests/test_html_parsing.py
+"""
+import unittest
+from types import SimpleNamespace
+
+from bs4 import SoupStrainer
+
+from pipeline.hospital_scrapers.hamilton import HamiltonHealthScraper
+from pipeline.hospital_scrapers.niagara import NiagaraHealthScraper
+from pipeline.hospital_scrapers.uhn import UHNScraper
+from pipeline.html_parsing import make_soup
+
+PAGE = """
+<html><body>
+<nav><a href="/">Greater Niagara General (home)</a></nav>
+<main>
+  <div><h3>Greater Niagara General</h3><p>2 hours 15 minutes</p></div>
+  <div><h3>Fort Erie Site</h3><p>45 minutes</p></div>
+</main>
+<footer>Welland Hospital parking: 3 hours 0 minutes free</footer>
+</body></html>
+"""
+
+
+class TestMakeSoup(unittest.TestCase):
+    """Only the container's subtree is built, with a whole-page fallback."""
+    
+    def test_builds_only_container(self):
+        soup = make_soup(PAGE, SoupStrainer("main"))
+        text = soup.get_text()
+        
+        self.assertIn("Fort Erie Site", text)
+        self.assertNotIn("parking", text)
+        self.assertIsNone(soup.find("nav"))
+    
+    def test_missing_container_parses_whole_page(self):
+        soup = make_soup(PAGE, SoupStrainer(id="no-such-element"))
+        self.assertIn("parking", soup.get_text())
+    
+    def test_explicit_parser(self):
+        soup = make_soup("<p>Hi</p>", parser="html.parser")
+        self.assertEqual(soup.p.get_text(), "Hi")
+
+
+class TestScraperParsing(unittest.TestCase):
+    """Scrapers parse their container with precompiled patterns."""
+    
+    def test_extract_time(self):
+        scraper = UHNScraper()
+        self.assertEqual(scraper.extract_time("Wait: 2 hours 30 minutes"), (2, 30))
+        self.assertEqual(scraper.extract_time("2h 30m"), (2, 30))
+        self.assertEqual(scraper.extract_time("About 3 HOURS"), (3, 0))
+        self.assertEqual(scraper.extract_time("45 min"), (0, 45))
+        self.assertEqual(scraper.extract_time("no estimate"), (0, 0))
+    
+    def test_niagara_ignores_text_outside_container(self):
+        records = NiagaraHealthScraper().parse(SimpleNamespace(text=PAGE))
+        
+        self.assertEqual(
+            [(r["hospital_name"], r["wait_hours"], r["wait_minutes"]) for r in records],
+            [("Greater Niagara General", 2, 15), ("Fort Erie Site", 0, 45)]
+        )
+    
+    def test_hamilton_html_only_page(self):
+        # No "{" in the page: the HTML branch must not depend on the JSON branch
+        page = "<html><body><p>Juravinski Hospital: 2h 5m</p></body></html>"
+        records = HamiltonHealthScraper().parse(SimpleNamespace(text=page))
+        
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["hospital_name"], "Juravinski Hospital")
+        self.assertEqual(records[0]["wait_total_minutes"], 125)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Unit tests for the on-disk HTTP cache.
+
+Run with: pytest pipeline/tests/test_http_cache.py
+"""
+import io
+import tempfile
+import time
+import unittest
+
+import requests
+from requests.adapters import BaseAdapter
+
+from pipeline.http_cache import CachedSession, HTTPCache
+
+
+class FakeServer(BaseAdapter):
+    """Transport adapter serving one body with an ETag, honouring If-None-Match."""
+    
+    def __init__(self, body: bytes, etag: str = '"v1"'):
+        super().__init__()
+        self.body = body
+        self.etag = etag
+        self.status_codes = []
+    
+    def send(self, request, stream=False, **kwargs):
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.headers["ETag"] = self.etag
+        response.headers["Content-Type"] = "text/csv"
+        
+        if request.headers.get("If-None-Match") == self.etag:
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            if stream:
+                response.raw = io.BytesIO(self.body)
+            else:
+                response._content = self.body
+        self.status_codes.append(response.status_code)
+        return response
+    
+    def close(self):
+        pass
+
+
+class TestHTTPCache(unittest.TestCase):
+    """Test conditional revalidation, replay and eviction."""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HTTPCache(cache_dir=self.tmp.name)
+        self.server = FakeServer(b"a,b\n1,2\n")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def _session(self):
+        session = CachedSession(cache=self.cache)
+        session.mount("https://", self.server)
+        return session
+    
+    def test_revalidates_and_replays_body(self):
+        """Second GET sends If-None-Match and serves the 304 from disk."""
+        self._session().get("https://example.org/data.csv")
+        response = self._session().get("https://example.org/data.csv")
+        
+        self.assertEqual(self.server.status_codes, [200, 304])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.text, "a,b\n1,2\n")
+        
+        stats = self.cache.stats()["example.org"]
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["bytes_saved"], len(self.server.body))
+    
+    def test_unchanged_only_after_processed(self):
+        """A 304 short-circuits only once the body has been marked processed."""
+        first = self._session()
+        first.get("https://example.org/data.csv")
+        
+        second = self._session()
+        response = second.get("https://example.org/data.csv")
+        self.assertFalse(second.is_unchanged(response))
+        
+        second.mark_processed()
+        response = self._session().get("https://example.org/data.csv")
+        self.assertTrue(self._session().is_unchanged(response))
+    
+    def test_processed_is_per_consumer(self):
+        """One ingestor loading a URL doesn't make another skip it."""
+        multi = CachedSession(cache=self.cache, consumer="multi_network_ed")
+        multi.mount("https://", self.server)
+        multi.get("https://example.org/data.csv")
+        multi.mark_processed()
+        
+        single = CachedSession(cache=self.cache, consumer="ed_wait_times")
+        single.mount("https://", self.server)
+        response = single.get("https://example.org/data.csv")
+        self.assertFalse(single.is_unchanged(response))
+        self.assertTrue(multi.is_unchanged(response))
+    
+    def test_streamed_body_is_cached(self):
+        """Streamed responses are written through to disk and still readable."""
+        response = self._session().get("https://example.org/data.csv", stream=True)
+        self.assertEqual(response.raw.read(), b"a,b\n1,2\n")
+        response.raw.close()
+        
+        response = self._session().get("https://example.org/data.csv", stream=True)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.raw.read(), b"a,b\n1,2\n")
+        response.raw.close()
+    
+    def test_prune_evicts_old_and_oversized(self):
+        """Entries past max age go first, then least recently used."""
+        session = self._session()
+        for name in ["old", "a", "b"]:
+            session.get(f"https://example.org/{name}.csv")
+        
+        entries = dict(self.cache.entries())
+        for key, entry in entries.items():
+            if entry["url"].endswith("old.csv"):
+                entry["stored_at"] = time.time() - 60 * 86400
+            if entry["url"].endswith("a.csv"):
+                entry["last_used"] = 0
+            self.cache._write_meta(key, entry)
+        
+        self.cache.max_bytes = len(self.server.body)
+        self.assertEqual(self.cache.prune(), 2)
+        remaining = [e["url"] for _, e in self.cache.entries()]
+        self.assertEqual(remaining, ["https://example.org/b.csv"])
+
+
+if __name__ == "__main__":
+    unittest.main()
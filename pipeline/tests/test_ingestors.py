@@ -3,8 +3,17 @@ Unit tests for data ingestors.
 
 Run with: pytest pipeline/tests/
 """
+import io
+import json
+import random
+import tempfile
+import time
+import sqlite3
 import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
 from datetime import datetime
+from pathlib import Path
 from unittest.mock import Mock, patch
 
 import pandas as pd
@@ -12,7 +21,13 @@ import pandas as pd
 # Test imports work
 from pipeline.config import SNOWFLAKE_ACCOUNT, SNOWFLAKE_USER
 from pipeline.ingest_wastewater import WastewaterIngestor
+from pipeline.ingest_wastewater_trends import WastewaterTrendIngestor
 from pipeline.ingest_ed_wait_times import EDWaitTimesIngestor
+from pipeline.ingest_outbreaks import OutbreaksIngestor
+from pipeline.ingest_school_cases import SchoolCasesIngestor
+from pipeline.http_cache import CachedSession, HTTPCache
+from pipeline.tests.test_http_cache import FakeServer
+from pipeline.watermarks import LocalStateStore
 
 
 class TestWastewaterIngestor(unittest.TestCase):
@@ -75,6 +90,203 @@ class TestWastewaterIngestor(unittest.TestCase):
         # Province filtering happens at ingestion, not transform
         result = self.ingestor.transform(mock_data)
         self.assertEqual(len(result), 2)  # Both rows transformed
+    
+    def test_transform_missing_values(self):
+        """Missing measurements stay null and unknown virus codes pass through."""
+        mock_data = pd.DataFrame([
+            {"province": "Ontario", "EpiYear": 2025, "EpiWeek": 51, "measureid": "covN2", "w_avg": None,
+             "Location": "Toronto", "weekstart": None, "min": 1.5, "max": None, "pruid": 35},
+            {"province": "Ontario", "EpiYear": 2025, "EpiWeek": 52, "measureid": "hMPV", "w_avg": 7.0,
+             "Location": "Ottawa", "weekstart": "2025-12-21", "min": None, "max": 9.0, "pruid": 35}
+        ])
+        
+        result = self.ingestor.transform(mock_data)
+        
+        self.assertEqual(result["VIRUS_NAME"].tolist(), ["COVID-19", "hMPV"])
+        self.assertTrue(pd.isna(result.iloc[0]["VIRAL_LOAD_AVG"]))
+        self.assertTrue(pd.isna(result.iloc[0]["WEEK_START"]))
+        self.assertEqual(result.iloc[1]["WEEK_START"], "2025-12-21")
+        self.assertEqual(result.iloc[0]["COUNTRY"], "Canada")
+        self.assertTrue(pd.isna(result.iloc[0]["POPULATION_COVERAGE"]))
+        # Compact RAW_JSON keeps only the fields without a typed column
+        self.assertEqual(json.loads(result.iloc[1]["RAW_JSON"]), {"pruid": 35})
+    
+    def _fake_download(self, csv_body: str):
+        response = SimpleNamespace(
+            iter_content=lambda chunk_size: iter([csv_body.encode()]),
+            raise_for_status=lambda: None,
+            close=lambda: None
+        )
+        self.ingestor.session.get = Mock(return_value=response)
+    
+    def test_fetch_filters_each_chunk(self):
+        """Province and week filters run per CSV chunk; unused columns are skipped."""
+        csv_body = "Location,province,EpiYear,EpiWeek,measureid,w_avg,unused\n" + "".join(
+            f"Site {i},{'Ontario' if i % 2 else 'Quebec'},2025,{i + 1},covN2,{i}.5,x\n"
+            for i in range(10)
+        )
+        self._fake_download(csv_body)
+        self.ingestor.csv_chunk_rows = 3
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            self.ingestor.state = LocalStateStore(Path(tmp) / "state.json")
+            with patch.object(self.ingestor, "_query_max_week", return_value=(2025, 4)):
+                df = self.ingestor.fetch_data()
+        
+        self.assertTrue(self.ingestor.session.get.call_args.kwargs["stream"])
+        self.assertEqual(df["EpiWeek"].tolist(), [6, 8, 10])
+        self.assertEqual(set(df["province"]), {"Ontario"})
+        self.assertNotIn("unused", df.columns)
+        self.assertEqual((self.ingestor.rows_read, self.ingestor.rows_in_province), (10, 5))
+    
+    def test_local_state_skips_snowflake_and_unchanged_files(self):
+        """A reconciled local watermark avoids the MAX query; the same file ends the run."""
+        csv_body = "province,EpiYear,EpiWeek,measureid\nOntario,2025,5,covN2\nOntario,2025,7,covN2\n"
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            self.ingestor.state = LocalStateStore(Path(tmp) / "state.json")
+            self.ingestor.state.update(self.ingestor.state_key, watermark=[2025, 5],
+                                       reconciled_at=time.time())
+            
+            with patch.object(self.ingestor, "_query_max_week") as query:
+                self._fake_download(csv_body)
+                df = self.ingestor.fetch_data()
+                self.ingestor.save_state(df)
+                
+                self.assertEqual(df["EpiWeek"].tolist(), [7])
+                self.assertEqual(self.ingestor.state.get(self.ingestor.state_key)["watermark"], [2025, 7])
+                
+                # Same bytes again: no parsing, no watermark lookup
+                self._fake_download(csv_body)
+                self.assertTrue(self.ingestor.fetch_data().empty)
+                self.assertTrue(self.ingestor.source_unchanged)
+                query.assert_not_called()
+
+
+    def test_max_week_is_per_province(self):
+        """After a national backfill, each province's watermark is its own latest week."""
+        db = sqlite3.connect(":memory:")
+        db.execute(f"CREATE TABLE {WastewaterIngestor.TABLE} (province TEXT, epi_year INT, epi_week INT)")
+        db.executemany(f"INSERT INTO {WastewaterIngestor.TABLE} VALUES (?, ?, ?)", [
+            ("Ontario", 2024, 52), ("Ontario", 2025, 3),
+            ("Alberta", 2025, 3), ("Alberta", 2025, 9), ("Alberta", 2026, 1)
+        ])
+        
+        class Cursor:
+            def execute(self, sql, params=()):
+                if not sql.startswith("USE "):
+                    self.rows = db.execute(sql.replace("%s", "?"), params).fetchall()
+            
+            def fetchone(self):
+                return self.rows[0]
+            
+            def close(self):
+                pass
+        
+        connection = Mock()
+        connection.__enter__ = Mock(return_value=Mock(cursor=Cursor))
+        connection.__exit__ = Mock(return_value=False)
+        
+        with patch.dict(WastewaterIngestor._query_max_week.__globals__,
+                        snowflake_connection=Mock(return_value=connection)):
+            self.assertEqual(WastewaterIngestor("Ontario")._query_max_week(), (2025, 3))
+            self.assertEqual(WastewaterIngestor("Alberta")._query_max_week(), (2026, 1))
+            self.assertEqual(WastewaterIngestor(None)._query_max_week(), (2026, 1))
+            self.assertIsNone(WastewaterIngestor("Yukon")._query_max_week())
+    
+    def test_parses_cached_body_and_marks_unchanged_content(self):
+        """The HTTP cache's copy is parsed in place; an identical re-publish is marked processed."""
+        csv_body = b"province,EpiYear,EpiWeek,measureid\nOntario,2025,5,covN2\n"
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            server = FakeServer(csv_body)
+            self.ingestor.session = CachedSession(cache=HTTPCache(Path(tmp) / "http"),
+                                                  consumer=self.ingestor.state_key)
+            self.ingestor.session.mount("https://", server)
+            self.ingestor.state = LocalStateStore(Path(tmp) / "state.json")
+            
+            with patch.object(self.ingestor, "_query_max_week", return_value=None), \
+                    patch("ingest_wastewater.tempfile.TemporaryFile") as spool:
+                df = self.ingestor.fetch_data()
+                self.ingestor.save_state(df)
+                
+                # Re-published under a new ETag with the same bytes
+                server.etag = '"v2"'
+                self.assertTrue(self.ingestor.fetch_data().empty)
+                self.assertTrue(self.ingestor.source_unchanged)
+                
+                # Now a 304 ends the run before any download or hashing
+                self.ingestor.source_unchanged = False
+                with patch("ingest_wastewater._file_hash") as file_hash:
+                    self.assertTrue(self.ingestor.fetch_data().empty)
+                file_hash.assert_not_called()
+            
+            spool.assert_not_called()
+            self.assertEqual(df["EpiWeek"].tolist(), [5])
+            self.assertEqual(server.status_codes, [200, 200, 304])
+
+
+class TestWastewaterTrendIngestor(unittest.TestCase):
+    """Test the precomputed trend feed (shares the wastewater download path)."""
+    
+    def setUp(self):
+        self.ingestor = WastewaterTrendIngestor(province_filter="Ontario")
+    
+    def test_separate_table_and_state(self):
+        self.assertEqual(self.ingestor.DATA_URL, WastewaterIngestor.TREND_URL)
+        self.assertEqual(self.ingestor.TABLE, "WASTEWATER_TRENDS")
+        self.assertNotEqual(self.ingestor.state_key, WastewaterIngestor().state_key)
+    
+    def fetch(self, csv_body: str) -> pd.DataFrame:
+        response = SimpleNamespace(
+            iter_content=lambda chunk_size: iter([csv_body.encode()]),
+            raise_for_status=lambda: None,
+            close=lambda: None
+        )
+        self.ingestor.session.get = Mock(return_value=response)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            self.ingestor.state = LocalStateStore(Path(tmp) / "state.json")
+            with patch.object(self.ingestor, "_query_max_week", return_value=None):
+                return self.ingestor.fetch_data()
+    
+    def test_fetch_and_transform(self):
+        """All trend columns are read; rows map to RAW.WASTEWATER_TRENDS columns."""
+        df = self.fetch(
+            "Location,province,EpiYear,EpiWeek,measureid,w_avg,pct_change,trend\n"
+            "Toronto,Ontario,2025,48,covN2,120.5,12.5,Increase\n"
+            "Montreal,Quebec,2025,48,covN2,80.0,-3.0,Decrease\n"
+            "Ottawa,Ontario,2025,49,rsv,,,\n"
+        )
+        
+        self.assertIn("trend", df.columns)
+        result = self.ingestor.transform(df)
+        
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result["LOCATION"].tolist(), ["Toronto", "Ottawa"])
+        self.assertEqual(result["VIRUS_NAME"].tolist(), ["COVID-19", "RSV"])
+        self.assertEqual(result["EPI_WEEK"].tolist(), [48, 49])
+        self.assertEqual(result.iloc[0]["WEEK_OVER_WEEK_PCT"], 12.5)
+        self.assertTrue(pd.isna(result.iloc[1]["VIRAL_LOAD_AVG"]))
+        self.assertEqual(json.loads(result.iloc[0]["RAW_JSON"])["trend"], "Increase")
+    
+    def test_alternative_headers_are_filtered(self):
+        """Aliased headers are renamed before the province filter runs."""
+        df = self.fetch(
+            "location,Province,epi_year,epi_week,measure,viral_load,percent_change\n"
+            "Toronto,Ontario,2025,48,covN2,120.5,12.5\n"
+            "Montreal,Quebec,2025,48,covN2,80.0,-3.0\n"
+        )
+        result = self.ingestor.transform(df)
+        
+        self.assertEqual(result["PROVINCE"].tolist(), ["Ontario"])
+        self.assertEqual(result["WEEK_OVER_WEEK_PCT"].tolist(), [12.5])
+    
+    def test_missing_columns_fail(self):
+        """A file without the filter columns is not loaded unfiltered."""
+        with self.assertRaisesRegex(ValueError, "province"):
+            self.fetch("Location,region,EpiYear,EpiWeek,measureid,w_avg,pct_change\n"
+                       "Montreal,Quebec,2025,48,covN2,80.0,-3.0\n")
 
 
 class TestEDWaitTimesIngestor(unittest.TestCase):
@@ -153,6 +365,259 @@ class TestEDWaitTimesIngestor(unittest.TestCase):
         self.assertEqual(georgetown["wait_total_minutes"], 108)
 
 
+class TestCKANFetch(unittest.TestCase):
+    """Test CKAN pagination in BaseIngestor.fetch_from_api."""
+    
+    def _fake_datastore(self, ingestor, total):
+        """Serve pages out of order with random latency."""
+        ingestor._resource_id = "test-resource"
+        ingestor.catalog = Mock()
+        ingestor.catalog.get.return_value = {"datastore_active": True}
+        
+        def fake_page(offset, limit):
+            time.sleep(random.uniform(0, 0.01))
+            return {
+                "total": total,
+                "records": [{"_id": i} for i in range(offset, min(offset + limit, total))]
+            }
+        
+        ingestor._fetch_page = fake_page
+    
+    def test_sequential_fetch(self):
+        """Sequential mode walks every page."""
+        ingestor = SchoolCasesIngestor(fetch_concurrency=1)
+        self._fake_datastore(ingestor, total=95)
+        
+        records = ingestor.fetch_from_api(limit=10)
+        self.assertEqual([r["_id"] for r in records], list(range(95)))
+    
+    def test_concurrent_fetch_preserves_offset_order(self):
+        """Concurrent pages are reassembled in offset order."""
+        ingestor = SchoolCasesIngestor(fetch_concurrency=4)
+        self._fake_datastore(ingestor, total=95)
+        
+        records = ingestor.fetch_from_api(limit=10)
+        self.assertEqual([r["_id"] for r in records], list(range(95)))
+    
+    def test_streaming_run_loads_in_chunks(self):
+        """Streaming mode transforms per page and loads bounded chunks."""
+        ingestor = SchoolCasesIngestor(fetch_concurrency=2)
+        ingestor.page_size = 10
+        ingestor.load_chunk_rows = 30
+        self._fake_datastore(ingestor, total=95)
+        
+        loaded_chunks = []
+        ingestor.load_to_snowflake = lambda df: loaded_chunks.append(len(df)) or len(df)
+        ingestor.log_ingestion = Mock()
+        
+        result = ingestor.run(stream=True)
+        
+        self.assertEqual(result["status"], "SUCCESS")
+        self.assertEqual(result["records_fetched"], 95)
+        self.assertEqual(result["records_inserted"], 95)
+        self.assertEqual(loaded_chunks, [30, 30, 30, 5])
+    
+    def test_large_resource_streams_csv_dump(self):
+        """Resources over the threshold are read from the CSV dump in chunks."""
+        ingestor = SchoolCasesIngestor()
+        ingestor.dump_threshold_rows = 50
+        ingestor.dump_chunk_rows = 40
+        self._fake_datastore(ingestor, total=95)
+        
+        csv_body = "_id,school,confirmed_student_cases\n" + "".join(
+            f"{i},School {i},{'' if i % 2 else i}\n" for i in range(95)
+        )
+        response = SimpleNamespace(
+            raw=io.BytesIO(csv_body.encode()),
+            raise_for_status=lambda: None,
+            close=lambda: None
+        )
+        ingestor.session.get = Mock(return_value=response)
+        
+        pages = list(ingestor.iter_pages())
+        
+        self.assertEqual([len(p) for p in pages], [40, 40, 15])
+        self.assertIn("/datastore/dump/test-resource", ingestor.session.get.call_args[0][0])
+        self.assertEqual(pages[0][1], {"_id": "1", "school": "School 1", "confirmed_student_cases": None})
+        
+        df = ingestor.transform_records(pages[0])
+        self.assertEqual(df.iloc[2]["CONFIRMED_CASES"], 2)
+    
+    @patch("base_ingestor.set_watermark")
+    @patch("base_ingestor.get_watermark")
+    def test_watermark_fetches_only_new_rows(self, mock_get, mock_set):
+        """Without SQL pushdown, rows at or below the watermark are filtered locally."""
+        mock_get.return_value = {"column": "_id", "value": "89", "resource_id": "test-resource"}
+        ingestor = SchoolCasesIngestor(fetch_concurrency=1)
+        ingestor.page_size = 10
+        self._fake_datastore(ingestor, total=95)
+        
+        fake_page = ingestor._fetch_page
+        
+        def no_sql(offset, limit):
+            if ingestor._pushdown_active:
+                raise ValueError("datastore_search_sql disabled")
+            return fake_page(offset, limit)
+        
+        ingestor._fetch_page = no_sql
+        ingestor.load_to_snowflake = len
+        ingestor.log_ingestion = Mock()
+        
+        result = ingestor.run(stream=True)
+        
+        self.assertEqual(result["records_fetched"], 5)
+        mock_set.assert_called_once()
+        self.assertEqual(mock_set.call_args[0][:3], ("school_cases", "_id", 94))
+    
+    @patch("base_ingestor.set_watermark")
+    @patch("base_ingestor.get_watermark")
+    def test_watermark_ignored_for_new_resource(self, mock_get, mock_set):
+        """A watermark recorded against another resource triggers a full load."""
+        mock_get.return_value = {"column": "_id", "value": "89", "resource_id": "old-resource"}
+        ingestor = SchoolCasesIngestor(fetch_concurrency=1)
+        self._fake_datastore(ingestor, total=95)
+        ingestor.load_to_snowflake = len
+        ingestor.log_ingestion = Mock()
+        
+        result = ingestor.run(stream=True)
+        
+        self.assertEqual(result["records_fetched"], 95)
+
+
+    @patch("base_ingestor.set_watermark")
+    @patch("base_ingestor.get_watermark")
+    def test_watermark_reset_when_source_republished(self, mock_get, mock_set):
+        """Fewer rows, or a modification without new rows, means a full load."""
+        cases = [
+            ("shrank", {"last_modified": "2021-07-02T00:00:00", "row_count": 95}, 120, 95),
+            ("corrected", {"last_modified": "2021-07-02T00:00:00", "row_count": 95}, 95, 95),
+            ("appended", {"last_modified": "2021-07-02T00:00:00", "row_count": 95}, 90, 5)
+        ]
+        for name, entry, loaded_rows, fetched in cases:
+            with self.subTest(name):
+                mock_get.return_value = {"column": "_id", "value": "89", "resource_id": "test-resource",
+                                         "source_modified": "2021-07-01T00:00:00",
+                                         "source_rows": loaded_rows}
+                ingestor = SchoolCasesIngestor(fetch_concurrency=1)
+                self._fake_datastore(ingestor, total=95)
+                ingestor.catalog.get.return_value = {"datastore_active": False, **entry}
+                ingestor.load_to_snowflake = len
+                ingestor.log_ingestion = Mock()
+                
+                result = ingestor.run(stream=True)
+                
+                self.assertEqual(result["records_fetched"], fetched)
+                self.assertEqual(mock_set.call_args.kwargs["source_rows"], 95)
+    
+    @patch("base_ingestor.set_watermark")
+    @patch("base_ingestor.get_watermark")
+    def test_outbreaks_reload_in_full(self, mock_get, mock_set):
+        """Outbreaks are corrected in place, so a re-published resource is never loaded as a delta."""
+        mock_get.return_value = {"column": "_id", "value": "89", "resource_id": "test-resource",
+                                 "source_modified": "2021-07-01T00:00:00", "source_rows": 90}
+        ingestor = OutbreaksIngestor(filter_to_schools=False, pushdown=False, fetch_concurrency=1)
+        self._fake_datastore(ingestor, total=95)
+        ingestor.catalog.get.return_value = {"datastore_active": False,
+                                             "last_modified": "2021-07-02T00:00:00", "row_count": 95}
+        ingestor.load_to_snowflake = len
+        ingestor.log_ingestion = Mock()
+        
+        with redirect_stdout(io.StringIO()):
+            result = ingestor.run(stream=True)
+        
+        self.assertEqual(result["records_fetched"], 95)
+        mock_get.assert_not_called()
+        mock_set.assert_not_called()
+    
+    def test_numeric_watermark_checked_once(self):
+        ingestor = OutbreaksIngestor()
+        ingestor.watermark_column = "outbreak_id"
+        ingestor.catalog = Mock()
+        ingestor.catalog.fields.return_value = [{"id": "outbreak_id", "type": "int4"}]
+        ingestor._watermark = "10"
+        
+        records = [{"outbreak_id": str(i)} for i in range(20)]
+        self.assertEqual(sum(ingestor._past_watermark(r["outbreak_id"]) for r in records), 9)
+        ingestor._advance_watermark(records)
+        
+        self.assertEqual(ingestor._watermark_seen, "19")
+        ingestor.catalog.fields.assert_called_once()
+
+
+class TestOutbreakPushdown(unittest.TestCase):
+    """Test server-side filtering for outbreaks."""
+    
+    RECORDS = [
+        {"_id": 1, "outbreak_group": "3 Education", "phu_num": 2236, "phu_name": "Halton Region"},
+        {"_id": 2, "outbreak_group": "1 Congregate Care", "phu_num": 2236, "phu_name": "Halton Region"},
+        {"_id": 3, "outbreak_group": "3 Education", "phu_num": 3895, "phu_name": "Toronto"}
+    ]
+    
+    def setUp(self):
+        self.ingestor = OutbreaksIngestor(halton_only=True)
+        self.ingestor._resource_id = "outbreak-resource"
+        self.ingestor.catalog = Mock()
+        self.ingestor.catalog.get.return_value = {"datastore_active": True}
+        self.ingestor.catalog.fields.return_value = [
+            {"id": "_id"}, {"id": "_full_text"}, {"id": "outbreak_group"},
+            {"id": "phu_num"}, {"id": "phu_name"}
+        ]
+        self.session_response = Mock(from_cache=False)
+    
+    def test_filters_pushed_into_sql(self):
+        """School and Halton filters become datastore_search_sql conditions."""
+        calls = []
+        
+        def fake_action(action, params):
+            calls.append((action, params))
+            if "COUNT(*)" in params["sql"]:
+                return {"records": [{"total": "1"}]}, self.session_response
+            return {"records": self.RECORDS[:1]}, self.session_response
+        
+        self.ingestor._ckan_action = fake_action
+        records = self.ingestor.fetch_from_api()
+        
+        self.assertEqual(records, self.RECORDS[:1])
+        self.assertTrue(all(action == "datastore_search_sql" for action, _ in calls))
+        sql = calls[0][1]["sql"]
+        self.assertIn("LIKE '%education%'", sql)
+        self.assertIn("IN ('2236')", sql)
+        self.assertNotIn("_full_text", sql)
+    
+    def test_watermark_pushed_into_sql(self):
+        """The watermark becomes a range condition alongside the filters."""
+        calls = []
+        
+        def fake_action(action, params):
+            calls.append(params["sql"])
+            if "COUNT(*)" in params["sql"]:
+                return {"records": [{"total": "0"}]}, self.session_response
+            return {"records": []}, self.session_response
+        
+        self.ingestor._ckan_action = fake_action
+        self.ingestor.watermark_column = "_id"
+        self.ingestor._watermark = "100"
+        self.ingestor.fetch_from_api()
+        
+        self.assertIn('("_id" > 100)', calls[0])
+        self.assertIn('ORDER BY "_id"', calls[0])
+    
+    def test_falls_back_to_client_side_filtering(self):
+        """When datastore_search_sql fails, plain pages are filtered in transform."""
+        def fake_action(action, params):
+            if action == "datastore_search_sql":
+                raise ValueError("Access denied")
+            return {"records": self.RECORDS, "total": 3}, self.session_response
+        
+        self.ingestor._ckan_action = fake_action
+        records = self.ingestor.fetch_from_api()
+        df = self.ingestor.transform_records(records)
+        
+        self.assertFalse(self.ingestor._pushdown_active)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(df["OUTBREAK_ID"].tolist(), ["1"])
+
+
 class TestDataQuality(unittest.TestCase):
     """Test data quality rules."""
     
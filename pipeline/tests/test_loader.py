@@ -0,0 +1,141 @@
+"""
+Unit tests for the Parquet / COPY INTO bulk loader.
+
+Run with: pytest pipeline/tests/test_loader.py
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from pipeline.ingest_all_ed_wait_times import MultiNetworkEDScraper
+from pipeline.loader import BulkLoader, HAS_PYARROW, build_merge_sql, merge_key_frame
+
+
+class TestBulkLoader(unittest.TestCase):
+    """Test batching and the statements sent to Snowflake."""
+    
+    def setUp(self):
+        self.conn = MagicMock()
+        self.cursor = self.conn.cursor.return_value
+        self.df = pd.DataFrame({"SCHOOL_NAME": ["A", "B", "C"], "CONFIRMED_CASES": [1, 2, 3]})
+    
+    def test_batches_frames_per_table(self):
+        """Frames queued for one table are loaded together in one session."""
+        loader = BulkLoader(conn=self.conn, mode="write_pandas", write_mode="append")
+        loaded_frames = []
+        
+        with patch.object(BulkLoader, "_write_pandas",
+                          side_effect=lambda conn, table, df: loaded_frames.append((table, df)) or len(df)):
+            with loader:
+                loader.add("SCHOOL_CASES", self.df)
+                loader.add("SCHOOL_CASES", self.df)
+                loader.add("OUTBREAKS", self.df.iloc[:1])
+                loader.add("OUTBREAKS", self.df.iloc[:0])
+        
+        self.assertEqual([(t, len(df)) for t, df in loaded_frames],
+                         [("SCHOOL_CASES", 6), ("OUTBREAKS", 1)])
+        self.assertEqual(loader.rows_loaded, {"SCHOOL_CASES": 6, "OUTBREAKS": 1})
+    
+    def test_nothing_loaded_after_error(self):
+        """A failed batch is not flushed on exit."""
+        loader = BulkLoader(conn=self.conn, mode="write_pandas", write_mode="append")
+        with patch.object(BulkLoader, "_write_pandas") as write:
+            with self.assertRaises(RuntimeError):
+                with loader:
+                    loader.add("SCHOOL_CASES", self.df)
+                    raise RuntimeError("transform failed")
+        write.assert_not_called()
+    
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_copy_into_stages_parquet_files(self):
+        """Parquet files are PUT in parallel, then loaded with one COPY INTO."""
+        self.cursor.fetchall.return_value = [("f1", "LOADED", 2, 2), ("f2", "LOADED", 1, 1)]
+        loader = BulkLoader(conn=self.conn, mode="copy", file_rows=2, put_threads=8,
+                            write_mode="append")
+        loader.add("SCHOOL_CASES", self.df)
+        
+        self.assertEqual(loader.flush(), {"SCHOOL_CASES": 3})
+        
+        statements = [c.args[0] for c in self.cursor.execute.call_args_list]
+        put = next(s for s in statements if s.startswith("PUT"))
+        self.assertIn("*.parquet", put)
+        self.assertIn("PARALLEL=8", put)
+        self.assertEqual(sum("COPY INTO RAW.SCHOOL_CASES" in s for s in statements), 1)
+    
+    def test_merge_dedupes_batch_and_upserts(self):
+        """Keyed tables land in a temp table and are MERGEd, one source row per key."""
+        self.cursor.fetchone.return_value = (1, 1)
+        loader = BulkLoader(conn=self.conn, mode="write_pandas", write_mode="merge")
+        df = pd.DataFrame({
+            "OUTBREAK_ID": ["1", "2", "2"],
+            "OUTBREAK_STATUS": ["Active", "Active", "Resolved"]
+        })
+        
+        with patch.object(BulkLoader, "_write_pandas", return_value=2) as write:
+            loader.add("OUTBREAKS", df)
+            self.assertEqual(loader.flush(), {"OUTBREAKS": 2})
+        
+        temp_table, staged = write.call_args[0][1:]
+        self.assertTrue(temp_table.startswith("OUTBREAKS_MERGE_"))
+        self.assertEqual(staged["OUTBREAK_STATUS"].tolist(), ["Active", "Resolved"])
+        
+        statements = [c.args[0] for c in self.cursor.execute.call_args_list]
+        self.assertTrue(any("MERGE INTO RAW.OUTBREAKS" in s for s in statements))
+        self.assertIn(f"DROP TABLE IF EXISTS {temp_table}", statements)
+    
+    def test_merge_sql_skips_unchanged_rows(self):
+        """Matched rows are only updated when a compared column differs."""
+        sql = build_merge_sql(
+            "ED_WAIT_TIMES", "TMP",
+            ["HOSPITAL_CODE", "SOURCE_UPDATED", "WAIT_TOTAL_MINUTES", "RAW_JSON"],
+            ["HOSPITAL_CODE", "SOURCE_UPDATED"]
+        )
+        
+        self.assertIn("EQUAL_NULL(t.HOSPITAL_CODE, s.HOSPITAL_CODE) AND "
+                      "EQUAL_NULL(t.SOURCE_UPDATED, s.SOURCE_UPDATED)", sql)
+        self.assertIn("WHEN MATCHED AND (NOT EQUAL_NULL(t.WAIT_TOTAL_MINUTES, s.WAIT_TOTAL_MINUTES))", sql)
+        self.assertNotIn("EQUAL_NULL(t.RAW_JSON", sql)
+    
+    def test_ed_scrapes_without_source_time_are_separate_rows(self):
+        """Two scrapes of a hospital that publishes no update time key as two rows."""
+        def scrape(scraped_at, minutes):
+            return MultiNetworkEDScraper().normalize([{
+                "hospital_name": "Toronto General Hospital", "network": "UHN Toronto",
+                "wait_hours": 0, "wait_minutes": minutes, "wait_total_minutes": minutes,
+                "scraped_at": scraped_at
+            }])
+        
+        self.cursor.fetchone.return_value = (2, 0)
+        loader = BulkLoader(conn=self.conn, mode="write_pandas", write_mode="merge")
+        with patch.object(BulkLoader, "_write_pandas", return_value=2) as write:
+            loader.add("ED_WAIT_TIMES", scrape("2026-01-05T10:00:00", 40))
+            loader.add("ED_WAIT_TIMES", scrape("2026-01-05T11:00:00", 55))
+            loader.flush()
+        
+        staged = write.call_args[0][2]
+        self.assertEqual(staged["WAIT_TOTAL_MINUTES"].tolist(), [40, 55])
+        keys = merge_key_frame("ED_WAIT_TIMES", staged, ["HOSPITAL_CODE", "SOURCE_UPDATED"])
+        self.assertEqual(len(keys.drop_duplicates()), 2)
+        
+        merge = next(c.args[0] for c in self.cursor.execute.call_args_list if "MERGE INTO" in c.args[0])
+        self.assertIn("EQUAL_NULL(COALESCE(NULLIF(t.SOURCE_UPDATED, ''), t.SCRAPED_AT::VARCHAR), "
+                      "COALESCE(NULLIF(s.SOURCE_UPDATED, ''), s.SCRAPED_AT::VARCHAR))", merge)
+    
+    def test_ed_source_time_still_dedupes(self):
+        """Re-scraping a page with the same update time keeps one row."""
+        df = pd.DataFrame({
+            "HOSPITAL_CODE": ["milton", "milton"],
+            "SOURCE_UPDATED": ["Dec 28, 10:30 AM", "Dec 28, 10:30 AM"],
+            "SCRAPED_AT": ["2026-01-05T10:00:00", "2026-01-05T11:00:00"]
+        })
+        keys = merge_key_frame("ED_WAIT_TIMES", df, ["HOSPITAL_CODE", "SOURCE_UPDATED"])
+        self.assertEqual(len(keys.drop_duplicates()), 1)
+    
+    def test_falls_back_without_pyarrow(self):
+        with patch("pipeline.loader.HAS_PYARROW", False):
+            self.assertEqual(BulkLoader(conn=self.conn, mode="copy").mode, "write_pandas")
+
+
+if __name__ == "__main__":
+    unittest.main()
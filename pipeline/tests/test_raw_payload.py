@@ -0,0 +1,74 @@
+"""
+Unit tests for RAW_JSON payload policies.
+
+Run with: pytest pipeline/tests/test_raw_payload.py
+"""
+import gzip
+import json
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.raw_payload import RawPayloadPolicy, dumps
+
+
+class TestRawPayloadPolicy(unittest.TestCase):
+    """Test each policy against the same records."""
+    
+    RECORDS = [
+        {"_id": i, "school": f"School {i}", "note": "" if i % 2 else "late report", "extra": None}
+        for i in range(5)
+    ]
+    
+    def test_dumps_handles_datetimes(self):
+        encoded = dumps({"at": datetime(2025, 1, 2, 3, 4, 5), "n": 1})
+        self.assertEqual(json.loads(encoded), {"at": "2025-01-02T03:04:05", "n": 1})
+    
+    def test_full(self):
+        policy = RawPayloadPolicy("school_cases", mode="full")
+        self.assertEqual([json.loads(v) for v in policy.encode(self.RECORDS)], self.RECORDS)
+    
+    def test_compact_drops_typed_and_empty_fields(self):
+        policy = RawPayloadPolicy("school_cases", mode="compact", typed_fields=["school"])
+        encoded = [json.loads(v) for v in policy.encode(self.RECORDS)]
+        self.assertEqual(encoded[0], {"_id": 0, "note": "late report"})
+        self.assertEqual(encoded[1], {"_id": 1})
+    
+    def test_compact_frame_with_only_typed_fields(self):
+        policy = RawPayloadPolicy("school_cases", mode="compact", typed_fields=["_id", "school"])
+        frame = pd.DataFrame(self.RECORDS)[["_id", "school"]]
+        self.assertEqual(policy.encode_frame(frame), ["{}"] * 5)
+    
+    def test_sampled(self):
+        policy = RawPayloadPolicy("school_cases", mode="sampled", sample_every=2)
+        encoded = policy.encode(self.RECORDS)
+        self.assertEqual([v is not None for v in encoded], [True, False, True, False, True])
+        
+        # DataFrames sample the same rows
+        frame_encoded = policy.encode_frame(pd.DataFrame(self.RECORDS))
+        self.assertEqual([v is not None for v in frame_encoded], [True, False, True, False, True])
+    
+    def test_off_archives_records(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            policy = RawPayloadPolicy("school_cases", mode="off", archive_dir=Path(tmp), run_id="run1")
+            self.assertEqual(policy.encode(self.RECORDS[:3]), [None] * 3)
+            policy.encode(self.RECORDS[3:])
+            
+            with gzip.open(policy.archive_path, "rt") as f:
+                archived = [json.loads(line) for line in f]
+        
+        self.assertEqual(archived, self.RECORDS)
+        self.assertEqual(policy.archived, 5)
+    
+    def test_dataset_policy_from_config(self):
+        self.assertEqual(RawPayloadPolicy("wastewater_surveillance").mode, "compact")
+        self.assertEqual(RawPayloadPolicy("unlisted_dataset").mode, "full")
+        with self.assertRaises(ValueError):
+            RawPayloadPolicy("school_cases", mode="zip")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Unit tests for the concurrent hospital scraping engine.
+
+Run with: pytest pipeline/tests/test_scrape_engine.py
+"""
+import threading
+import time
+import unittest
+
+from pipeline.hospital_scrapers.engine import ScrapeTarget, scrape_networks
+
+
+def make_target(name: str, url: str, delay: float = 0.0, hospitals=None, error=None, log=None):
+    def fetch(timeout):
+        if log is not None:
+            log.append(("start", name, time.perf_counter()))
+        time.sleep(delay)
+        if log is not None:
+            log.append(("end", name, time.perf_counter()))
+        if error:
+            raise error
+        return f"<html>{name}</html>"
+    
+    def parse(response):
+        return [dict(h, parsed_on=threading.current_thread().name) for h in (hospitals or [])]
+    
+    return ScrapeTarget(name, url, fetch, parse)
+
+
+class TestScrapeNetworks(unittest.TestCase):
+    """Networks overlap, slow ones are cut off at the deadline."""
+    
+    def test_networks_fetched_concurrently(self):
+        targets = [
+            make_target(f"Network {i}", f"https://host{i}.example/ed", delay=0.3,
+                        hospitals=[{"hospital_name": f"Hospital {i}"}])
+            for i in range(4)
+        ]
+        started = time.perf_counter()
+        outcomes = scrape_networks(targets, deadline=5)
+        elapsed = time.perf_counter() - started
+        
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual([o["status"] for o in outcomes], ["ok"] * 4)
+        self.assertEqual(outcomes[2]["hospitals"][0]["network"], "Network 2")
+        self.assertIn("scraped_at", outcomes[2]["hospitals"][0])
+    
+    def test_deadline_returns_partial_results(self):
+        targets = [
+            make_target("Fast", "https://fast.example/ed", hospitals=[{"hospital_name": "A"}]),
+            make_target("Dead", "https://dead.example/ed", delay=3)
+        ]
+        started = time.perf_counter()
+        outcomes = scrape_networks(targets, deadline=0.5)
+        
+        self.assertLess(time.perf_counter() - started, 1.5)
+        self.assertEqual([o["status"] for o in outcomes], ["ok", "timeout"])
+        self.assertEqual(len(outcomes[0]["hospitals"]), 1)
+        self.assertEqual(outcomes[1]["hospitals"], [])
+    
+    def test_per_host_limit(self):
+        log = []
+        targets = [make_target(f"Site {i}", "https://same.example/ed", delay=0.1, log=log)
+                   for i in range(3)]
+        scrape_networks(targets, deadline=5, per_host_limit=1)
+        
+        events = sorted(log, key=lambda e: e[2])
+        running = peak = 0
+        for kind, _, _ in events:
+            running += 1 if kind == "start" else -1
+            peak = max(peak, running)
+        self.assertEqual(peak, 1)
+    
+    def test_errors_and_parsing_off_loop(self):
+        targets = [
+            make_target("Broken", "https://broken.example/ed", error=ConnectionError("refused")),
+            make_target("Working", "https://ok.example/ed", hospitals=[{"hospital_name": "B"}])
+        ]
+        broken, working = scrape_networks(targets, deadline=5)
+        
+        self.assertEqual(broken["status"], "error")
+        self.assertIn("refused", broken["error"])
+        self.assertTrue(working["hospitals"][0]["parsed_on"].startswith("scrape-parse"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Unit tests for the hospital scraper registry and the multi-network batch.
+
+Run with: pytest pipeline/tests/test_scraper_registry.py
+"""
+import io
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from pipeline.hospital_scrapers.base import BaseHospitalScraper
+from pipeline.hospital_scrapers.halton import HaltonHealthcareScraper
+from pipeline.hospital_scrapers.registry import build_scrapers, discover, enabled_keys
+from pipeline.ingest_all_ed_wait_times import MultiNetworkEDScraper
+
+HALTON_PAGE = """
+<html>
+Last Updated: Dec 28, 10:30 AM
+georgetown01 Hour(s) and 48 Minute(s)
+milton02 Hour(s) and 37 Minute(s)
+oakville04 Hour(s) and 04 Minute(s)
+</html>
+"""
+
+
+class TestScraperRegistry(unittest.TestCase):
+    """Discovery, enable flags and optional dependencies."""
+    
+    def test_discovers_network_modules(self):
+        scrapers, unavailable = discover()
+        
+        for key in ["halton", "niagara", "uhn", "london", "hamilton", "lakeridge"]:
+            self.assertIn(key, scrapers)
+            self.assertTrue(issubclass(scrapers[key], BaseHospitalScraper))
+        # Infrastructure modules are not networks
+        self.assertNotIn("base", scrapers)
+        self.assertNotIn("selenium_base", scrapers)
+        # Selenium scrapers are either registered or reported, never an error
+        self.assertTrue("lakeridge_selenium" in scrapers or "lakeridge_selenium" in unavailable)
+    
+    def test_enable_flags_and_override(self):
+        flags = {"halton": True, "niagara": False, "uhn": True}
+        self.assertEqual(enabled_keys(flags, override=None), ["halton", "uhn"])
+        self.assertEqual(enabled_keys(flags, override="niagara, london"), ["niagara", "london"])
+    
+    def test_build_skips_unknown_keys(self):
+        scrapers = build_scrapers({"london": True, "nowhere": True}, override=None)
+        self.assertEqual([s.network_name for s in scrapers], ["London Health Sciences"])
+
+
+class TestHaltonAdapter(unittest.TestCase):
+    """The production Halton parser behind the BaseHospitalScraper interface."""
+    
+    def test_parse_response_adds_network_metadata(self):
+        scraper = HaltonHealthcareScraper()
+        records = scraper.parse_response(SimpleNamespace(text=HALTON_PAGE))
+        
+        self.assertEqual(len(records), 3)
+        milton = next(r for r in records if r["hospital_code"] == "milton")
+        self.assertEqual(milton["wait_total_minutes"], 157)
+        self.assertEqual((milton["city"], milton["region"]), ("Milton", "Halton"))
+        self.assertEqual(milton["network"], "Halton Healthcare")
+
+
+class TestMultiNetworkBatch(unittest.TestCase):
+    """Every network's records become one ED_WAIT_TIMES batch."""
+    
+    def test_normalize_deduplicates_hospitals(self):
+        hospitals = [
+            {"hospital_name": "Oshawa Hospital", "network": "Lakeridge Health", "city": "Oshawa",
+             "wait_hours": 1, "wait_minutes": 5, "wait_total_minutes": 65},
+            # Same hospital from a second scraper for the network
+            {"hospital_name": "Oshawa Hospital", "network": "Lakeridge Health", "city": "Oshawa",
+             "wait_hours": 1, "wait_minutes": 10, "wait_total_minutes": 70},
+            {"hospital_code": "milton", "hospital_name": "Milton District Hospital",
+             "network": "Halton Healthcare", "source_updated": None,
+             "wait_hours": 2, "wait_minutes": 37, "wait_total_minutes": 157}
+        ]
+        df = MultiNetworkEDScraper().normalize(hospitals)
+        
+        self.assertEqual(df["HOSPITAL_CODE"].tolist(), ["oshawa_hospital", "milton"])
+        self.assertEqual(df["WAIT_TOTAL_MINUTES"].tolist(), [65, 157])
+        self.assertEqual(df["SOURCE_UPDATED"].tolist(), ["", ""])
+        self.assertEqual(len(df["RAW_JSON"]), 2)
+    
+    def test_pages_marked_processed_only_after_load(self):
+        record = {"hospital_name": "Oshawa Hospital", "wait_hours": 1, "wait_minutes": 5,
+                  "wait_total_minutes": 65}
+        ok, empty = Mock(), Mock()
+        outcomes = [{"network": "Lakeridge Health", "status": "ok", "hospitals": [record],
+                     "seconds": 0.1, "error": None},
+                    {"network": "Niagara Health", "status": "empty", "hospitals": [],
+                     "seconds": 0.1, "error": None}]
+        scraper = MultiNetworkEDScraper()
+        scraper.targets = lambda: [ok, empty]
+        
+        with patch("pipeline.ingest_all_ed_wait_times.scrape_networks", return_value=outcomes), \
+                redirect_stdout(io.StringIO()):
+            with patch.object(scraper, "load_to_snowflake", side_effect=RuntimeError("load failed")):
+                with self.assertRaises(RuntimeError):
+                    scraper.run()
+            ok.mark_processed.assert_not_called()
+            
+            with patch.object(scraper, "load_to_snowflake", return_value=1):
+                scraper.run()
+        
+        ok.mark_processed.assert_called_once()
+        empty.mark_processed.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Regression tests for the hospital scrapers on recorded pages.
+
+Pages in tests/fixtures/ed_pages are served by a local ReplayServer, so
+these run offline. See page_replay.py for re-recording the corpus.
+
+Run with: pytest pipeline/tests/test_scrapers.py
+"""
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from pipeline.hospital_scrapers.engine import scrape_networks
+from pipeline.hospital_scrapers.niagara import NiagaraHealthScraper
+from pipeline.hospital_scrapers.registry import discover
+from pipeline.http_cache import HTTPCache
+from pipeline.page_replay import ED_PAGES_DIR, ReplayServer, load_expected, replay_scraper, score
+
+
+class TestRecordedPages(unittest.TestCase):
+    """Every scraper extracts exactly the expected records from its recorded page."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.scrapers, cls.unavailable = discover()
+        cls.expected = load_expected()
+        cls.server = ReplayServer()
+        cls.server.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+    
+    def scrape(self, key: str, scraper=None) -> list[dict]:
+        scraper = scraper or replay_scraper(self.scrapers[key], self.server.url_for(key))
+        with redirect_stdout(io.StringIO()):
+            return scraper.parse_response(scraper.fetch())
+    
+    def test_corpus_covers_every_scraper(self):
+        keys = set(self.scrapers) | set(self.unavailable)
+        self.assertEqual(keys, set(self.expected))
+        for key in keys:
+            self.assertTrue((ED_PAGES_DIR / f"{key}.html").is_file(), key)
+    
+    def test_extraction_matches_expected(self):
+        for key, expected in self.expected.items():
+            with self.subTest(scraper=key):
+                if key in self.unavailable:
+                    self.skipTest(f"{key}: {self.unavailable[key]}")
+                
+                result = score(self.scrape(key), expected)
+                self.assertEqual(result["missing"], [])
+                self.assertEqual(result["unexpected"], [])
+    
+    def test_network_metadata_added(self):
+        records = self.scrape("uhn")
+        self.assertEqual({r["network"] for r in records}, {"UHN Toronto"})
+        self.assertTrue(all("scraped_at" in r for r in records))
+    
+    def test_container_keeps_site_menu_out(self):
+        # The Niagara page lists every site in its menu, outside <main>
+        scraper = replay_scraper(NiagaraHealthScraper, self.server.url_for("niagara"))
+        scraper.container = None
+        
+        result = score(self.scrape("niagara", scraper), self.expected["niagara"])
+        self.assertGreater(len(result["unexpected"]), 0)
+    
+    def test_engine_scrapes_corpus_concurrently(self):
+        targets = [
+            replay_scraper(cls, self.server.url_for(key))
+            for key, cls in self.scrapers.items()
+        ]
+        with redirect_stdout(io.StringIO()):
+            outcomes = scrape_networks(targets, deadline=10)
+        
+        for outcome, (key, _) in zip(outcomes, self.scrapers.items()):
+            self.assertEqual(outcome["status"], "ok" if self.expected[key] else "empty", key)
+
+
+class TestReplayServer(unittest.TestCase):
+    """The stand-in server revalidates like the live sites."""
+    
+    def test_etag_revalidation(self):
+        with tempfile.TemporaryDirectory() as tmp, ReplayServer() as server:
+            cache = HTTPCache(tmp)
+            scraper = replay_scraper(NiagaraHealthScraper, server.url_for("niagara"), cache=cache)
+            
+            with redirect_stdout(io.StringIO()):
+                first = scraper.parse_response(scraper.fetch())
+                replayed = scraper.fetch()  # Parsed but never loaded
+                scraper.mark_processed()
+                third = scraper.fetch()
+            
+            self.assertEqual(len(first), 4)
+            self.assertTrue(replayed.from_cache)
+            self.assertIsNone(third)  # 304 for a page already processed
+            self.assertEqual(server.requests, [("niagara", 200), ("niagara", 304), ("niagara", 304)])
+    
+    def test_unknown_page_is_404(self):
+        with ReplayServer() as server:
+            scraper = replay_scraper(NiagaraHealthScraper, server.url_for("nowhere"))
+            with self.assertRaises(Exception):
+                scraper.fetch()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Unit tests for the dependency-aware task runner.
+
+Run with: pytest pipeline/tests/test_task_graph.py
+"""
+import threading
+import time
+import unittest
+
+from pipeline.task_graph import TaskGraph
+
+
+class TestTaskGraph(unittest.TestCase):
+    """Test ordering, concurrency and failure isolation."""
+    
+    def test_independent_tasks_overlap(self):
+        """Wall time is close to the slowest task, not the sum."""
+        graph = TaskGraph()
+        for name in ["a", "b", "c"]:
+            graph.add(name, lambda: time.sleep(0.2))
+        
+        started = time.perf_counter()
+        outcomes = graph.run(max_workers=3)
+        
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertTrue(all(o["seconds"] >= 0.2 for o in outcomes.values()))
+    
+    def test_dependencies_finish_first(self):
+        """A task starts only after the tasks it depends on."""
+        order = []
+        lock = threading.Lock()
+        
+        def task(name, delay=0.0):
+            def fn():
+                time.sleep(delay)
+                with lock:
+                    order.append(name)
+                return name
+            return fn
+        
+        graph = TaskGraph()
+        graph.add("catalog", task("catalog", delay=0.1))
+        graph.add("school_cases", task("school_cases"), depends_on=["catalog"])
+        graph.add("outbreaks", task("outbreaks"), depends_on=["catalog"])
+        
+        outcomes = graph.run(max_workers=3)
+        
+        self.assertEqual(order[0], "catalog")
+        self.assertEqual(outcomes["outbreaks"]["value"], "outbreaks")
+    
+    def test_failure_does_not_stop_other_tasks(self):
+        """Exceptions are captured per task; dependents still run."""
+        def fail():
+            raise RuntimeError("boom")
+        
+        graph = TaskGraph()
+        graph.add("catalog", fail)
+        graph.add("school_cases", lambda: "ok", depends_on=["catalog"])
+        
+        outcomes = graph.run()
+        
+        self.assertIsInstance(outcomes["catalog"]["error"], RuntimeError)
+        self.assertEqual(outcomes["school_cases"]["value"], "ok")
+    
+    def test_cycle_rejected(self):
+        graph = TaskGraph()
+        graph.add("a", lambda: None, depends_on=["b"])
+        graph.add("b", lambda: None, depends_on=["a"])
+        
+        with self.assertRaises(ValueError):
+            graph.run()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Per-dataset ingestion watermarks stored in RAW.INGESTION_STATE.
+
+A watermark is the highest value of a source column (e.g. CKAN's _id or a
+reported_date) that has been loaded successfully. Ingestors read it before
+fetching, request only rows past it, and advance it after a successful load.
+See sql/migrations/009_create_ingestion_state.sql.
+
+LocalStateStore keeps the same kind of state in a JSON file under the cache
+directory (restored between CI runs), together with a hash of the last
+loaded source file. Ingestors that use it only ask Snowflake when the local
+entry is missing or due for reconciliation.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from config import (
+    snowflake_connection,
+    LOCAL_STATE_FILE,
+    LOCAL_STATE_RECONCILE_DAYS,
+    SNOWFLAKE_DATABASE,
+    SCHEMA_RAW
+)
+
+
+def get_watermark(dataset_name: str) -> dict | None:
+    """
+    Return {"column", "value", "resource_id", "source_modified", "source_rows"}
+    for a dataset, or None.
+    """
+    try:
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
+            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+            cursor.execute("""
+                SELECT watermark_column, watermark_value, resource_id,
+                       source_modified, source_rows
+                FROM INGESTION_STATE
+                WHERE dataset_name = %s
+            """, (dataset_name,))
+            
+            row = cursor.fetchone()
+            cursor.close()
+            
+            if row and row[1] is not None:
+                return {"column": row[0], "value": row[1], "resource_id": row[2],
+                        "source_modified": row[3],
+                        "source_rows": int(row[4]) if row[4] is not None else None}
+            return None
+    
+    except Exception as e:
+        print(f"  Note: Could not read watermark: {e}")
+        return None
+
+
+def set_watermark(dataset_name: str, column: str, value, resource_id: str | None = None,
+                  run_id: str | None = None, source_modified: str | None = None,
+                  source_rows: int | None = None):
+    """
+    Upsert the watermark for a dataset (failures are logged, not raised).
+    
+    source_modified and source_rows record the version of the resource the
+    watermark was taken from, so a later re-publish can be detected.
+    """
+    try:
+        with snowflake_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(f"USE DATABASE {SNOWFLAKE_DATABASE}")
+            cursor.execute(f"USE SCHEMA {SCHEMA_RAW}")
+            cursor.execute("""
+                MERGE INTO INGESTION_STATE t
+                USING (SELECT %s AS dataset_name, %s AS watermark_column, %s AS watermark_value,
+                              %s AS resource_id, %s AS run_id, %s AS source_modified,
+                              %s AS source_rows) s
+                ON t.dataset_name = s.dataset_name
+                WHEN MATCHED THEN UPDATE SET
+                    watermark_column = s.watermark_column,
+                    watermark_value = s.watermark_value,
+                    resource_id = s.resource_id,
+                    run_id = s.run_id,
+                    source_modified = s.source_modified,
+                    source_rows = s.source_rows,
+                    updated_at = CURRENT_TIMESTAMP()
+                WHEN NOT MATCHED THEN INSERT
+                    (dataset_name, watermark_column, watermark_value, resource_id, run_id,
+                     source_modified, source_rows)
+                    VALUES (s.dataset_name, s.watermark_column, s.watermark_value,
+                            s.resource_id, s.run_id, s.source_modified, s.source_rows)
+            """, (dataset_name, column, str(value), resource_id, run_id,
+                  source_modified, source_rows))
+            
+            cursor.close()
+            print(f"  Watermark for {dataset_name}: {column} = {value}")
+    
+    except Exception as e:
+        # The next run re-fetches from the old watermark
+        print(f"Warning: Could not save watermark: {e}")
+
+
+class LocalStateStore:
+    """Dataset -> {watermark, content_hash, loaded_at, reconciled_at}, on disk."""
+    
+    def __init__(self, path: Path | str = LOCAL_STATE_FILE,
+                 reconcile_after_days: float = LOCAL_STATE_RECONCILE_DAYS):
+        self.path = Path(path)
+        self.reconcile_after_seconds = reconcile_after_days * 86400
+        self._lock = threading.Lock()
+        self._data: dict | None = None
+    
+    def _load(self) -> dict:
+        if self._data is None:
+            try:
+                self._data = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+    
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".json.{os.getpid()}")
+        tmp.write_text(json.dumps(self._data, indent=2))
+        os.replace(tmp, self.path)
+    
+    def get(self, dataset_name: str) -> dict:
+        """Stored state for a dataset ({} if none)."""
+        with self._lock:
+            return dict(self._load().get(dataset_name, {}))
+    
+    def entries(self, prefix: str = "") -> dict[str, dict]:
+        """Stored state for every key starting with prefix."""
+        with self._lock:
+            return {k: dict(v) for k, v in self._load().items() if k.startswith(prefix)}
+    
+    def update(self, dataset_name: str, **fields):
+        """Merge fields into a dataset's state (failures are logged, not raised)."""
+        with self._lock:
+            data = self._load()
+            data[dataset_name] = {**data.get(dataset_name, {}), **fields}
+            try:
+                self._save()
+            except OSError as e:
+                print(f"Warning: Could not save local state: {e}")
+    
+    def needs_reconcile(self, dataset_name: str) -> bool:
+        """True if the local watermark is missing or older than the reconcile window."""
+        state = self.get(dataset_name)
+        if state.get("watermark") is None:
+            return True
+        return time.time() - state.get("reconciled_at", 0) > self.reconcile_after_seconds
+
+
+_local_state: LocalStateStore | None = None
+_local_state_lock = threading.Lock()
+
+
+def get_local_state() -> LocalStateStore:
+    """Process-wide local state store."""
+    global _local_state
+    with _local_state_lock:
+        if _local_state is None:
+            _local_state = LocalStateStore()
+        return _local_state
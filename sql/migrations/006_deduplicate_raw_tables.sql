@@ -3,6 +3,11 @@
 -- Run as: ACCOUNTADMIN or ontario_health_role
 -- Purpose: Remove duplicates from earlier test runs
 -- Strategy: DELETE duplicates, keep most recent ingestion
+--
+-- SUPERSEDED: loads now MERGE on each table's natural key (pipeline/loader.py,
+-- NATURAL_KEYS in pipeline/config.py), so re-runs no longer append duplicates.
+-- Run this once to clean up rows appended before that change; it no longer
+-- needs to be re-run periodically.
 -- ============================================================================
 
 USE DATABASE ONTARIO_HEALTH;
@@ -0,0 +1,21 @@
+-- ============================================================================
+-- Migration 009: Create INGESTION_STATE for Incremental Loads
+-- Run as: ontario_health_svc or ACCOUNTADMIN
+-- Purpose: Per-dataset watermarks (e.g. max _id) so CKAN ingestors fetch
+--          only rows added since the last successful run
+-- ============================================================================
+
+USE DATABASE ONTARIO_HEALTH;
+USE SCHEMA RAW;
+
+CREATE TABLE IF NOT EXISTS RAW.INGESTION_STATE (
+    dataset_name VARCHAR(100) PRIMARY KEY,
+    watermark_column VARCHAR(100),      -- Source column the watermark tracks
+    watermark_value VARCHAR(500),       -- Highest value loaded so far (as text)
+    resource_id VARCHAR(100),           -- CKAN resource the watermark belongs to
+    run_id VARCHAR(50),                 -- Run that last advanced the watermark
+    updated_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+);
+
+-- Verify
+SELECT * FROM RAW.INGESTION_STATE;
@@ -0,0 +1,68 @@
+-- ============================================================================
+-- Migration 010: Precomputed Wastewater Trends
+-- Run as: ontario_health_svc or ACCOUNTADMIN
+-- Purpose: Land Health Infobase's wastewater_trend.csv in RAW.WASTEWATER_TRENDS
+--          and expose it next to rpt_viral_trends, so the published trends
+--          can be validated before they replace the LAG windows over all of
+--          RAW.WASTEWATER_SURVEILLANCE
+-- ============================================================================
+
+USE DATABASE ONTARIO_HEALTH;
+USE SCHEMA RAW;
+
+CREATE TABLE IF NOT EXISTS RAW.WASTEWATER_TRENDS (
+    id NUMBER AUTOINCREMENT PRIMARY KEY,
+    ingested_at TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    source_file VARCHAR(500),
+    location VARCHAR(200),
+    site VARCHAR(200),
+    city VARCHAR(200),
+    province VARCHAR(100),
+    epi_year NUMBER,
+    epi_week NUMBER,
+    week_start DATE,
+    virus_code VARCHAR(50),
+    virus_name VARCHAR(100),
+    viral_load_avg FLOAT,           -- Weekly average reported with the trend
+    prev_week_avg FLOAT,            -- Previous week's average (as published)
+    week_over_week_pct FLOAT,       -- Percent change (as published)
+    trend VARCHAR(100),             -- Health Infobase trend label
+    raw_json VARIANT
+);
+
+
+-- Report: Week-over-week viral trends from the published feed.
+-- A separate view for validation: MARTS_SURVEILLANCE.rpt_viral_trends (the
+-- LAG-based view from migration 004) stays the production source for
+-- sync_viral_trends until the two have been compared over a few weeks.
+--
+-- Metric difference: week_over_week_pct here is the average of each site's
+-- published percent change, not the percent change of the Ontario average
+-- viral load that rpt_viral_trends computes. Small sites with large swings
+-- weigh as much as large ones, so the two columns are not interchangeable.
+CREATE OR REPLACE VIEW MARTS_SURVEILLANCE.rpt_viral_trends_published AS
+SELECT 
+    epi_year,
+    epi_week,
+    virus_name,
+    ROUND(AVG(viral_load_avg), 2) as avg_viral_load,
+    ROUND(AVG(prev_week_avg), 2) as prev_week_avg,
+    ROUND(AVG(week_over_week_pct), 1) as week_over_week_pct
+FROM RAW.WASTEWATER_TRENDS
+WHERE province = 'Ontario' AND epi_year >= 2024
+GROUP BY epi_year, epi_week, virus_name;
+
+-- Verify: compare with the LAG-based view before switching sync_viral_trends
+SELECT 
+    p.epi_year,
+    p.epi_week,
+    p.virus_name,
+    p.avg_viral_load as published_avg,
+    v.avg_viral_load as computed_avg,
+    p.week_over_week_pct as published_pct,
+    v.week_over_week_pct as computed_pct
+FROM MARTS_SURVEILLANCE.rpt_viral_trends_published p
+JOIN MARTS_SURVEILLANCE.rpt_viral_trends v
+    USING (epi_year, epi_week, virus_name)
+ORDER BY p.epi_year DESC, p.epi_week DESC, p.virus_name
+LIMIT 20;
@@ -0,0 +1,21 @@
+-- ============================================================================
+-- Migration 011: Record the Source Version Behind Each Watermark
+-- Run as: ontario_health_svc or ACCOUNTADMIN
+-- Purpose: Store the CKAN resource's last_modified and row count with the
+--          watermark, so a re-published resource (which restarts _id) or
+--          one corrected in place triggers a full load instead of loading
+--          nothing past a stale watermark
+-- ============================================================================
+
+USE DATABASE ONTARIO_HEALTH;
+USE SCHEMA RAW;
+
+ALTER TABLE RAW.INGESTION_STATE 
+ADD COLUMN IF NOT EXISTS source_modified VARCHAR(50);   -- Resource last_modified when the watermark was taken
+
+ALTER TABLE RAW.INGESTION_STATE 
+ADD COLUMN IF NOT EXISTS source_rows NUMBER;            -- Datastore row count at that time
+
+-- Verify
+SELECT dataset_name, watermark_column, watermark_value, source_modified, source_rows
+FROM RAW.INGESTION_STATE;